@@ -1,4 +1,41 @@
-"""Contract analysis agents module."""
-from .crew import analyze_contract, create_contract_crew
+"""
+Contract analysis agents module.
 
-__all__ = ["analyze_contract", "create_contract_crew"]
+The entry points below load CrewAI (and the agent stack it pulls in) on first
+access rather than at import, so processes that only serve uploads never
+load it. agents.inputs, agents.prompts and agents.streaming are safe to
+import eagerly.
+"""
+import importlib
+
+# Public name -> submodule defining it
+_LAZY_EXPORTS = {
+    "analyze_combined_text": ".crew",
+    "analyze_contract": ".crew",
+    "create_contract_crew": ".crew",
+    "extract_facts": ".crew",
+    "analyze_structured_text": ".structured",
+}
+
+__all__ = [
+    "analyze_combined_text",
+    "analyze_contract",
+    "analyze_structured_text",
+    "create_contract_crew",
+    "extract_facts",
+    "load_agent_stack",
+]
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def load_agent_stack() -> None:
+    """Import CrewAI and the agent modules now instead of on the first analysis."""
+    for name in _LAZY_EXPORTS:
+        __getattr__(name)
@@ -1,8 +1,10 @@
 """Agent definitions for contract analysis."""
-from crewai import Agent
-from langchain_openai import ChatOpenAI
+from functools import lru_cache
 
-from config import get_settings
+from crewai import LLM, Agent
+from openai import DefaultHttpxClient
+
+from config import get_model_transport, get_settings
 from .prompts import (
     ANALYST_BACKSTORY,
     ANALYST_GOAL,
@@ -13,18 +15,42 @@ from .prompts import (
 )
 
 
-def get_llm() -> ChatOpenAI:
-    """Get configured LLM instance."""
+@lru_cache()
+def get_http_client() -> DefaultHttpxClient:
+    """Get keep-alive HTTP connection pool shared by all agent LLM calls, with token accounting."""
+    return DefaultHttpxClient(transport=get_model_transport())
+
+
+@lru_cache()
+def get_llm(streaming: bool = False) -> LLM:
+    """
+    Get shared LLM instance.
+
+    CrewAI rebuilds foreign LLM objects (such as langchain's ChatOpenAI) into
+    its own client, so the native LLM is configured directly to keep a single
+    keep-alive HTTP connection pool for every analysis in the process.
+    """
     settings = get_settings()
-    return ChatOpenAI(
+    extra_params = {}
+    if settings.prompt_cache_key:
+        # Routes calls sharing the agents' prompt prefix to the same cache
+        extra_params["prompt_cache_key"] = settings.prompt_cache_key
+    if streaming:
+        # Streamed responses only report token usage when asked to
+        extra_params["stream_options"] = {"include_usage": True}
+    return LLM(
         model=settings.openai_model_name,
         api_key=settings.openai_api_key,
         temperature=0.1,
+        stream=streaming,
+        client_params={"http_client": get_http_client()},
+        **extra_params,
     )
 
 
-def get_contract_analyst() -> Agent:
-    """Get contract analyst agent."""
+@lru_cache()
+def _get_contract_analyst_template() -> Agent:
+    """Get prebuilt contract analyst agent template."""
     return Agent(
         role=ANALYST_ROLE,
         goal=ANALYST_GOAL,
@@ -35,8 +61,9 @@ def get_contract_analyst() -> Agent:
     )
 
 
-def get_risk_detector() -> Agent:
-    """Get risk detector agent."""
+@lru_cache()
+def _get_risk_detector_template() -> Agent:
+    """Get prebuilt risk detector agent template."""
     return Agent(
         role=RISK_DETECTOR_ROLE,
         goal=RISK_DETECTOR_GOAL,
@@ -45,3 +72,19 @@ def get_risk_detector() -> Agent:
         verbose=True,
         allow_delegation=False,
     )
+
+
+def get_contract_analyst(streaming: bool = False) -> Agent:
+    """Get contract analyst agent (per-request copy sharing the pooled LLM)."""
+    agent = _get_contract_analyst_template().copy()
+    if streaming:
+        agent.llm = get_llm(streaming=True)
+    return agent
+
+
+def get_risk_detector(streaming: bool = False) -> Agent:
+    """Get risk detector agent (per-request copy sharing the pooled LLM)."""
+    agent = _get_risk_detector_template().copy()
+    if streaming:
+        agent.llm = get_llm(streaming=True)
+    return agent
@@ -0,0 +1,102 @@
+"""Token-aware splitting of long contract and transcript text."""
+import re
+from functools import lru_cache
+from typing import Callable, Optional
+
+import tiktoken
+
+# Boundaries tried in order, from coarsest to finest
+_SECTION_PATTERN = re.compile(r"\n(?=\[(?:음성 대화|문서 내용)\]\n)")
+_PAGE_PATTERN = re.compile(r"\n{2,}")
+_CLAUSE_PATTERN = re.compile(r"\n(?=\s*(?:제\s*\d+\s*조|\d+[.)]\s|[①-⑳]))")
+_LINE_PATTERN = re.compile(r"\n")
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?。])\s+")
+
+SPLIT_PATTERNS = (_SECTION_PATTERN, _PAGE_PATTERN, _CLAUSE_PATTERN, _LINE_PATTERN, _SENTENCE_PATTERN)
+
+
+@lru_cache()
+def _get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """Get tokenizer for model, or None if the encoding files are unavailable offline."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Count tokens of text for model (falls back to a character estimate)."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        # Korean text averages roughly one token per character
+        return len(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_into_chunks(text: str, max_tokens: int, model: str) -> list[str]:
+    """
+    Split text into chunks of at most max_tokens, preferring section, page and clause boundaries.
+
+    Args:
+        text: Text to split
+        max_tokens: Token budget per chunk
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        Chunks in original order
+    """
+
+    def length(piece: str) -> int:
+        return count_tokens(piece, model)
+
+    return _pack(_split(text, max_tokens, length, 0), max_tokens, length)
+
+
+def _split(text: str, max_tokens: int, length: Callable[[str], int], level: int) -> list[str]:
+    """Recursively split text until every piece fits within the budget."""
+    if length(text) <= max_tokens:
+        return [text]
+
+    if level >= len(SPLIT_PATTERNS):
+        return _hard_split(text, max_tokens, length)
+
+    pieces = [piece for piece in SPLIT_PATTERNS[level].split(text) if piece.strip()]
+    if len(pieces) <= 1:
+        return _split(text, max_tokens, length, level + 1)
+
+    result = []
+    for piece in pieces:
+        result.extend(_split(piece, max_tokens, length, level + 1))
+    return result
+
+
+def _hard_split(text: str, max_tokens: int, length: Callable[[str], int]) -> list[str]:
+    """Split text with no usable boundary by halving until pieces fit."""
+    if length(text) <= max_tokens or len(text) <= 1:
+        return [text]
+    middle = len(text) // 2
+    return _hard_split(text[:middle], max_tokens, length) + _hard_split(text[middle:], max_tokens, length)
+
+
+def _pack(pieces: list[str], max_tokens: int, length: Callable[[str], int]) -> list[str]:
+    """Greedily merge adjacent pieces into chunks up to the budget."""
+    separator_tokens = length("\n\n")
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    for piece in pieces:
+        piece_tokens = length(piece)
+        if current and current_tokens + separator_tokens + piece_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current_tokens += piece_tokens + (separator_tokens if current else 0)
+        current.append(piece)
+
+    if current:
+        chunks.append("\n\n".join(current))
+
+    return chunks
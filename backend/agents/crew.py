@@ -1,11 +1,31 @@
 """Crew orchestration for contract analysis."""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Optional
+
 from crewai import Crew
 
+from config import get_settings
+from services.metrics_service import stage
 from .agents import get_contract_analyst, get_risk_detector
-from .tasks import get_analysis_task, get_risk_detection_task
+from .chunking import count_tokens, split_into_chunks
+from .inputs import EXECUTION_PARALLEL, EXECUTION_SEQUENTIAL, build_combined_text, merge_results
+from .streaming import AnalysisEventCallback, stream_tasks
+from .tasks import (
+    get_analysis_task,
+    get_chunk_extraction_task,
+    get_direct_risk_detection_task,
+    get_risk_detection_task,
+)
 
 
-def create_contract_crew(stt_text: str, ocr_text: str, enable_risk_detection: bool = False) -> Crew:
+def create_contract_crew(
+    stt_text: str,
+    ocr_text: str,
+    enable_risk_detection: bool = False,
+    streaming: bool = False,
+) -> Crew:
     """
     Create crew for contract analysis.
 
@@ -13,14 +33,18 @@ def create_contract_crew(stt_text: str, ocr_text: str, enable_risk_detection: bo
         stt_text: Transcribed speech text
         ocr_text: Extracted document text
         enable_risk_detection: Whether to enable risk detection agent
+        streaming: Whether agents should stream tokens from the LLM
 
     Returns:
         Configured crew
     """
-    combined_text = f"[음성 대화]\n{stt_text}\n\n[문서 내용]\n{ocr_text}"
+    return _create_crew(build_combined_text(stt_text, ocr_text), enable_risk_detection, streaming)
+
 
+def _create_crew(combined_text: str, enable_risk_detection: bool, streaming: bool) -> Crew:
+    """Create sequential crew over prepared input text."""
     # Setup analyst
-    analyst = get_contract_analyst()
+    analyst = get_contract_analyst(streaming=streaming)
     analysis_task = get_analysis_task(analyst, combined_text)
 
     agents = [analyst]
@@ -28,7 +52,7 @@ def create_contract_crew(stt_text: str, ocr_text: str, enable_risk_detection: bo
 
     # Optionally add risk detection
     if enable_risk_detection:
-        risk_detector = get_risk_detector()
+        risk_detector = get_risk_detector(streaming=streaming)
         risk_task = get_risk_detection_task(risk_detector, analysis_task)
         agents.append(risk_detector)
         tasks.append(risk_task)
@@ -36,7 +60,112 @@ def create_contract_crew(stt_text: str, ocr_text: str, enable_risk_detection: bo
     return Crew(agents=agents, tasks=tasks, verbose=True)
 
 
-def analyze_contract(stt_text: str, ocr_text: str, enable_risk_detection: bool = False) -> str:
+def create_parallel_contract_crews(stt_text: str, ocr_text: str, streaming: bool = False) -> tuple[Crew, Crew]:
+    """
+    Create independent analyst and risk detector crews over the same input.
+
+    Args:
+        stt_text: Transcribed speech text
+        ocr_text: Extracted document text
+        streaming: Whether agents should stream tokens from the LLM
+
+    Returns:
+        Analysis crew and risk detection crew
+    """
+    return _create_parallel_crews(build_combined_text(stt_text, ocr_text), streaming)
+
+
+def _create_parallel_crews(combined_text: str, streaming: bool) -> tuple[Crew, Crew]:
+    """Create parallel analyst and risk detector crews over prepared input text."""
+    analyst = get_contract_analyst(streaming=streaming)
+    analysis_task = get_analysis_task(analyst, combined_text)
+
+    risk_detector = get_risk_detector(streaming=streaming)
+    risk_task = get_direct_risk_detection_task(risk_detector, combined_text)
+
+    return (
+        Crew(agents=[analyst], tasks=[analysis_task], verbose=True),
+        Crew(agents=[risk_detector], tasks=[risk_task], verbose=True),
+    )
+
+
+def condense_long_input(combined_text: str, on_event: Optional[AnalysisEventCallback] = None) -> str:
+    """
+    Condense input over the token budget with concurrent per-chunk extraction.
+
+    Each round splits the text along section, page and clause boundaries,
+    extracts facts from every chunk concurrently (map), and joins the notes
+    in order as the input for the next round or the final crew (reduce).
+
+    Args:
+        combined_text: Combined speech and document text
+        on_event: Optional callback receiving "map_progress" events
+
+    Returns:
+        Text within the token budget (or after the maximum number of rounds)
+    """
+    settings = get_settings()
+    model = settings.openai_model_name
+
+    for _ in range(settings.analysis_max_reduce_rounds):
+        if count_tokens(combined_text, model) <= settings.analysis_max_input_tokens:
+            break
+
+        chunks = split_into_chunks(combined_text, settings.analysis_chunk_tokens, model)
+        notes = _extract_chunks(chunks, settings.analysis_map_concurrency, on_event)
+        combined_text = "\n\n".join(
+            f"[부분 {index}/{len(notes)} 추출 내용]\n{note}" for index, note in enumerate(notes, start=1)
+        )
+
+    return combined_text
+
+
+def _extract_chunks(chunks: list[str], concurrency: int, on_event: Optional[AnalysisEventCallback]) -> list[str]:
+    """Run fact extraction over chunks concurrently, returning notes in chunk order."""
+
+    def extract(index: int, chunk: str) -> str:
+        analyst = get_contract_analyst()
+        task = get_chunk_extraction_task(analyst, chunk, index + 1, len(chunks))
+        with stage("chunk_extraction"):
+            return Crew(agents=[analyst], tasks=[task], verbose=True).kickoff().raw
+
+    notes: list[Optional[str]] = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="chunk-extraction") as pool:
+        # Each chunk runs in a copy of the caller's context, keeping its trace id
+        futures = {
+            pool.submit(contextvars.copy_context().run, extract, index, chunk): index
+            for index, chunk in enumerate(chunks)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            notes[futures[future]] = future.result()
+            if on_event is not None:
+                on_event("map_progress", {"completed": completed, "total": len(chunks)})
+
+    return notes
+
+
+def extract_facts(text: str) -> str:
+    """
+    Extract structured facts from one uploaded segment.
+
+    Args:
+        text: Segment text (a transcript or a document)
+
+    Returns:
+        Extracted facts, chunked and extracted concurrently if over the chunk budget
+    """
+    settings = get_settings()
+    chunks = split_into_chunks(text, settings.analysis_chunk_tokens, settings.openai_model_name)
+    return "\n\n".join(_extract_chunks(chunks, settings.analysis_map_concurrency, None))
+
+
+def analyze_contract(
+    stt_text: str,
+    ocr_text: str,
+    enable_risk_detection: bool = False,
+    on_event: Optional[AnalysisEventCallback] = None,
+    execution_mode: str = EXECUTION_SEQUENTIAL,
+) -> str:
     """
     Analyze contract using crew.
 
@@ -44,17 +173,67 @@ def analyze_contract(stt_text: str, ocr_text: str, enable_risk_detection: bool =
         stt_text: Transcribed speech text
         ocr_text: Extracted document text
         enable_risk_detection: Whether to enable risk detection
+        on_event: Optional callback receiving "task_start", "token" and
+            "task_end" events while the crew runs (called on the crew thread)
+        execution_mode: EXECUTION_SEQUENTIAL or EXECUTION_PARALLEL; only
+            applies when risk detection is enabled
 
     Returns:
         Analysis results
     """
-    crew = create_contract_crew(stt_text, ocr_text, enable_risk_detection)
-    result = crew.kickoff()
+    return analyze_combined_text(
+        build_combined_text(stt_text, ocr_text),
+        enable_risk_detection,
+        on_event=on_event,
+        execution_mode=execution_mode,
+    )
+
+
+def analyze_combined_text(
+    combined_text: str,
+    enable_risk_detection: bool = False,
+    on_event: Optional[AnalysisEventCallback] = None,
+    execution_mode: str = EXECUTION_SEQUENTIAL,
+) -> str:
+    """
+    Analyze prepared input text (raw combined text or merged segment facts) using crew.
+
+    Args:
+        combined_text: Input text for the analyst
+        enable_risk_detection: Whether to enable risk detection
+        on_event: Optional callback for streamed agent events
+        execution_mode: EXECUTION_SEQUENTIAL or EXECUTION_PARALLEL
+
+    Returns:
+        Analysis results
+    """
+    streaming = on_event is not None
+    combined_text = condense_long_input(combined_text, on_event)
+
+    if enable_risk_detection and execution_mode == EXECUTION_PARALLEL:
+        crews = _create_parallel_crews(combined_text, streaming)
+    else:
+        crews = (_create_crew(combined_text, enable_risk_detection, streaming),)
+
+    tasks = [task for crew in crews for task in crew.tasks]
+    if streaming:
+        for crew in crews:
+            crew.task_callback = lambda output: on_event("task_end", {"task": output.name, "output": output.raw})
+
+    with stream_tasks(tasks, on_event) if streaming else nullcontext(), stage("crew_kickoff"):
+        if len(crews) == 1:
+            result = crews[0].kickoff()
+        else:
+            analysis_crew, risk_crew = crews
+            # Run the risk crew alongside the analyst on this thread
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="risk-detection") as pool:
+                risk_future = pool.submit(contextvars.copy_context().run, risk_crew.kickoff)
+                summary = analysis_crew.kickoff().raw
+                risks = risk_future.result().raw
+            return merge_results(summary, risks)
 
     # Combine results if risk detection enabled
     if enable_risk_detection and len(result.tasks_output) > 1:
-        summary = result.tasks_output[0].raw
-        risks = result.tasks_output[1].raw
-        return f"## 계약서 요약\n\n{summary}\n\n## 위험 요소 분석\n\n{risks}"
+        return merge_results(result.tasks_output[0].raw, result.tasks_output[1].raw)
 
     return result.raw
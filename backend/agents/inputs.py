@@ -0,0 +1,16 @@
+"""Analysis input layout and execution modes, importable without loading CrewAI."""
+
+# Risk detection reviews the analyst's summary after it finishes
+EXECUTION_SEQUENTIAL = "sequential"
+# Risk detection reviews the raw text at the same time as the analyst
+EXECUTION_PARALLEL = "parallel"
+
+
+def build_combined_text(stt_text: str, ocr_text: str) -> str:
+    """Combine speech and document text into the shared analysis input."""
+    return f"[음성 대화]\n{stt_text}\n\n[문서 내용]\n{ocr_text}"
+
+
+def merge_results(summary: str, risks: str) -> str:
+    """Merge summary and risk analysis into the combined report layout."""
+    return f"## 계약서 요약\n\n{summary}\n\n## 위험 요소 분석\n\n{risks}"
@@ -1,4 +1,13 @@
-"""Prompt templates for contract analysis agents."""
+"""
+Prompt templates for contract analysis agents.
+
+Every template puts its fixed instructions first and the variable input last,
+so consecutive calls share a byte-identical prefix that the provider can
+serve from its prompt cache. Keep new templates in the same layout.
+"""
+
+# Bump when any template below changes so cached analyses are invalidated
+PROMPT_VERSION = "4"
 
 # Contract Analyst Agent
 ANALYST_ROLE = "부동산 계약서 분석가"
@@ -21,9 +30,7 @@ RISK_DETECTOR_BACKSTORY = """
 
 # Analysis Task
 ANALYSIS_TASK_DESCRIPTION = """
-다음 계약서와 대화 내용을 분석하여 핵심 내용만 간결하게 요약하세요:
-
-{combined_text}
+아래 계약서와 대화 내용을 분석하여 핵심 내용만 간결하게 요약하세요.
 
 다음 항목을 포함하되, 존재하는 정보만 포함하세요:
 - 계약 당사자
@@ -33,12 +40,30 @@ ANALYSIS_TASK_DESCRIPTION = """
 - 계약 기간 및 특약 사항
 
 불필요한 설명은 제외하고 핵심만 전달하세요.
+
+{combined_text}
 """
 
-# Risk Detection Task
-RISK_DETECTION_TASK_DESCRIPTION = """
-분석된 계약서를 기반으로 다음을 검토하세요:
+# Chunk Extraction Task (map step for long inputs and per-upload pre-analysis)
+CHUNK_EXTRACTION_TASK_DESCRIPTION = """
+아래는 계약서와 대화 내용의 일부입니다. 이 부분에 나타난 사실만 빠짐없이 추출하세요.
+
+다음 항목에 해당하는 내용을 원문의 금액, 날짜, 이름을 그대로 유지하여 나열하세요:
+- 계약 당사자
+- 계약 대상 (부동산 정보)
+- 금액 및 지급 조건
+- 주요 권리와 의무
+- 계약 기간 및 특약 사항
+- 불리하거나 모호한 조항
 
+해당 내용이 없는 항목은 생략하고, 요약하거나 추측하지 마세요.
+
+[{chunk_index}/{chunk_count} 부분]
+{chunk_text}
+"""
+
+# Risk review checklist shared by the risk tasks and the structured analysis task
+RISK_CHECKLIST = """
 1. 불공정 조항
    - 일방적으로 불리한 조건
    - 과도한 위약금이나 손해배상 조항
@@ -54,7 +79,10 @@ RISK_DETECTION_TASK_DESCRIPTION = """
    - 모호하거나 애매한 표현
    - 분쟁 가능성이 있는 조항
    - 법률 위반 가능성
+"""
 
+# Risk review criteria and report layout shared by the sequential and parallel risk tasks
+RISK_REVIEW_CRITERIA = RISK_CHECKLIST + """
 각 위험 요소에 대해:
 - 위험도: 높음/중간/낮음
 - 설명: 구체적인 이유
@@ -66,3 +94,31 @@ RISK_DETECTION_TASK_DESCRIPTION = """
 - 내용: [구체적 설명]
 - 권장사항: [조언]
 """
+
+# Risk Detection Task (reviews the analyst's summary passed as task context)
+RISK_DETECTION_TASK_DESCRIPTION = """
+분석된 계약서를 기반으로 다음을 검토하세요:
+""" + RISK_REVIEW_CRITERIA
+
+# Direct Risk Detection Task (reviews the raw text, runs in parallel with the analyst)
+RISK_DETECTION_DIRECT_TASK_DESCRIPTION = """
+아래 계약서와 대화 내용을 기반으로 다음을 검토하세요:
+""" + RISK_REVIEW_CRITERIA + """
+{combined_text}
+"""
+
+# Structured Analysis Task (response is constrained to the ContractAnalysis JSON schema)
+STRUCTURED_ANALYSIS_TASK_DESCRIPTION = """
+아래 계약서와 대화 내용을 분석하여 지정된 스키마의 필드를 채우세요.
+
+규칙:
+- 원문에 있는 정보만 사용하고, 없는 값은 null 또는 빈 목록으로 두세요.
+- 금액은 원 단위 정수로 변환하세요 (예: 3억 5천만원 → 350000000).
+- 날짜는 YYYY-MM-DD 형식으로 쓰세요.
+- payment_schedule에는 계약금, 중도금, 잔금 등 지급 일정을 지급 순서대로 넣으세요.
+- summary에는 계약의 핵심을 세 문장 이내로 요약하세요.
+
+risks에는 다음 기준으로 찾은 위험 요소를 넣고, 각각 위험도(높음/중간/낮음), 설명, 권장사항을 쓰세요:
+""" + RISK_CHECKLIST + """
+{combined_text}
+"""
@@ -0,0 +1,65 @@
+"""Bridge CrewAI LLM stream events to per-analysis listeners."""
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from crewai import Task
+
+# Receives (event name, payload) from the crew thread
+AnalysisEventCallback = Callable[[str, dict[str, Any]], None]
+
+# Chunk listeners keyed by CrewAI task id
+_listeners: dict[str, Callable[[str], None]] = {}
+_listeners_lock = threading.Lock()
+
+
+@lru_cache()
+def install_stream_handler() -> None:
+    """Register the process-wide stream chunk handler once."""
+    # Imported here so importing this module does not load CrewAI
+    from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _dispatch_chunk(source: Any, event: LLMStreamChunkEvent) -> None:
+        if event.tool_call is not None or not event.task_id:
+            return
+        with _listeners_lock:
+            listener = _listeners.get(event.task_id)
+        if listener is not None:
+            listener(event.chunk)
+
+
+@contextmanager
+def stream_tasks(tasks: "list[Task]", on_event: AnalysisEventCallback):
+    """
+    Forward streamed tokens of the given tasks to on_event while the block runs.
+
+    Emits "task_start" before the first token of each task and "token" per
+    chunk. Chunk events are dispatched synchronously on the crew thread, so
+    ordering is preserved.
+    """
+    install_stream_handler()
+    started: set[str] = set()
+
+    def make_listener(task_name: str) -> Callable[[str], None]:
+        def listener(chunk: str) -> None:
+            if task_name not in started:
+                started.add(task_name)
+                on_event("task_start", {"task": task_name})
+            on_event("token", {"task": task_name, "text": chunk})
+
+        return listener
+
+    task_ids = [str(task.id) for task in tasks]
+    with _listeners_lock:
+        for task_id, task in zip(task_ids, tasks):
+            _listeners[task_id] = make_listener(task.name)
+
+    try:
+        yield
+    finally:
+        with _listeners_lock:
+            for task_id in task_ids:
+                _listeners.pop(task_id, None)
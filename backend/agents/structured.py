@@ -0,0 +1,76 @@
+"""Schema-constrained contract analysis using OpenAI structured outputs."""
+from functools import lru_cache
+from typing import Optional
+
+from openai import OpenAI
+
+from config import get_settings
+from schemas import ContractAnalysis
+from services.metrics_service import stage
+from .agents import get_http_client
+from .crew import condense_long_input
+from .prompts import ANALYST_BACKSTORY, ANALYST_GOAL, ANALYST_ROLE, STRUCTURED_ANALYSIS_TASK_DESCRIPTION
+from .streaming import AnalysisEventCallback
+
+STRUCTURED_ANALYSIS_TASK_NAME = "structured_analysis"
+
+
+@lru_cache()
+def get_structured_client() -> OpenAI:
+    """Get synchronous OpenAI client sharing the agents' keep-alive connection pool."""
+    return OpenAI(api_key=get_settings().openai_api_key, http_client=get_http_client())
+
+
+def analyze_structured_text(combined_text: str, on_event: Optional[AnalysisEventCallback] = None) -> dict:
+    """
+    Analyze prepared input text into the ContractAnalysis schema.
+
+    The response is constrained to the schema's JSON Schema by the API, so no
+    free-text parsing is needed. Long inputs are condensed by the same
+    map-reduce extraction as the other analysis modes.
+
+    Args:
+        combined_text: Input text for the analyst
+        on_event: Optional callback receiving "task_start", "token" and
+            "task_end" events (called on the calling thread)
+
+    Returns:
+        ContractAnalysis as a JSON-compatible dict
+
+    Raises:
+        ValueError: If the model refuses to answer
+    """
+    settings = get_settings()
+    combined_text = condense_long_input(combined_text, on_event)
+    request = {
+        "model": settings.openai_model_name,
+        "temperature": 0.1,
+        "response_format": ContractAnalysis,
+        "messages": [
+            {"role": "system", "content": f"{ANALYST_ROLE}: {ANALYST_GOAL}\n{ANALYST_BACKSTORY}"},
+            {"role": "user", "content": STRUCTURED_ANALYSIS_TASK_DESCRIPTION.format(combined_text=combined_text)},
+        ],
+    }
+
+    if settings.prompt_cache_key:
+        request["prompt_cache_key"] = settings.prompt_cache_key
+
+    client = get_structured_client()
+    with stage("structured_completion"):
+        if on_event is None:
+            completion = client.chat.completions.parse(**request)
+        else:
+            on_event("task_start", {"task": STRUCTURED_ANALYSIS_TASK_NAME})
+            with client.chat.completions.stream(**request, stream_options={"include_usage": True}) as stream:
+                for event in stream:
+                    if event.type == "content.delta":
+                        on_event("token", {"task": STRUCTURED_ANALYSIS_TASK_NAME, "text": event.delta})
+                completion = stream.get_final_completion()
+
+    message = completion.choices[0].message
+    if message.parsed is None:
+        raise ValueError(f"Structured analysis refused: {message.refusal}")
+
+    if on_event is not None:
+        on_event("task_end", {"task": STRUCTURED_ANALYSIS_TASK_NAME, "output": message.content})
+    return message.parsed.model_dump(mode="json")
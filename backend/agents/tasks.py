@@ -1,12 +1,22 @@
 """Task definitions for contract analysis."""
 from crewai import Agent, Task
 
-from .prompts import ANALYSIS_TASK_DESCRIPTION, RISK_DETECTION_TASK_DESCRIPTION
+from .prompts import (
+    ANALYSIS_TASK_DESCRIPTION,
+    CHUNK_EXTRACTION_TASK_DESCRIPTION,
+    RISK_DETECTION_DIRECT_TASK_DESCRIPTION,
+    RISK_DETECTION_TASK_DESCRIPTION,
+)
+
+ANALYSIS_TASK_NAME = "analysis"
+RISK_DETECTION_TASK_NAME = "risk_detection"
+CHUNK_EXTRACTION_TASK_NAME = "chunk_extraction"
 
 
 def get_analysis_task(agent: Agent, combined_text: str) -> Task:
     """Get contract analysis task."""
     return Task(
+        name=ANALYSIS_TASK_NAME,
         description=ANALYSIS_TASK_DESCRIPTION.format(combined_text=combined_text),
         agent=agent,
         expected_output="명확하고 간결한 계약서 요약",
@@ -16,8 +26,33 @@ def get_analysis_task(agent: Agent, combined_text: str) -> Task:
 def get_risk_detection_task(agent: Agent, context_task: Task) -> Task:
     """Get risk detection task."""
     return Task(
+        name=RISK_DETECTION_TASK_NAME,
         description=RISK_DETECTION_TASK_DESCRIPTION,
         agent=agent,
         expected_output="위험 요소 목록과 구체적인 대응 방안",
         context=[context_task],
     )
+
+
+def get_direct_risk_detection_task(agent: Agent, combined_text: str) -> Task:
+    """Get risk detection task that reviews the raw text without analyst context."""
+    return Task(
+        name=RISK_DETECTION_TASK_NAME,
+        description=RISK_DETECTION_DIRECT_TASK_DESCRIPTION.format(combined_text=combined_text),
+        agent=agent,
+        expected_output="위험 요소 목록과 구체적인 대응 방안",
+    )
+
+
+def get_chunk_extraction_task(agent: Agent, chunk_text: str, chunk_index: int, chunk_count: int) -> Task:
+    """Get fact extraction task for one chunk of a long input."""
+    return Task(
+        name=CHUNK_EXTRACTION_TASK_NAME,
+        description=CHUNK_EXTRACTION_TASK_DESCRIPTION.format(
+            chunk_text=chunk_text,
+            chunk_index=chunk_index,
+            chunk_count=chunk_count,
+        ),
+        agent=agent,
+        expected_output="해당 부분에서 추출한 사실 목록",
+    )
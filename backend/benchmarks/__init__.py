@@ -0,0 +1 @@
+"""Benchmarks run against the backend modules (python -m benchmarks.<name> from backend/)."""
@@ -0,0 +1,122 @@
+"""
+Measure the per-analysis overhead of building agents and LLM clients, with the model mocked out.
+
+Runs the same analyses (summary and summary plus risk detection) against the
+fake model provider with the "instant" profile, so the measured time is the
+process's own work: building the crew, CrewAI's prompt handling and the
+HTTP client stack. Two setups are compared:
+    shared  the pooled LLM, HTTP client and agent templates (current)
+    fresh   the LLM, its HTTP client and the agent templates rebuilt for
+            every analysis, as before they were shared
+
+Reports per-analysis time (mean, p50, p95) and the time spent building the
+agents alone. Network costs of fresh clients (new TCP and TLS handshakes per
+analysis instead of reused keep-alive connections) come on top and are not
+simulated.
+
+Usage (from backend/):
+    python -m benchmarks.analysis_overhead [--iterations 30]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Callable
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["MODEL_PROVIDER"] = "fake"
+os.environ["FAKE_PROVIDER_PROFILE"] = "instant"
+# The account rate limits would pace the calls and dominate the timings
+os.environ["MODEL_RPM_LIMIT"] = "0"
+os.environ["MODEL_TPM_LIMIT"] = "0"
+# Keep CrewAI from phoning home or prompting on stdin during the run
+os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from agents import agents as agent_defs  # noqa: E402
+from agents.crew import analyze_combined_text, build_combined_text  # noqa: E402
+from benchmarks.prompt_cache import make_contract  # noqa: E402
+
+# Analyses run before measuring, so imports and first-use costs are not counted
+WARMUP_ANALYSES = 2
+
+
+def rebuild_shared_clients() -> None:
+    """Drop the pooled LLMs, HTTP client and agent templates so the next analysis builds its own."""
+    for cached in (
+        agent_defs.get_http_client,
+        agent_defs.get_llm,
+        agent_defs._get_contract_analyst_template,
+        agent_defs._get_risk_detector_template,
+    ):
+        cached.cache_clear()
+
+
+def build_agents() -> None:
+    agent_defs.get_contract_analyst()
+    agent_defs.get_risk_detector()
+
+
+def measure(run: Callable[[], object], iterations: int) -> dict[str, list[float]]:
+    """Seconds per call of run in each setup, rebuilding the shared clients before each fresh call."""
+    timings: dict[str, list[float]] = {"fresh": [], "shared": []}
+    for index in range(WARMUP_ANALYSES + iterations):
+        # Alternated, so drift over the run (e.g. CrewAI's growing event state) affects both setups alike
+        for setup in ("fresh", "shared") if index % 2 else ("shared", "fresh"):
+            started = time.perf_counter()
+            if setup == "fresh":
+                rebuild_shared_clients()
+            run()
+            if index >= WARMUP_ANALYSES:
+                timings[setup].append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(setup: str, workload: str, timings: list[float]) -> dict:
+    ordered = sorted(timings)
+    return {
+        "setup": setup,
+        "workload": workload,
+        "iterations": len(timings),
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": ordered[max(0, round(0.95 * len(ordered)) - 1)] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=30, help="measured analyses per setup and workload")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    text = build_combined_text(*make_contract(0, 40))
+    workloads = {
+        "agents": build_agents,
+        "summary": lambda: analyze_combined_text(text),
+        "risk": lambda: analyze_combined_text(text, enable_risk_detection=True),
+    }
+    rows = [
+        summarize(setup, workload, timings)
+        for workload, run in workloads.items()
+        for setup, timings in measure(run, args.iterations).items()
+    ]
+
+    # Printed after all runs, below CrewAI's verbose agent output
+    print(f"{'workload':<8} {'setup':<7} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'saved ms':>8}")
+    fresh = {row["workload"]: row["mean_ms"] for row in rows if row["setup"] == "fresh"}
+    for row in rows:
+        saved = f"{fresh[row['workload']] - row['mean_ms']:.1f}" if row["setup"] == "shared" else "-"
+        print(
+            f"{row['workload']:<8} {row['setup']:<7} {row['mean_ms']:>8.1f} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {saved:>8}"
+        )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(rows, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Measure Vision OCR payloads and latency with and without local image normalization.
+
+Generates a corpus of contract pages in the forms users upload them:
+    scan        clean grayscale PNG page
+    photo       phone photo: 12 MP color JPEG of the page, tinted, noisy
+                and rotated by a few degrees
+    sideways    the same photo stored sideways with an EXIF orientation tag
+
+For each image, reports the uploaded size, the size of the payload
+prepare_image_file sends instead (EXIF rotation, grayscale, deskew,
+downscaling, JPEG or PNG) and the time normalization takes. It then runs
+each image through Vision OCR (ocr_service._process_image, result cache
+off) once as uploaded and once normalized, and reports the latency.
+
+With the fake provider (default) the latency does not depend on the image,
+so it only shows the cost of normalization and of sending the larger
+payload; use --provider openai with OPENAI_API_KEY for the model's own
+latency. Text accuracy is not measured: with the real provider, --json also
+saves both transcripts of each image for comparison.
+
+Usage (from backend/):
+    python -m benchmarks.image_payload [--images 3] [--provider fake] [--profile typical]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["CACHE_ENABLED"] = "false"
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from benchmarks.load import make_page  # noqa: E402
+from config import get_openai_client, get_settings  # noqa: E402
+from services import ocr_service  # noqa: E402
+from services.image_service import prepare_image_file  # noqa: E402
+
+# Pixel size of a 12 MP phone photo in portrait orientation
+PHOTO_SIZE = (3024, 4032)
+
+# EXIF orientation tag and the value for "rotate 90 degrees clockwise to display"
+EXIF_ORIENTATION = 0x0112
+ROTATED_90_CW = 6
+
+
+def make_photo(seed: int, sideways: bool = False) -> bytes:
+    """Render a page as a tinted, noisy and slightly rotated phone photo (JPEG)."""
+    rng = np.random.default_rng(seed)
+    with Image.open(io.BytesIO(make_page(seed))) as page:
+        image = page.convert("RGB").resize(PHOTO_SIZE, Image.Resampling.BICUBIC)
+    image = image.rotate(float(rng.uniform(-3, 3)), resample=Image.Resampling.BICUBIC, fillcolor=(255, 255, 255))
+
+    pixels = np.asarray(image, dtype=np.float32) * np.array([0.95, 0.92, 0.85], dtype=np.float32)
+    pixels += rng.normal(0, 6, pixels.shape).astype(np.float32)
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    exif = Image.Exif()
+    if sideways:
+        # Stored as the sensor saw it; viewers rotate it back by the tag
+        image = image.transpose(Image.Transpose.ROTATE_90)
+        exif[EXIF_ORIENTATION] = ROTATED_90_CW
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=92, exif=exif)
+    return buffer.getvalue()
+
+
+def make_corpus(directory: Path, count: int) -> list[tuple[str, Path]]:
+    """Write count images of each kind, returning (kind, path) pairs."""
+    corpus = []
+    for seed in range(count):
+        for kind, data, suffix in (
+            ("scan", make_page(seed), ".png"),
+            ("photo", make_photo(seed), ".jpg"),
+            ("sideways", make_photo(seed, sideways=True), ".jpg"),
+        ):
+            path = directory / f"{kind}-{seed}{suffix}"
+            path.write_bytes(data)
+            corpus.append((kind, path))
+    return corpus
+
+
+async def ocr(path: Path, normalized: bool) -> tuple[float, str]:
+    settings = get_settings()
+    settings.ocr_image_preprocessing_enabled = normalized
+    started = time.perf_counter()
+    text = await ocr_service._process_image(get_openai_client(), path, settings)
+    return time.perf_counter() - started, text
+
+
+async def measure(corpus: list[tuple[str, Path]]) -> list[dict]:
+    # Warm up: the HTTP client and the render process pool
+    for normalized in (False, True):
+        await ocr(corpus[0][1], normalized)
+
+    rows = []
+    for kind, path in corpus:
+        _, _, payload_bytes, normalize_seconds = prepare_image_file(
+            str(path), get_settings().ocr_image_max_side_px, get_settings().ocr_image_short_side_px
+        )
+        raw_seconds, raw_text = await ocr(path, normalized=False)
+        normalized_seconds, normalized_text = await ocr(path, normalized=True)
+        rows.append(
+            {
+                "image": path.name,
+                "kind": kind,
+                "input_bytes": path.stat().st_size,
+                "payload_bytes": payload_bytes,
+                "normalize_seconds": normalize_seconds,
+                "ocr_raw_seconds": raw_seconds,
+                "ocr_normalized_seconds": normalized_seconds,
+                "raw_text": raw_text,
+                "normalized_text": normalized_text,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--images", type=int, default=3, help="images of each kind")
+    parser.add_argument("--provider", choices=["fake", "openai"], default="fake", help="model provider for OCR calls")
+    parser.add_argument("--profile", default="typical", help="fake provider latency profile")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.model_provider = args.provider
+    settings.fake_provider_profile = args.profile
+    # The OCR calls are sequential; the account rate limits would only add pacing
+    settings.model_rpm_limit = settings.model_tpm_limit = 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = asyncio.run(measure(make_corpus(Path(directory), args.images)))
+
+    print(
+        f"{'image':<16} {'input KB':>9} {'payload KB':>10} {'ratio':>6} {'normalize s':>11} {'ocr raw s':>9} "
+        f"{'ocr norm s':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['image']:<16} {row['input_bytes'] / 1024:>9.0f} {row['payload_bytes'] / 1024:>10.0f} "
+            f"{row['input_bytes'] / row['payload_bytes']:>5.1f}x {row['normalize_seconds']:>11.2f} "
+            f"{row['ocr_raw_seconds']:>9.2f} {row['ocr_normalized_seconds']:>10.2f}"
+        )
+    for kind in dict.fromkeys(row["kind"] for row in rows):
+        of_kind = [row for row in rows if row["kind"] == kind]
+        print(
+            f"{kind:<16} {statistics.mean(row['input_bytes'] for row in of_kind) / 1024:>9.0f} "
+            f"{statistics.mean(row['payload_bytes'] for row in of_kind) / 1024:>10.0f} {'':>6} "
+            f"{statistics.mean(row['normalize_seconds'] for row in of_kind):>11.2f} "
+            f"{statistics.mean(row['ocr_raw_seconds'] for row in of_kind):>9.2f} "
+            f"{statistics.mean(row['ocr_normalized_seconds'] for row in of_kind):>10.2f}"
+        )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(rows, output, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
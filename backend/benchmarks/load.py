@@ -0,0 +1,371 @@
+"""
+Drive the upload and analysis endpoints at a given concurrency and report latency and memory.
+
+Scenarios:
+    audio     POST /api/upload/audio with a generated WAV recording
+    document  POST /api/upload/document with a generated contract page image
+    analyze   POST /api/analyze/session/{id}, polling the job until it finishes
+              (each session gets one recording and one page first, untimed)
+
+By default the app runs in this process against the fake model provider
+(MODEL_PROVIDER=fake) with storage, cache and job database in a temporary
+directory, so runs are repeatable, free and offline. Latency of the model
+calls follows --profile. With --url, requests go to a running server
+instead; pass --server-pid to sample that server's memory.
+
+Every request uploads distinct content so the result cache does not answer
+it, unless --repeat-inputs is given.
+
+With --background-analyses N, N sessions (one recording each) are analyzed
+over and over while each scenario runs, to see how analysis load affects
+the measured requests. Set CACHE_ENABLED=false so that repeated analyses
+are not answered by the result cache.
+
+Usage (from backend/):
+    python -m benchmarks.load [--scenario audio document analyze] [--requests 20] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import resource
+import tempfile
+import time
+import wave
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import numpy as np
+from PIL import Image, ImageDraw
+
+SCENARIOS = ("audio", "document", "analyze")
+
+# Time given to background analyses to start before the measured run
+BACKGROUND_WARMUP_SECONDS = 1.0
+
+# Interval between job status polls and memory samples
+POLL_SECONDS = 0.05
+MEMORY_SAMPLE_SECONDS = 0.1
+
+SAMPLE_RATE = 16_000
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    requests: int
+    concurrency: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50: Optional[float]
+    p95: Optional[float]
+    p99: Optional[float]
+    rss_start_mb: Optional[float]
+    rss_peak_mb: Optional[float]
+    rss_end_mb: Optional[float]
+    background_analyses: int = 0
+    error_samples: list[str] = field(default_factory=list)
+
+
+def percentile(values: list[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def make_recording(seed: int, seconds: float) -> bytes:
+    """Build a 16 kHz mono WAV of speech-like bursts separated by pauses."""
+    rng = np.random.default_rng(seed)
+    samples = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    position = 0
+    while position < len(samples):
+        burst = int(rng.uniform(0.5, 2.0) * SAMPLE_RATE)
+        end = min(position + burst, len(samples))
+        t = np.arange(end - position) / SAMPLE_RATE
+        samples[position:end] = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t) * rng.uniform(0.5, 1.0)
+        position = end + int(rng.uniform(0.2, 0.8) * SAMPLE_RATE)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((samples * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def make_page(seed: int) -> bytes:
+    """Render a contract-like page of text lines as PNG."""
+    image = Image.new("L", (1240, 1754), 255)
+    draw = ImageDraw.Draw(image)
+    draw.text((100, 60), f"Lease contract #{seed}", fill=0)
+    for line in range(40):
+        draw.text((100, 120 + line * 38), f"Article {line + 1}. Deposit {seed + line} KRW, term {line + 1} months.", fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class MemorySampler:
+    """Samples the resident set size of a process while a scenario runs."""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self.samples: list[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def rss_mb(self) -> Optional[float]:
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        if self.pid == os.getpid():
+            # No procfs: only the lifetime peak of this process is available
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            rss = self.rss_mb()
+            if rss is not None:
+                self.samples.append(rss)
+            await asyncio.sleep(MEMORY_SAMPLE_SECONDS)
+
+    def start(self) -> None:
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        rss = self.rss_mb()
+        if rss is not None:
+            self.samples.append(rss)
+
+
+class Harness:
+    """Issues scenario requests against the app and measures them."""
+
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace, run_id: str):
+        self.client = client
+        self.args = args
+        self.run_id = run_id
+
+    def _seed(self, index: int) -> int:
+        return 0 if self.args.repeat_inputs else index
+
+    async def upload_audio(self, session_id: str, index: int) -> None:
+        recording = make_recording(self._seed(index), self.args.audio_seconds)
+        response = await self.client.post(
+            "/api/upload/audio",
+            data={"session_id": session_id},
+            files={"file": ("recording.wav", recording, "audio/wav")},
+        )
+        response.raise_for_status()
+
+    async def upload_document(self, session_id: str, index: int) -> None:
+        response = await self.client.post(
+            "/api/upload/document",
+            data={"session_id": session_id},
+            files={"file": ("page.png", make_page(self._seed(index)), "image/png")},
+        )
+        response.raise_for_status()
+
+    async def analyze(self, session_id: str) -> None:
+        response = await self.client.post(f"/api/analyze/session/{session_id}", params={"mode": self.args.mode})
+        response.raise_for_status()
+        job = response.json()
+        while job["status"] not in ("completed", "failed"):
+            await asyncio.sleep(POLL_SECONDS)
+            response = await self.client.get(f"/api/analyze/jobs/{job['job_id']}")
+            response.raise_for_status()
+            job = response.json()
+        if job["status"] == "failed":
+            raise RuntimeError(f"job failed: {job['error']}")
+
+    def session_id(self, scenario: str, index: int) -> str:
+        return f"bench-{self.run_id}-{scenario}-{index}"
+
+    async def prepare(self, scenario: str) -> None:
+        """Give every analyze session content to analyze, outside the measured run."""
+        if scenario != "analyze":
+            return
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def prepare_session(index: int) -> None:
+            async with semaphore:
+                session_id = self.session_id(scenario, index)
+                await self.upload_audio(session_id, index)
+                await self.upload_document(session_id, index)
+
+        await asyncio.gather(*(prepare_session(index) for index in range(self.args.requests)))
+
+    async def analyze_in_background(self, completed: list[int]) -> None:
+        """Keep the background sessions under analysis until cancelled, counting finished analyses."""
+
+        async def analyze_repeatedly(index: int) -> None:
+            while True:
+                await self.analyze(self.session_id("background", index))
+                completed[0] += 1
+
+        await asyncio.gather(*(analyze_repeatedly(index) for index in range(self.args.background_analyses)))
+
+    def request(self, scenario: str, index: int) -> Callable[[], Awaitable[None]]:
+        session_id = self.session_id(scenario, index)
+        if scenario == "audio":
+            return lambda: self.upload_audio(session_id, index)
+        if scenario == "document":
+            return lambda: self.upload_document(session_id, index)
+        return lambda: self.analyze(session_id)
+
+    async def run(self, scenario: str, sampler: MemorySampler) -> ScenarioResult:
+        await self.prepare(scenario)
+        # Build inputs up front so generating them is not timed
+        requests = [self.request(scenario, index) for index in range(self.args.requests)]
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies: list[float] = []
+        errors: list[str] = []
+
+        async def measure(send: Callable[[], Awaitable[None]]) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await send()
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        background = None
+        background_completed = [0]
+        if self.args.background_analyses:
+            for index in range(self.args.background_analyses):
+                await self.upload_audio(self.session_id("background", index), index)
+            background = asyncio.create_task(self.analyze_in_background(background_completed))
+            # Let the first analyses get under way
+            await asyncio.sleep(BACKGROUND_WARMUP_SECONDS)
+
+        sampler.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(measure(send) for send in requests))
+        elapsed = time.perf_counter() - started
+        await sampler.stop()
+
+        if background is not None:
+            background.cancel()
+            await asyncio.gather(background, return_exceptions=True)
+
+        rss = sampler.samples
+        return ScenarioResult(
+            scenario=scenario,
+            requests=len(requests),
+            concurrency=self.args.concurrency,
+            errors=len(errors),
+            seconds=elapsed,
+            throughput=len(latencies) / elapsed if elapsed else 0.0,
+            p50=percentile(latencies, 0.50),
+            p95=percentile(latencies, 0.95),
+            p99=percentile(latencies, 0.99),
+            rss_start_mb=rss[0] if rss else None,
+            rss_peak_mb=max(rss) if rss else None,
+            rss_end_mb=rss[-1] if rss else None,
+            background_analyses=background_completed[0],
+            error_samples=errors[:3],
+        )
+
+
+async def run_in_process(args: argparse.Namespace) -> list[ScenarioResult]:
+    """Run the scenarios against the app in this process, with the fake model provider by default."""
+    workdir = tempfile.mkdtemp(prefix="contract-bench-")
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("MODEL_PROVIDER", "fake")
+    os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    os.environ["FAKE_PROVIDER_PROFILE"] = args.profile
+    os.environ["STORAGE_BASE_PATH"] = os.path.join(workdir, "sessions")
+    os.environ["STORAGE_DB_PATH"] = os.path.join(workdir, "sessions.db")
+    os.environ["JOB_DB_PATH"] = os.path.join(workdir, "jobs.db")
+    os.environ["ANALYTICS_DB_PATH"] = os.path.join(workdir, "analytics.db")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["JANITOR_ENABLED"] = "false"
+
+    # Imported after the environment is set, since settings are read once
+    from main import app
+
+    sampler = MemorySampler(os.getpid())
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            harness = Harness(client, args, run_id=str(int(time.time())))
+            return [await harness.run(scenario, sampler) for scenario in args.scenario]
+
+
+async def run_remote(args: argparse.Namespace) -> list[ScenarioResult]:
+    """Run the scenarios against a running server."""
+    sampler = MemorySampler(args.server_pid)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=None, limits=limits) as client:
+        harness = Harness(client, args, run_id=str(int(time.time())))
+        return [await harness.run(scenario, sampler) for scenario in args.scenario]
+
+
+def print_results(results: list[ScenarioResult]) -> None:
+    def number(value: Optional[float], digits: int = 3) -> str:
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    print(
+        f"{'scenario':<9} {'reqs':>5} {'conc':>4} {'errors':>6} {'req/s':>7} "
+        f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'rss start':>9} {'rss peak':>9} {'rss end':>9}"
+    )
+    for result in results:
+        print(
+            f"{result.scenario:<9} {result.requests:>5} {result.concurrency:>4} {result.errors:>6} "
+            f"{number(result.throughput, 2):>7} {number(result.p50):>7} {number(result.p95):>7} "
+            f"{number(result.p99):>7} {number(result.rss_start_mb, 1):>9} {number(result.rss_peak_mb, 1):>9} "
+            f"{number(result.rss_end_mb, 1):>9}"
+        )
+        for sample in result.error_samples:
+            print(f"  error: {sample}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=20, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--mode", default="summary", help="analysis mode of the analyze scenario")
+    parser.add_argument("--audio-seconds", type=float, default=30.0, help="length of each generated recording")
+    parser.add_argument("--background-analyses", type=int, default=0, help="sessions analyzed during each scenario")
+    parser.add_argument("--repeat-inputs", action="store_true", help="upload identical content (cache hits)")
+    parser.add_argument("--profile", default="typical", help="fake provider latency profile (in-process runs)")
+    parser.add_argument("--url", help="base URL of a running server instead of the in-process app")
+    parser.add_argument("--server-pid", type=int, help="process id of the --url server, to sample its memory")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_remote(args) if args.url else run_in_process(args))
+
+    # Printed after all runs, below CrewAI's verbose agent output
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump([asdict(result) for result in results], output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
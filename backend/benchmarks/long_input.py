@@ -0,0 +1,101 @@
+"""
+Measure how analysis latency and token use scale with the input size.
+
+Analyzes synthetic contracts of growing length (--clauses per contract, plus
+a matching transcript) against the fake model provider, with two strategies:
+    mapreduce  the configured token budget: inputs over ANALYSIS_MAX_INPUT_TOKENS
+               are split into ANALYSIS_CHUNK_TOKENS chunks, extracted
+               concurrently and reduced into one final prompt (current)
+    single     the whole input in one prompt, as before chunking
+
+Reports the input size (tiktoken), model calls, prompt and completion
+tokens as the provider reports them to the token accounting transport (the
+fake provider estimates them), the largest single prompt, and wall time per
+analysis. The fake provider's latency depends on the completion length
+only, not on the prompt, so the single strategy's latency is a lower bound;
+in particular it does not reflect inputs beyond the model's context window,
+which the real API refuses.
+
+Usage (from backend/):
+    python -m benchmarks.long_input [--clauses 50 200 800 3200] [--profile fast]
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["MODEL_PROVIDER"] = "fake"
+# The account rate limits would pace the map step and dominate the timings
+os.environ["MODEL_RPM_LIMIT"] = "0"
+os.environ["MODEL_TPM_LIMIT"] = "0"
+# Keep CrewAI from phoning home or prompting on stdin during the run
+os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from agents.chunking import count_tokens  # noqa: E402
+from agents.crew import analyze_combined_text, build_combined_text  # noqa: E402
+from benchmarks.prompt_cache import make_contract  # noqa: E402
+from config import get_settings  # noqa: E402
+from services.token_service import get_token_stats, reset_token_stats  # noqa: E402
+
+
+def run(clauses: int, strategy: str) -> dict:
+    settings = get_settings()
+    budget = settings.analysis_max_input_tokens
+    if strategy == "single":
+        settings.analysis_max_input_tokens = 10**9
+    text = build_combined_text(*make_contract(clauses, clauses))
+    reset_token_stats()
+
+    started = time.perf_counter()
+    try:
+        analyze_combined_text(text)
+    finally:
+        settings.analysis_max_input_tokens = budget
+    elapsed = time.perf_counter() - started
+
+    calls = get_token_stats()["recent"]
+    return {
+        "clauses": clauses,
+        "strategy": strategy,
+        "input_tokens": count_tokens(text, settings.openai_model_name),
+        "calls": len(calls),
+        "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+        "completion_tokens": sum(call["completion_tokens"] for call in calls),
+        "largest_prompt_tokens": max((call["prompt_tokens"] for call in calls), default=0),
+        "seconds": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clauses", type=int, nargs="+", default=[50, 200, 800, 3200], help="contract lengths")
+    parser.add_argument("--strategy", nargs="+", choices=["mapreduce", "single"], default=["mapreduce", "single"])
+    parser.add_argument("--profile", default="fast", help="fake provider latency profile")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    get_settings().fake_provider_profile = args.profile
+    run(args.clauses[0], "single")  # Warm up: CrewAI import and the shared clients
+    rows = [run(clauses, strategy) for clauses in args.clauses for strategy in args.strategy]
+
+    # Printed after all runs, below CrewAI's verbose agent output
+    print(
+        f"{'clauses':>7} {'strategy':<9} {'input':>7} {'calls':>5} {'prompt':>8} {'largest':>8} "
+        f"{'completion':>10} {'seconds':>7}"
+    )
+    for row in rows:
+        print(
+            f"{row['clauses']:>7} {row['strategy']:<9} {row['input_tokens']:>7} {row['calls']:>5} "
+            f"{row['prompt_tokens']:>8} {row['largest_prompt_tokens']:>8} {row['completion_tokens']:>10} "
+            f"{row['seconds']:>7.2f}"
+        )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(rows, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
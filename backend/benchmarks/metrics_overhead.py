@@ -0,0 +1,149 @@
+"""
+Measure the cost of stage metrics and request tracing.
+
+Reports:
+    stage      time per `with stage(...)` block around no work, with metrics
+               enabled and disabled
+    request    time per API request through TraceMiddleware, including its
+               INFO log line (to /dev/null), against the same app without it
+               (in-process ASGI, trivial endpoint)
+    render     time to render /api/metrics with the series populated
+
+With --load, also runs the load benchmark (fake model provider) once with
+METRICS_ENABLED=true and once with false, and compares throughput and latency.
+
+Usage (from backend/):
+    python -m benchmarks.metrics_overhead [--iterations 200000] [--load]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from config import get_settings  # noqa: E402
+from services.metrics_service import TraceIdFilter, TraceMiddleware, render_metrics, stage  # noqa: E402
+
+
+def time_stage(iterations: int) -> float:
+    """Seconds per stage block."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with stage("benchmark"):
+            pass
+    return (time.perf_counter() - started) / iterations
+
+
+def time_empty_loop(iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    return (time.perf_counter() - started) / iterations
+
+
+def build_app(traced: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping() -> dict:
+        return {"ok": True}
+
+    if traced:
+        app.add_middleware(TraceMiddleware)
+    return app
+
+
+async def time_requests(app: FastAPI, requests: int) -> float:
+    """Seconds per request through the in-process ASGI transport."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get("/api/ping")
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/api/ping")
+    return (time.perf_counter() - started) / requests
+
+
+def time_render(repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        render_metrics()
+    return (time.perf_counter() - started) / repeats
+
+
+def run_load(enabled: bool, requests: int) -> list[dict]:
+    """Run the load benchmark in a fresh process with metrics enabled or disabled."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as output:
+        path = output.name
+    env = {**os.environ, "METRICS_ENABLED": str(enabled).lower(), "LOG_LEVEL": "WARNING"}
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.load", "--requests", str(requests), "--profile", "fast", "--json", path],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    with open(path) as results:
+        data = json.load(results)
+    os.unlink(path)
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200_000, help="stage blocks per measurement")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per middleware measurement")
+    parser.add_argument("--load", action="store_true", help="also compare full load benchmark runs")
+    parser.add_argument("--load-requests", type=int, default=20, help="requests per scenario with --load")
+    args = parser.parse_args()
+
+    # Log as the app does at INFO (one line per request), but to nowhere
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s"))
+    handler.addFilter(TraceIdFilter())
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+    settings = get_settings()
+    loop_seconds = time_empty_loop(args.iterations)
+    rows = []
+    for enabled in (True, False):
+        settings.metrics_enabled = enabled
+        stage_seconds = time_stage(args.iterations) - loop_seconds
+        rows.append((f"stage ({'on' if enabled else 'off'})", stage_seconds))
+
+    settings.metrics_enabled = True
+    plain = asyncio.run(time_requests(build_app(traced=False), args.requests))
+    traced = asyncio.run(time_requests(build_app(traced=True), args.requests))
+    rows.append(("request without tracing", plain))
+    rows.append(("request with tracing", traced))
+    rows.append(("tracing overhead / request", traced - plain))
+    rows.append(("render /api/metrics", time_render(200)))
+
+    print(f"{'measurement':<28} {'microseconds':>12}")
+    for name, seconds in rows:
+        print(f"{name:<28} {seconds * 1e6:>12.2f}")
+
+    if args.load:
+        print()
+        print(f"{'scenario':<9} {'metrics':<7} {'req/s':>7} {'p50 s':>7} {'p95 s':>7}")
+        for enabled in (True, False):
+            for result in run_load(enabled, args.load_requests):
+                print(
+                    f"{result['scenario']:<9} {'on' if enabled else 'off':<7} {result['throughput']:>7.2f} "
+                    f"{result['p50']:>7.3f} {result['p95']:>7.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Compare token cost and latency of the prompt layouts before and after prefix caching.
+
+Runs the same analysis workloads with the previous templates (variable input
+in the middle, PROMPT_VERSION 3) and the current ones (fixed prefix first),
+reading every call's prompt, cached and completion tokens from the token
+accounting transport.
+
+Offline (default), calls go to a local stand-in provider that applies the
+OpenAI prompt caching rules: prompts of 1024+ tokens reuse the longest prefix
+already seen, in 128-token steps. Latency is not simulated offline.
+With --live, the same workloads run against the configured OpenAI model.
+
+Usage (from backend/):
+    python -m benchmarks.prompt_cache [--live] [--contracts 5]
+"""
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+# Keep CrewAI from phoning home or prompting on stdin during the run
+os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import httpx  # noqa: E402
+
+from agents import agents as agent_defs  # noqa: E402
+from agents import structured, tasks  # noqa: E402
+from agents.chunking import count_tokens  # noqa: E402
+from agents.crew import EXECUTION_PARALLEL, analyze_combined_text, build_combined_text  # noqa: E402
+from agents.prompts import RISK_CHECKLIST, RISK_REVIEW_CRITERIA  # noqa: E402
+from config import get_http_limits, get_settings  # noqa: E402
+from services.token_service import UsageTransport, get_token_stats, reset_token_stats  # noqa: E402
+
+# USD per 1M tokens (gpt-4o list prices); cached input is billed at half price
+PRICE_INPUT = 2.50
+PRICE_CACHED_INPUT = 1.25
+PRICE_OUTPUT = 10.00
+
+# OpenAI prompt caching: minimum cacheable prompt and cache granularity in tokens
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+
+# Templates as of PROMPT_VERSION 3, with the variable input before the instructions
+LEGACY_TEMPLATES = {
+    "ANALYSIS_TASK_DESCRIPTION": """
+다음 계약서와 대화 내용을 분석하여 핵심 내용만 간결하게 요약하세요:
+
+{combined_text}
+
+다음 항목을 포함하되, 존재하는 정보만 포함하세요:
+- 계약 당사자
+- 계약 대상 (부동산 정보)
+- 금액 및 지급 조건
+- 주요 권리와 의무
+- 계약 기간 및 특약 사항
+
+불필요한 설명은 제외하고 핵심만 전달하세요.
+""",
+    "CHUNK_EXTRACTION_TASK_DESCRIPTION": """
+다음은 계약서와 대화 내용 중 {chunk_index}/{chunk_count} 부분입니다.
+이 부분에 나타난 사실만 빠짐없이 추출하세요:
+
+{chunk_text}
+
+다음 항목에 해당하는 내용을 원문의 금액, 날짜, 이름을 그대로 유지하여 나열하세요:
+- 계약 당사자
+- 계약 대상 (부동산 정보)
+- 금액 및 지급 조건
+- 주요 권리와 의무
+- 계약 기간 및 특약 사항
+- 불리하거나 모호한 조항
+
+해당 내용이 없는 항목은 생략하고, 요약하거나 추측하지 마세요.
+""",
+    "RISK_DETECTION_DIRECT_TASK_DESCRIPTION": """
+다음 계약서와 대화 내용을 기반으로 다음을 검토하세요:
+
+{combined_text}
+"""
+    + RISK_REVIEW_CRITERIA,
+    "STRUCTURED_ANALYSIS_TASK_DESCRIPTION": """
+다음 계약서와 대화 내용을 분석하여 지정된 스키마의 필드를 채우세요:
+
+{combined_text}
+
+규칙:
+- 원문에 있는 정보만 사용하고, 없는 값은 null 또는 빈 목록으로 두세요.
+- 금액은 원 단위 정수로 변환하세요 (예: 3억 5천만원 → 350000000).
+- 날짜는 YYYY-MM-DD 형식으로 쓰세요.
+- payment_schedule에는 계약금, 중도금, 잔금 등 지급 일정을 지급 순서대로 넣으세요.
+- summary에는 계약의 핵심을 세 문장 이내로 요약하세요.
+
+risks에는 다음 기준으로 찾은 위험 요소를 넣고, 각각 위험도(높음/중간/낮음), 설명, 권장사항을 쓰세요:
+"""
+    + RISK_CHECKLIST,
+}
+
+STRUCTURED_ANSWER = {
+    "contract_type": "전세",
+    "parties": [],
+    "property": {"address": None, "property_type": None, "area_m2": None},
+    "deposit_krw": None,
+    "monthly_rent_krw": None,
+    "sale_price_krw": None,
+    "contract_start": None,
+    "contract_end": None,
+    "payment_schedule": [],
+    "special_terms": [],
+    "risks": [],
+    "summary": "요약",
+}
+
+
+class CachingProvider:
+    """Local chat completions endpoint that reports usage under the OpenAI prompt caching rules."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._seen: list[str] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        prompt = "".join(f"{message['role']}\n{message['content']}\n" for message in body["messages"])
+        prompt_tokens = count_tokens(prompt, self.model)
+        cached_tokens = self._cached_tokens(prompt, prompt_tokens)
+        self._seen.append(prompt)
+
+        if body.get("response_format"):
+            content = json.dumps(STRUCTURED_ANSWER, ensure_ascii=False)
+        else:
+            content = "Thought: I now can give a great answer\nFinal Answer: 계약 요약과 위험 요소입니다."
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": count_tokens(content, self.model),
+            "total_tokens": prompt_tokens + count_tokens(content, self.model),
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        message = {"role": "assistant", "content": content, "refusal": None}
+        choice = {"index": 0, "message": message, "finish_reason": "stop"}
+        completion = {
+            "id": "bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self.model,
+            "choices": [choice],
+            "usage": usage,
+        }
+        return httpx.Response(200, json=completion)
+
+    def _cached_tokens(self, prompt: str, prompt_tokens: int) -> int:
+        if prompt_tokens < CACHE_MIN_TOKENS or not self._seen:
+            return 0
+        shared = max(len(os.path.commonprefix([prompt, seen])) for seen in self._seen)
+        tokens = count_tokens(prompt[:shared], self.model) // CACHE_STEP_TOKENS * CACHE_STEP_TOKENS
+        return tokens if tokens >= CACHE_MIN_TOKENS else 0
+
+
+def make_contract(index: int, clauses: int) -> tuple[str, str]:
+    """Build a synthetic lease transcript and contract text."""
+    stt = "\n".join(
+        f"임대인: {index}번 매물은 보증금 {index + 1}억, 월세 {50 + index}만원입니다. 관리비는 {line}만원 별도입니다."
+        for line in range(5, 5 + clauses // 4)
+    )
+    ocr = "\n".join(
+        f"제{clause}조 (조항 {clause}) 임차인은 {index}번 매물에 대하여 {clause}개월 차에 "
+        f"관리비와 공과금을 납부하며, 원상복구 의무는 계약 종료 시 {clause}일 이내로 한다."
+        for clause in range(1, clauses + 1)
+    )
+    return stt, ocr
+
+
+@contextmanager
+def layout(legacy: bool):
+    """Swap the task templates to the legacy layout for the duration of the block."""
+    # Modules that imported each template by name
+    modules = {name: structured if name.startswith("STRUCTURED") else tasks for name in LEGACY_TEMPLATES}
+    originals = {name: getattr(module, name) for name, module in modules.items()}
+    if legacy:
+        for name, module in modules.items():
+            setattr(module, name, LEGACY_TEMPLATES[name])
+    try:
+        yield
+    finally:
+        for name, module in modules.items():
+            setattr(module, name, originals[name])
+
+
+def workloads(contracts: int) -> dict[str, Callable[[], None]]:
+    """Analysis workloads that repeat prompt prefixes the way real sessions do."""
+
+    def distinct_contracts() -> None:
+        for index in range(contracts):
+            analyze_combined_text(build_combined_text(*make_contract(index, 40)))
+
+    def mode_sweep() -> None:
+        # One session analyzed in every mode, as users switch modes in the UI
+        text = build_combined_text(*make_contract(100, 40))
+        analyze_combined_text(text)
+        analyze_combined_text(text, enable_risk_detection=True)
+        analyze_combined_text(text, enable_risk_detection=True, execution_mode=EXECUTION_PARALLEL)
+        structured.analyze_structured_text(text)
+
+    def growing_session() -> None:
+        # Re-analysis after each appended document page
+        stt, ocr = make_contract(200, 40)
+        pages = ocr.split("\n")
+        for count in range(10, len(pages) + 1, 10):
+            analyze_combined_text(build_combined_text(stt, "\n".join(pages[:count])))
+
+    def long_contract() -> None:
+        # Map-reduce extraction over many chunks of one long contract
+        analyze_combined_text(build_combined_text(*make_contract(300, 1200)))
+
+    return {
+        "distinct_contracts": distinct_contracts,
+        "mode_sweep": mode_sweep,
+        "growing_session": growing_session,
+        "long_contract": long_contract,
+    }
+
+
+def use_transport(transport: httpx.BaseTransport) -> None:
+    """Point the agents' shared HTTP client (and every LLM built on it) at transport."""
+    client = httpx.Client(transport=UsageTransport(transport))
+    agent_defs.get_http_client = structured.get_http_client = lambda: client
+    for cached in (
+        agent_defs.get_llm,
+        agent_defs._get_contract_analyst_template,
+        agent_defs._get_risk_detector_template,
+        structured.get_structured_client,
+    ):
+        cached.cache_clear()
+
+
+def run(name: str, workload: Callable[[], None], legacy: bool, live: bool) -> dict:
+    model = get_settings().openai_model_name
+    use_transport(httpx.HTTPTransport(limits=get_http_limits()) if live else httpx.MockTransport(CachingProvider(model)))
+    reset_token_stats()
+
+    started = time.perf_counter()
+    with layout(legacy):
+        workload()
+    elapsed = time.perf_counter() - started
+
+    calls = get_token_stats()["recent"]
+    prompt = sum(call["prompt_tokens"] for call in calls)
+    cached = sum(call["cached_tokens"] for call in calls)
+    completion = sum(call["completion_tokens"] for call in calls)
+    cost = ((prompt - cached) * PRICE_INPUT + cached * PRICE_CACHED_INPUT + completion * PRICE_OUTPUT) / 1_000_000
+    return {
+        "workload": name,
+        "layout": "before" if legacy else "after",
+        "calls": len(calls),
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "cached_ratio": cached / prompt if prompt else 0.0,
+        "cost_usd": cost,
+        "seconds": elapsed if live else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--live", action="store_true", help="call the configured OpenAI model")
+    parser.add_argument("--contracts", type=int, default=5, help="contracts in the distinct_contracts workload")
+    args = parser.parse_args()
+
+    # Small chunks so the long_contract workload exercises map-reduce extraction
+    settings = get_settings()
+    settings.analysis_max_input_tokens = min(settings.analysis_max_input_tokens, 8000)
+    settings.analysis_chunk_tokens = min(settings.analysis_chunk_tokens, 4000)
+
+    results = [
+        run(name, workload, legacy, args.live)
+        for name, workload in workloads(args.contracts).items()
+        for legacy in (True, False)
+    ]
+
+    # Printed after all runs, below CrewAI's verbose agent output
+    print(f"{'workload':<20} {'layout':<7} {'calls':>5} {'prompt':>9} {'cached':>9} {'ratio':>6} {'cost $':>9} {'time s':>7}")
+    for result in results:
+        seconds = f"{result['seconds']:.1f}" if result["seconds"] is not None else "-"
+        print(
+            f"{result['workload']:<20} {result['layout']:<7} {result['calls']:>5} "
+            f"{result['prompt_tokens']:>9} {result['cached_tokens']:>9} {result['cached_ratio']:>6.1%} "
+            f"{result['cost_usd']:>9.4f} {seconds:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Measure upload latency while analyses are running.
+
+Runs the audio upload scenario of the load benchmark (in-process app, fake
+model provider) once on an idle server and once for each --background
+count of sessions being analyzed over and over meanwhile, each in a fresh
+process. With blocking work (model calls, CrewAI, PDF rendering, file IO)
+kept off the event loop, upload p99 latency stays close to the idle run;
+blocking it would add the length of the analyses' blocking calls.
+
+On a machine with few cores the analyses still compete with uploads for
+CPU, so compare against --profile, which sets how much of an analysis is
+waiting on the model rather than computing. At most JOB_MAX_CONCURRENCY
+analyses run at once; more background sessions only queue.
+
+Usage (from backend/):
+    python -m benchmarks.responsiveness [--background 1 2] [--requests 40] [--concurrency 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def run_load(background: int, args: argparse.Namespace) -> dict:
+    """Run the audio scenario in a fresh process with the given number of background analyses."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as output:
+        path = output.name
+    command = [sys.executable, "-m", "benchmarks.load", "--scenario", "audio", "--json", path]
+    command += ["--requests", str(args.requests), "--concurrency", str(args.concurrency)]
+    command += ["--audio-seconds", str(args.audio_seconds), "--profile", args.profile]
+    command += ["--background-analyses", str(background)]
+    # Without the result cache, every background analysis runs in full
+    env = {**os.environ, "LOG_LEVEL": "WARNING", "CACHE_ENABLED": "false"}
+    # Jobs still running at shutdown log their cancellation, so stderr is dropped too
+    subprocess.run(
+        command,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    with open(path) as results:
+        (result,) = json.load(results)
+    os.unlink(path)
+    return {"background": background, **result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--background", type=int, nargs="+", default=[1, 2], help="sessions analyzed during uploads")
+    parser.add_argument("--requests", type=int, default=40, help="uploads per run")
+    parser.add_argument("--concurrency", type=int, default=4, help="uploads in flight at once")
+    parser.add_argument("--audio-seconds", type=float, default=10.0, help="length of each uploaded recording")
+    parser.add_argument("--profile", default="typical", help="fake provider latency profile")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rows = [run_load(background, args) for background in [0, *args.background]]
+
+    idle = rows[0]["p99"]
+    print(
+        f"{'analyses':>8} {'done':>5} {'errors':>6} {'req/s':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+        f"{'p99 vs idle':>11}"
+    )
+    for row in rows:
+        print(
+            f"{row['background']:>8} {row['background_analyses']:>5} {row['errors']:>6} {row['throughput']:>7.2f} "
+            f"{row['p50']:>7.3f} {row['p95']:>7.3f} {row['p99']:>7.3f} {row['p99'] / idle:>10.2f}x"
+        )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(rows, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Measure throughput of the multi-worker server from 1 to N worker processes.
+
+For each worker count, starts serve.py on a free port with the fake model
+provider and fresh storage in a temporary directory, runs the load
+benchmark against it (benchmarks.load --url), and stops it. Reports
+throughput and latency per scenario, the speedup over the first worker
+count, and the total memory of the server's processes after the run.
+
+Since the fake provider only sleeps for model calls, a single worker
+overlaps them well; added workers mainly scale the CPU-bound work (image
+normalization, audio decoding, request handling). Use --profile instant to
+make that work dominate.
+
+Usage (from backend/):
+    python -m benchmarks.scaling [--workers 1 2 4] [--scenario document] [--requests 40] [--concurrency 16]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from serve import available_cores
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Longest wait for a server to accept requests
+STARTUP_TIMEOUT_SECONDS = 60.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Total resident memory of a process and its descendants (procfs only)."""
+    total = 0.0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) / 1024
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+    except OSError:
+        return None
+    return total
+
+
+def wait_until_ready(url: str, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{url}/api/cache/stats", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def run_workers(workers: int, args: argparse.Namespace) -> tuple[list[dict], Optional[float]]:
+    """Start a server with the given worker count, load it, and stop it."""
+    with tempfile.TemporaryDirectory(prefix="contract-scaling-") as workdir:
+        port = free_port()
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+            "MODEL_PROVIDER": "fake",
+            "FAKE_PROVIDER_PROFILE": args.profile,
+            "CREWAI_TRACING_ENABLED": "false",
+            "CREWAI_DISABLE_TELEMETRY": "true",
+            "OTEL_SDK_DISABLED": "true",
+            "LOG_LEVEL": "WARNING",
+            "STORAGE_BASE_PATH": os.path.join(workdir, "sessions"),
+            "STORAGE_DB_PATH": os.path.join(workdir, "sessions.db"),
+            "JOB_DB_PATH": os.path.join(workdir, "jobs.db"),
+            "ANALYTICS_DB_PATH": os.path.join(workdir, "analytics.db"),
+            "CACHE_DIR": os.path.join(workdir, "cache"),
+            "LOCK_DIR": os.path.join(workdir, "locks"),
+        }
+        server = subprocess.Popen(
+            [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        url = f"http://127.0.0.1:{port}"
+        output = os.path.join(workdir, "results.json")
+        try:
+            wait_until_ready(url, server)
+            command = [sys.executable, "-m", "benchmarks.load", "--url", url, "--scenario", *args.scenario]
+            command += ["--requests", str(args.requests), "--concurrency", str(args.concurrency), "--json", output]
+            subprocess.run(command, cwd=BACKEND_DIR, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+            rss = process_tree_rss_mb(server.pid)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        with open(output) as results:
+            return json.load(results), rss
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (default: 1, 2, 4, ... up to the cores)")
+    parser.add_argument("--scenario", nargs="+", default=["document", "analyze"], help="load benchmark scenarios")
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+    parser.add_argument("--profile", default="fast", help="fake provider latency profile")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    counts = args.workers
+    if not counts:
+        cores = available_cores()
+        counts = sorted({1, cores} | {2**power for power in range(1, cores.bit_length()) if 2**power < cores})
+
+    rows = []
+    for workers in counts:
+        results, rss = run_workers(workers, args)
+        rows.extend({"workers": workers, "rss_mb": rss, **result} for result in results)
+
+    baseline = {row["scenario"]: row["throughput"] for row in rows if row["workers"] == counts[0]}
+    print(
+        f"{'workers':>7} {'scenario':<9} {'errors':>6} {'req/s':>7} {'speedup':>7} "
+        f"{'p50 s':>7} {'p95 s':>7} {'rss MB':>7}"
+    )
+    for row in rows:
+        speedup = row["throughput"] / baseline[row["scenario"]] if baseline[row["scenario"]] else 0.0
+        rss = "-" if row["rss_mb"] is None else f"{row['rss_mb']:.0f}"
+        print(
+            f"{row['workers']:>7} {row['scenario']:<9} {row['errors']:>6} {row['throughput']:>7.2f} "
+            f"{speedup:>6.2f}x {row['p50'] or 0:>7.3f} {row['p95'] or 0:>7.3f} {rss:>7}"
+        )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(rows, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Measure worker cold start: import time, startup time and memory, and whether the agent stack loads.
+
+Cases, each in a fresh interpreter (fake model provider, temporary storage):
+    import   import main
+    upload   import main, run startup, then one document upload
+             (with INCREMENTAL_ANALYSIS_ENABLED=false, as on an upload-only
+             worker; with it on, uploads extract facts with the agents)
+    prewarm  import main and run startup with PREWARM_AGENTS=true
+
+Reports the median over --repeats of the process wall time (interpreter start
+to ready), the time spent importing main, the time in startup hooks and the
+resident memory when ready, plus which agent stack packages were loaded.
+
+With --check, exits with status 1 if the import or upload case loaded any
+agent stack package, or if the import case exceeds --max-seconds or
+--max-rss-mb, so it can guard against import graph regressions.
+
+Usage (from backend/):
+    python -m benchmarks.startup [--repeats 5] [--check] [--max-seconds 2.5] [--max-rss-mb 150]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CASES = ("import", "upload", "prewarm")
+
+# Top-level packages of the agent stack that upload-only workers must not load
+AGENT_STACK_PACKAGES = ("crewai", "langchain", "langchain_core", "langchain_openai", "litellm", "chromadb")
+
+
+def rss_mb() -> float:
+    """Resident memory of this process in MB."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    # No procfs: only the lifetime peak is available
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _start_and_upload(upload: bool) -> None:
+    import httpx
+
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        if upload:
+            from benchmarks.load import make_page
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                response = await client.post(
+                    "/api/upload/document",
+                    data={"session_id": "startup-benchmark"},
+                    files={"file": ("page.png", make_page(0), "image/png")},
+                )
+                response.raise_for_status()
+
+
+def probe(case: str) -> dict:
+    """Run one case in this (fresh) process and measure it."""
+    started = time.perf_counter()
+    import main  # noqa: F401
+
+    imported = time.perf_counter()
+    if case != "import":
+        asyncio.run(_start_and_upload(upload=case == "upload"))
+    ready = time.perf_counter()
+
+    return {
+        "import_seconds": imported - started,
+        "startup_seconds": ready - imported,
+        "rss_mb": rss_mb(),
+        "agent_stack": sorted(name for name in AGENT_STACK_PACKAGES if name in sys.modules),
+    }
+
+
+def run_case(case: str, workdir: str) -> dict:
+    """Run a case in a child interpreter; returns its measurements and process wall time."""
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+        "MODEL_PROVIDER": "fake",
+        "FAKE_PROVIDER_PROFILE": "instant",
+        "CREWAI_TRACING_ENABLED": "false",
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+        "LOG_LEVEL": "WARNING",
+        "STORAGE_BASE_PATH": os.path.join(workdir, "sessions"),
+        "STORAGE_DB_PATH": os.path.join(workdir, "sessions.db"),
+        "JOB_DB_PATH": os.path.join(workdir, "jobs.db"),
+        "ANALYTICS_DB_PATH": os.path.join(workdir, "analytics.db"),
+        "CACHE_DIR": os.path.join(workdir, "cache"),
+        "JANITOR_ENABLED": "false",
+        "INCREMENTAL_ANALYSIS_ENABLED": "false",
+        "PREWARM_AGENTS": str(case == "prewarm").lower(),
+    }
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--probe", case],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - started
+    # The probe prints its result as the last line, after any library output
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"wall_seconds": wall, **result}
+
+
+def summarize(case: str, runs: list[dict]) -> dict:
+    return {
+        "case": case,
+        "wall_seconds": statistics.median(run["wall_seconds"] for run in runs),
+        "import_seconds": statistics.median(run["import_seconds"] for run in runs),
+        "startup_seconds": statistics.median(run["startup_seconds"] for run in runs),
+        "rss_mb": statistics.median(run["rss_mb"] for run in runs),
+        "agent_stack": sorted({name for run in runs for name in run["agent_stack"]}),
+    }
+
+
+def check(results: list[dict], max_seconds: float, max_rss_mb: float) -> list[str]:
+    """Regressions found in the results, as messages."""
+    failures = []
+    for result in results:
+        if result["case"] in ("import", "upload") and result["agent_stack"]:
+            failures.append(f"{result['case']}: agent stack loaded ({', '.join(result['agent_stack'])})")
+        if result["case"] == "import":
+            if max_seconds and result["import_seconds"] > max_seconds:
+                failures.append(f"import: {result['import_seconds']:.2f}s exceeds {max_seconds:.2f}s")
+            if max_rss_mb and result["rss_mb"] > max_rss_mb:
+                failures.append(f"import: {result['rss_mb']:.0f} MB exceeds {max_rss_mb:.0f} MB")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--case", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeats", type=int, default=5, help="fresh processes per case")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 on a regression")
+    parser.add_argument("--max-seconds", type=float, default=0.0, help="limit on importing main (0: none)")
+    parser.add_argument("--max-rss-mb", type=float, default=0.0, help="limit on memory after import (0: none)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--probe", choices=CASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.probe)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="contract-startup-") as workdir:
+        for case in args.case:
+            results.append(summarize(case, [run_case(case, workdir) for _ in range(args.repeats)]))
+
+    print(f"{'case':<8} {'wall s':>7} {'import s':>8} {'startup s':>9} {'rss MB':>7}  agent stack")
+    for result in results:
+        print(
+            f"{result['case']:<8} {result['wall_seconds']:>7.3f} {result['import_seconds']:>8.3f} "
+            f"{result['startup_seconds']:>9.3f} {result['rss_mb']:>7.1f}  {', '.join(result['agent_stack']) or '-'}"
+        )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.check:
+        failures = check(results, args.max_seconds, args.max_rss_mb)
+        for failure in failures:
+            print(f"FAIL {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Measure session store operations at a large number of sessions.
+
+Creates --sessions sessions (one transcript append each, as an upload
+does) in a temporary directory with each backend, then times:
+    create   sessions created per second through append_text
+    newest   list_sessions of the newest --newest sessions, as the session
+             listing API does; the filesystem store reads the metadata of
+             every session and sorts them, the SQLite store reads an index
+    batch    get_sessions of --batch random session ids
+    scan     one full scan_sessions pass in --batch pages, as the janitor
+             does for its retention and quota passes
+
+Latencies are the median of --repeat runs (scan: one pass). Timings of the
+filesystem store depend on the page cache; the runs after creation read
+warm metadata, so cold reads after a restart are slower still.
+
+Usage (from backend/):
+    python -m benchmarks.storage [--sessions 100000] [--backend filesystem sqlite]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from storage import STT_FILE, FilesystemSessionStore, SessionStore, SQLiteSessionStore  # noqa: E402
+
+
+def open_store(backend: str, directory: str) -> SessionStore:
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.path.join(directory, "sessions.db"))
+    return FilesystemSessionStore(os.path.join(directory, "sessions"))
+
+
+async def median_seconds(run: Callable[[], Awaitable[object]], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def scan_pass(store: SessionStore, batch: int) -> int:
+    """Page through all sessions like a janitor pass, returning the number seen."""
+    seen = 0
+    after = None
+    while sessions := await store.scan_sessions(after, batch):
+        seen += len(sessions)
+        after = sessions[-1].session_id
+    return seen
+
+
+async def run(backend: str, args: argparse.Namespace, directory: str) -> dict:
+    store = open_store(backend, directory)
+    session_ids = [f"bench-{index:07d}" for index in range(args.sessions)]
+
+    started = time.perf_counter()
+    for session_id in session_ids:
+        await store.append_text(session_id, STT_FILE, "\nrecording")
+    create_seconds = time.perf_counter() - started
+
+    newest = await median_seconds(lambda: store.list_sessions(limit=args.newest), args.repeat)
+    batch = await median_seconds(lambda: store.get_sessions(random.sample(session_ids, args.batch)), args.repeat)
+
+    started = time.perf_counter()
+    scanned = await scan_pass(store, args.batch)
+    scan = time.perf_counter() - started
+    assert scanned == args.sessions, scanned
+
+    return {
+        "backend": backend,
+        "sessions": args.sessions,
+        "create_per_second": args.sessions / create_seconds,
+        "newest_ms": newest * 1000,
+        "batch_ms": batch * 1000,
+        "scan_seconds": scan,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=100_000, help="sessions created per backend")
+    parser.add_argument("--backend", nargs="+", choices=["filesystem", "sqlite"], default=["filesystem", "sqlite"])
+    parser.add_argument("--newest", type=int, default=100, help="sessions per listing")
+    parser.add_argument("--batch", type=int, default=500, help="sessions per get_sessions and scan_sessions call")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each listing")
+    parser.add_argument("--dir", help="parent of the temporary store directories (default: the system temp dir)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rows = []
+    for backend in args.backend:
+        with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+            rows.append(asyncio.run(run(backend, args, directory)))
+
+    print(f"{'backend':<10} {'sessions':>8} {'create/s':>9} {'newest ms':>10} {'batch ms':>9} {'scan s':>7}")
+    for row in rows:
+        print(
+            f"{row['backend']:<10} {row['sessions']:>8} {row['create_per_second']:>9.0f} {row['newest_ms']:>10.1f} "
+            f"{row['batch_ms']:>9.1f} {row['scan_seconds']:>7.2f}"
+        )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(rows, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Measure server memory and disk writes per upload as the upload size grows.
+
+Starts the app (serve.py with one worker, fake model provider, storage in a
+temporary directory) and posts generated WAV recordings of each --sizes MB to
+/api/upload/audio, one at a time and streamed from disk. Uploads refused
+by their Content-Length are sent again without one (chunked).
+
+For each upload reports the status, the time until the response, the
+server's peak resident memory above its level before the upload (VmHWM,
+reset through /proc/PID/clear_refs) and the bytes the server passed to
+write() (wchar in /proc/PID/io). Bounded ingestion shows as flat memory,
+writes of about one copy of the file, and oversized uploads refused with
+nothing written (by Content-Length) or with writes stopping at the limit
+(chunked). Linux only.
+
+Audio preprocessing is off, so only ingestion and the Whisper request
+remain. Recordings over WHISPER_MAX_FILE_SIZE_MB are received in full and
+then refused with 413 before the model call, which isolates ingestion;
+smaller ones also show the fake provider reading the Whisper request body
+into memory in the server process, which a real provider does not.
+
+Usage (from backend/):
+    python -m benchmarks.upload_memory [--sizes 1 8 24 64 150]
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import httpx
+
+from benchmarks.scaling import BACKEND_DIR, free_port, wait_until_ready
+
+# Size of the chunks the client streams
+SEND_CHUNK_SIZE = 256 * 1024
+
+
+def proc_value(pid: int, name: str, key: str) -> int:
+    """Read one "key: value" field of /proc/PID/name (kB fields are returned in kB)."""
+    with open(f"/proc/{pid}/{name}") as fields:
+        for line in fields:
+            if line.startswith(f"{key}:"):
+                return int(line.split()[1])
+    raise KeyError(key)
+
+
+def reset_peak_rss(pid: int) -> None:
+    with open(f"/proc/{pid}/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+
+
+def write_recording(path: Path, size_mb: float) -> None:
+    """Write a 16 kHz mono WAV of noise of about size_mb (the content does not matter for ingestion)."""
+    data_bytes = int(size_mb * 1024 * 1024) // 2 * 2
+    header = b"RIFF" + (36 + data_bytes).to_bytes(4, "little") + b"WAVEfmt "
+    header += (16).to_bytes(4, "little") + (1).to_bytes(2, "little") + (1).to_bytes(2, "little")
+    header += (16_000).to_bytes(4, "little") + (32_000).to_bytes(4, "little")
+    header += (2).to_bytes(2, "little") + (16).to_bytes(2, "little") + b"data" + data_bytes.to_bytes(4, "little")
+    with open(path, "wb") as out:
+        out.write(header)
+        block = os.urandom(1024 * 1024)
+        remaining = data_bytes
+        while remaining:
+            out.write(block[: min(remaining, len(block))])
+            remaining -= min(remaining, len(block))
+
+
+class MultipartBody:
+    """Multipart form body streamed from a file."""
+
+    boundary = "benchmark-boundary"
+
+    def __init__(self, path: Path, session_id: str):
+        self.path = path
+        self.session_id = session_id
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def _parts(self) -> Iterator[bytes]:
+        yield (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="session_id"\r\n\r\n{self.session_id}\r\n'
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; filename="recording.wav"\r\n'
+            "Content-Type: audio/wav\r\n\r\n"
+        ).encode()
+        with open(self.path, "rb") as source:
+            while chunk := source.read(SEND_CHUNK_SIZE):
+                yield chunk
+        yield f"\r\n--{self.boundary}--\r\n".encode()
+
+    def length(self) -> int:
+        return sum(len(part) for part in self._parts())
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._parts()
+
+
+def upload(url: str, pid: int, path: Path, size_mb: float, chunked: bool) -> dict:
+    body = MultipartBody(path, f"upload-memory-{time.time_ns()}")
+    headers = {"Content-Type": body.content_type}
+    if not chunked:
+        headers["Content-Length"] = str(body.length())
+
+    reset_peak_rss(pid)
+    rss_before = proc_value(pid, "status", "VmRSS") / 1024
+    written_before = proc_value(pid, "io", "wchar")
+    started = time.perf_counter()
+    try:
+        response = httpx.post(f"{url}/api/upload/audio", content=iter(body), headers=headers, timeout=None)
+        status: Optional[int] = response.status_code
+    except httpx.HTTPError:
+        # The server may close the connection after refusing the body
+        status = None
+    elapsed = time.perf_counter() - started
+
+    return {
+        "size_mb": size_mb,
+        "chunked": chunked,
+        "status": status,
+        "seconds": elapsed,
+        "peak_rss_delta_mb": proc_value(pid, "status", "VmHWM") / 1024 - rss_before,
+        "written_mb": (proc_value(pid, "io", "wchar") - written_before) / (1024 * 1024),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 8, 24, 64, 150], help="upload sizes in MB")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="contract-upload-memory-") as workdir:
+        port = free_port()
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+            "MODEL_PROVIDER": "fake",
+            "FAKE_PROVIDER_PROFILE": "instant",
+            "CREWAI_TRACING_ENABLED": "false",
+            "CREWAI_DISABLE_TELEMETRY": "true",
+            "OTEL_SDK_DISABLED": "true",
+            "LOG_LEVEL": "WARNING",
+            "INCREMENTAL_ANALYSIS_ENABLED": "false",
+            "JANITOR_ENABLED": "false",
+            "CACHE_ENABLED": "false",
+            "AUDIO_PREPROCESSING_ENABLED": "false",
+            "STORAGE_BASE_PATH": os.path.join(workdir, "sessions"),
+            "JOB_DB_PATH": os.path.join(workdir, "jobs.db"),
+            "ANALYTICS_DB_PATH": os.path.join(workdir, "analytics.db"),
+            "CACHE_DIR": os.path.join(workdir, "cache"),
+            "LOCK_DIR": os.path.join(workdir, "locks"),
+        }
+        server = subprocess.Popen(
+            [sys.executable, "serve.py", "--workers", "1", "--host", "127.0.0.1", "--port", str(port)],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        url = f"http://127.0.0.1:{port}"
+        try:
+            wait_until_ready(url, server)
+            for size_mb in args.sizes:
+                path = Path(workdir) / f"recording-{size_mb}.wav"
+                write_recording(path, size_mb)
+                rows.append(upload(url, server.pid, path, size_mb, chunked=False))
+                if rows[-1]["status"] == 413 and rows[-1]["written_mb"] < size_mb / 2:
+                    # Refused by its Content-Length; check the limit also holds while streaming
+                    rows.append(upload(url, server.pid, path, size_mb, chunked=True))
+                path.unlink()
+        finally:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    print(
+        f"{'size MB':>7} {'chunked':>7} {'status':>6} {'seconds':>7} "
+        f"{'peak RSS +MB':>12} {'written MB':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['size_mb']:>7.0f} {str(row['chunked']).lower():>7} {row['status'] or '-':>6} "
+            f"{row['seconds']:>7.2f} {row['peak_rss_delta_mb']:>12.1f} "
+            f"{row['written_mb']:>10.1f}"
+        )
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(rows, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,14 @@ import os
 from functools import lru_cache
 from pathlib import Path
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from pydantic_settings import BaseSettings
 
+from services.fake_provider import FakeModelTransport
+from services.rate_limit_service import AsyncRateLimitTransport, ModelRateLimiter, RateLimitTransport
+from services.token_service import AsyncUsageTransport, UsageTransport
+
 
 class Settings(BaseSettings):
     """Application settings with environment variable support."""
@@ -15,9 +20,16 @@ class Settings(BaseSettings):
     openai_model_name: str = "gpt-4o-mini"
     whisper_model: str = "whisper-1"
 
+    # Model Provider ("openai" or "fake": local deterministic responses with simulated latency, no network)
+    model_provider: str = "openai"
+    fake_provider_profile: str = "typical"  # "instant", "fast", "typical" or "slow"
+
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
+    # Worker processes started by serve.py; 0 sizes to the available cores. Other process managers
+    # (e.g. uvicorn --workers N) must set it to their worker count, or each worker gets the full rate limits
+    workers: int = 0
 
     # Application Settings
     app_name: str = "Contract Assistant"
@@ -25,11 +37,109 @@ class Settings(BaseSettings):
     environment: str = "development"
 
     # File Upload Limits (in MB)
-    max_audio_size_mb: int = 25
+    max_audio_size_mb: int = 100
     max_image_size_mb: int = 10
+    max_document_size_mb: int = 25
+
+    # Audio Preprocessing (decode, mono 16 kHz, silence trimming and Opus encoding before Whisper)
+    audio_preprocessing_enabled: bool = True
+    audio_silence_threshold_db: float = -50.0
+    audio_silence_padding_ms: int = 300
+    audio_opus_bitrate_kbps: int = 24
+    whisper_max_file_size_mb: int = 25
+
+    # Long Audio Transcription (split at silences into overlapping chunks transcribed concurrently)
+    stt_chunk_seconds: float = 300.0
+    stt_chunk_overlap_seconds: float = 2.0
+    stt_max_concurrent_chunks: int = 4
+
+    # Live Transcription (WebSocket streaming of 16 kHz mono PCM)
+    live_stt_backend: str = "openai"  # "openai" or "fake" (local, no network)
+    live_stt_fake_latency_seconds: float = 0.2
+    live_step_seconds: float = 2.0
+    live_commit_silence_ms: int = 800
+    live_max_window_seconds: float = 20.0
+
+    # OCR Configuration
+    ocr_max_concurrent_pages: int = 4
+    ocr_page_max_retries: int = 3
+    ocr_retry_backoff_seconds: float = 1.0
+    ocr_max_concurrent_files: int = 4
+    max_batch_files: int = 20
+
+    # OCR Image Normalization (Vision high detail keeps at most 2048px long / 768px short side)
+    ocr_image_preprocessing_enabled: bool = True
+    ocr_image_max_side_px: int = 2048
+    ocr_image_short_side_px: int = 768
+    ocr_pdf_dpi: int = 100
+
+    # PDF Text Layer (pages with usable embedded text skip Vision OCR)
+    pdf_text_layer_enabled: bool = True
+    pdf_text_layer_min_chars: int = 30
+    pdf_text_layer_min_quality: float = 0.95
+
+    # Prompt Caching (templates keep a fixed prefix; the key routes agent calls to a shared cache, empty disables)
+    prompt_cache_key: str = "contract-analysis"
+
+    # HTTP Connection Pool (shared keep-alive pools for model API calls)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+
+    # Model Rate Limits (shared admission control for all model calls; 0 disables a budget)
+    model_rpm_limit: int = 500
+    model_tpm_limit: int = 200000
+    whisper_rpm_limit: int = 500
+    model_completion_token_reserve: int = 1000
+    model_max_waiting_requests: int = 50
+    model_max_wait_seconds: float = 20.0
+
+    # Long Input Analysis (map-reduce over token-bounded chunks)
+    analysis_max_input_tokens: int = 12000
+    analysis_chunk_tokens: int = 4000
+    analysis_map_concurrency: int = 4
+    analysis_max_reduce_rounds: int = 3
+
+    # Incremental Analysis (per-upload fact extraction merged at analysis time)
+    incremental_analysis_enabled: bool = True
+
+    # Worker Pools
+    analysis_max_workers: int = 4
+    pdf_render_max_workers: int = 2
+
+    # Agent Stack (CrewAI loads on the first analysis; prewarm loads it during startup instead)
+    prewarm_agents: bool = False
+
+    # Analysis Job Queue (shared by all workers through the job database)
+    job_max_concurrency: int = 2
+    job_db_path: str = "storage/jobs.db"
+    job_poll_seconds: float = 1.0
+    job_lease_seconds: float = 60.0
 
     # Storage Configuration
+    storage_backend: str = "filesystem"  # "filesystem" or "sqlite"
     storage_base_path: str = "storage/sessions"
+    storage_db_path: str = "storage/sessions.db"
+    analytics_db_path: str = "storage/analytics.db"
+    lock_dir: str = "storage/locks"
+
+    # Session Lifecycle (background janitor; 0 disables a limit)
+    janitor_enabled: bool = True
+    janitor_interval_seconds: float = 300.0
+    janitor_batch_size: int = 500
+    session_ttl_seconds: int = 30 * 24 * 60 * 60
+    storage_quota_mb: int = 0
+    stt_compact_threshold_kb: int = 256
+
+    # Result Cache Configuration
+    cache_enabled: bool = True
+    cache_dir: str = "storage/cache"
+    cache_size_limit_mb: int = 1024
+    cache_ttl_seconds: int = 7 * 24 * 60 * 60
+
+    # Metrics and Tracing (Prometheus endpoint, per-request trace ids in logs; stage timings log at DEBUG)
+    metrics_enabled: bool = True
+    log_level: str = "INFO"
 
     # CORS Configuration
     cors_origins: str = "http://localhost:8000,http://127.0.0.1:8000"
@@ -53,8 +163,73 @@ def get_settings() -> Settings:
     return settings
 
 
+def get_http_limits() -> httpx.Limits:
+    """Get connection pool limits shared by all model API clients."""
+    settings = get_settings()
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+
+
+@lru_cache()
+def get_model_rate_limiter() -> ModelRateLimiter:
+    """
+    Get the rate limiter shared by all model API clients in this process.
+
+    The configured limits are for the whole account, so with several worker
+    processes each gets an equal share of WORKERS. serve.py sets WORKERS to
+    the number it starts; a process manager started another way (e.g.
+    uvicorn --workers N, or several containers) does not, so set WORKERS to
+    the total number of processes, else each of them uses the whole budget.
+    """
+    settings = get_settings()
+    workers = max(settings.workers, 1)
+
+    def share(limit: int) -> int:
+        return max(limit // workers, 1) if limit else 0
+
+    return ModelRateLimiter(
+        chat_rpm=share(settings.model_rpm_limit),
+        chat_tpm=share(settings.model_tpm_limit),
+        transcription_rpm=share(settings.whisper_rpm_limit),
+        max_waiting=settings.model_max_waiting_requests,
+        max_wait_seconds=settings.model_max_wait_seconds,
+    )
+
+
+def get_model_transport() -> httpx.BaseTransport:
+    """Get transport for synchronous model API calls to the configured provider, rate limited and accounted."""
+    settings = get_settings()
+    if settings.model_provider == "fake":
+        inner = FakeModelTransport(settings.fake_provider_profile)
+    elif settings.model_provider == "openai":
+        inner = httpx.HTTPTransport(limits=get_http_limits())
+    else:
+        raise ValueError(f"Unknown model provider: {settings.model_provider}")
+    limiter = get_model_rate_limiter()
+    return UsageTransport(RateLimitTransport(inner, limiter, settings.model_completion_token_reserve))
+
+
+def get_async_model_transport() -> httpx.AsyncBaseTransport:
+    """Get transport for async model API calls to the configured provider, rate limited and accounted."""
+    settings = get_settings()
+    if settings.model_provider == "fake":
+        inner = FakeModelTransport(settings.fake_provider_profile)
+    elif settings.model_provider == "openai":
+        inner = httpx.AsyncHTTPTransport(limits=get_http_limits())
+    else:
+        raise ValueError(f"Unknown model provider: {settings.model_provider}")
+    limiter = get_model_rate_limiter()
+    return AsyncUsageTransport(AsyncRateLimitTransport(inner, limiter, settings.model_completion_token_reserve))
+
+
 @lru_cache()
-def get_openai_client() -> OpenAI:
-    """Get cached OpenAI client instance."""
+def get_openai_client() -> AsyncOpenAI:
+    """Get cached async OpenAI client instance with a pooled keep-alive HTTP client."""
     settings = get_settings()
-    return OpenAI(api_key=settings.openai_api_key)
\ No newline at end of file
+    return AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        http_client=DefaultAsyncHttpxClient(transport=get_async_model_transport()),
+    )
@@ -6,6 +6,8 @@ A real estate contract verification assistant that combines:
 - OCR using GPT-4o Vision
 - AI-powered contract analysis and summarization
 """
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -13,8 +15,21 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from agents import load_agent_stack
 from config import get_settings
-from routers import analyze_router, upload_router
+from routers import (
+    analytics_router,
+    analyze_router,
+    cache_router,
+    live_router,
+    metrics_router,
+    session_router,
+    upload_router,
+)
+from services.executors import run_in_analysis_pool, shutdown_executors
+from services.janitor_service import get_janitor
+from services.job_service import get_job_queue
+from services.metrics_service import TraceIdFilter, TraceMiddleware
 
 # Load environment variables
 load_dotenv()
@@ -22,6 +37,32 @@ load_dotenv()
 # Get application settings
 settings = get_settings()
 
+# Application logs carry the trace id of the request or job they belong to
+logging.basicConfig(
+    level=settings.log_level.upper(),
+    format="%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s",
+)
+for handler in logging.getLogger().handlers:
+    handler.addFilter(TraceIdFilter())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown hooks."""
+    if settings.prewarm_agents:
+        # Pay the CrewAI import before serving rather than on the first analysis
+        await run_in_analysis_pool(load_agent_stack)
+    job_queue = get_job_queue()
+    await job_queue.start()
+    janitor = get_janitor()
+    if settings.janitor_enabled:
+        janitor.start()
+    yield
+    await janitor.stop()
+    await job_queue.stop()
+    shutdown_executors()
+
+
 # Create FastAPI application
 app = FastAPI(
     title=settings.app_name,
@@ -29,6 +70,7 @@ app = FastAPI(
     description="Real estate contract verification assistant with STT, OCR, and AI analysis",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -38,11 +80,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Outermost, so the trace id and latency cover everything below
+app.add_middleware(TraceMiddleware)
+
 # Include API routers
 app.include_router(upload_router.router, prefix="/api")
 app.include_router(analyze_router.router, prefix="/api")
+app.include_router(cache_router.router, prefix="/api")
+app.include_router(session_router.router, prefix="/api")
+app.include_router(live_router.router, prefix="/api")
+app.include_router(analytics_router.router, prefix="/api")
+app.include_router(metrics_router.router, prefix="/api")
 
 # Mount frontend static files (must be last)
 frontend_dir = Path(__file__).parent.parent / "frontend"
@@ -0,0 +1,27 @@
+"""Aggregate queries over structured analyses."""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from schemas import AnalyticsSummaryResponse
+from storage import get_analysis_index
+
+router = APIRouter(tags=["analytics"])
+
+
+@router.get(
+    "/analytics/contracts",
+    response_model=AnalyticsSummaryResponse,
+    summary="Aggregate structured analyses",
+    description="Summarize contract types, amounts and risks across sessions analyzed in structured mode. "
+    "Served from the analysis index without any model call.",
+)
+async def contract_analytics(
+    analyzed_after: Optional[datetime] = Query(None, description="Only analyses at or after this time"),
+    analyzed_before: Optional[datetime] = Query(None, description="Only analyses before this time"),
+    top_risks: int = Query(10, ge=1, le=100, description="Number of most frequent risks to return"),
+) -> AnalyticsSummaryResponse:
+    """Aggregate structured analyses."""
+    summary = await get_analysis_index().summarize(analyzed_after, analyzed_before, top_risks)
+    return AnalyticsSummaryResponse(**summary)
@@ -1,29 +1,105 @@
 """Analysis endpoints for contract processing."""
-from fastapi import APIRouter, Depends, HTTPException
+import json
 
-from config import Settings, get_settings
-from schemas import AnalysisResponse, ErrorResponse
-from services.analysis_service import analyze_session
+from fastapi import APIRouter, HTTPException, Query
+from sse_starlette.sse import EventSourceResponse
+
+from routers.errors import overloaded_error
+from schemas import AnalysisMode, AnalysisResponse, ErrorResponse, JobResponse
+from services.analysis_service import session_exists
+from services.job_service import JOB_COMPLETED, JOB_FAILED, get_job_queue, load_job_result
 
 router = APIRouter(tags=["analysis"])
 
+MODE_DESCRIPTION = (
+    "summary: analyst only; sequential: risk detector reviews the analyst's summary; "
+    "parallel: risk detector reviews the raw text alongside the analyst; "
+    "structured: schema-constrained JSON analysis (parties, property, payments, risks)"
+)
+
 
 @router.post(
     "/analyze/session/{session_id}",
-    response_model=AnalysisResponse,
+    response_model=JobResponse,
+    status_code=202,
     responses={404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
     summary="Analyze contract session",
-    description="Analyze combined STT and OCR data for a session using AI.",
+    description="Enqueue AI analysis of combined STT and OCR data for a session. "
+    "Returns the active job if the session is already queued or running.",
 )
 async def analyze_contract(
     session_id: str,
-    settings: Settings = Depends(get_settings),
-) -> AnalysisResponse:
-    """Analyze contract data from STT and OCR sources."""
+    mode: AnalysisMode = Query(AnalysisMode.SUMMARY, description=MODE_DESCRIPTION),
+) -> JobResponse:
+    """Enqueue analysis of contract data from STT and OCR sources."""
     try:
-        result = await analyze_session(session_id, settings.storage_base_path)
-        return result
+        job = await get_job_queue().enqueue(session_id, mode)
+        return JobResponse(**job)
     except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=f"Session not found: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@router.post(
+    "/analyze/session/{session_id}/stream",
+    responses={404: {"model": ErrorResponse}},
+    summary="Analyze contract session with streamed output",
+    description="Run AI analysis and stream Server-Sent Events: task_start, token and task_end "
+    "while the agents run, then a result event carrying the AnalysisResponse. "
+    "Waits while another analysis of the session is running.",
+)
+async def analyze_contract_stream(
+    session_id: str,
+    mode: AnalysisMode = Query(AnalysisMode.SUMMARY, description=MODE_DESCRIPTION),
+) -> EventSourceResponse:
+    """Analyze contract data and stream agent tokens as Server-Sent Events."""
+    if not await session_exists(session_id):
+        raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+
+    async def event_stream():
+        try:
+            async for event, payload in get_job_queue().stream(session_id, mode):
+                yield {"event": event, "data": json.dumps(payload, ensure_ascii=False)}
+        except Exception as e:
+            error = {"detail": f"Analysis failed: {str(e)}"}
+            overloaded = overloaded_error(e)
+            if overloaded is not None:
+                error = {"detail": overloaded.detail, "retry_after": int(overloaded.headers["Retry-After"])}
+            yield {"event": "error", "data": json.dumps(error, ensure_ascii=False)}
+
+    return EventSourceResponse(event_stream())
+
+
+@router.get(
+    "/analyze/jobs/{job_id}",
+    response_model=JobResponse,
+    responses={404: {"model": ErrorResponse}},
+    summary="Get analysis job status",
+    description="Report status and progress of an analysis job.",
+)
+async def get_analysis_job(job_id: str) -> JobResponse:
+    """Get analysis job status."""
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return JobResponse(**job)
+
+
+@router.get(
+    "/analyze/jobs/{job_id}/result",
+    response_model=AnalysisResponse,
+    responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    summary="Get analysis job result",
+    description="Fetch the analysis result of a completed job.",
+)
+async def get_analysis_job_result(job_id: str) -> AnalysisResponse:
+    """Get analysis result of a completed job."""
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job["status"] == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {job['error']}")
+    if job["status"] != JOB_COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job not finished: {job['status']}")
+    return AnalysisResponse(**load_job_result(job))
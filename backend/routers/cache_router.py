@@ -0,0 +1,31 @@
+"""Result cache and prompt cache inspection endpoints."""
+from fastapi import APIRouter
+
+from schemas import CacheStatsResponse, TokenStatsResponse
+from services.cache_service import get_cache_stats
+from services.token_service import get_token_stats
+
+router = APIRouter(tags=["cache"])
+
+
+@router.get(
+    "/cache/stats",
+    response_model=CacheStatsResponse,
+    summary="Get result cache statistics",
+    description="Report hit/miss counters for OCR, STT and analysis caches and current store usage.",
+)
+async def cache_stats() -> CacheStatsResponse:
+    """Get result cache statistics."""
+    return CacheStatsResponse(**await get_cache_stats())
+
+
+@router.get(
+    "/cache/tokens",
+    response_model=TokenStatsResponse,
+    summary="Get model token usage",
+    description="Report prompt, cached prompt and completion tokens per model and operation, "
+    "and the most recent calls.",
+)
+async def token_stats() -> TokenStatsResponse:
+    """Get model token usage."""
+    return TokenStatsResponse(**get_token_stats())
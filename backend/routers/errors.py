@@ -0,0 +1,28 @@
+"""Error responses shared by routers."""
+import math
+from typing import Optional
+
+from fastapi import HTTPException
+
+from services.rate_limit_service import overload_retry_after
+
+
+def overloaded_error(error: Exception) -> Optional[HTTPException]:
+    """
+    Map a model API capacity error to a 503 with Retry-After.
+
+    Args:
+        error: Exception raised while processing the request
+
+    Returns:
+        HTTP 503 error, or None if error is not caused by model API capacity
+    """
+    retry_after = overload_retry_after(error)
+    if retry_after is None:
+        return None
+    seconds = max(1, math.ceil(retry_after))
+    return HTTPException(
+        status_code=503,
+        detail=f"Model API is at capacity, retry in {seconds}s",
+        headers={"Retry-After": str(seconds)},
+    )
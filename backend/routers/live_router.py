@@ -0,0 +1,85 @@
+"""Live recording endpoints streaming audio over WebSocket."""
+import json
+import logging
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from config import get_settings
+from schemas import LiveStatsResponse
+from services.live_stt_service import LiveTranscriptionSession, get_live_stats, get_transcription_backend
+from storage import InvalidSessionIdError, check_session_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["live"])
+
+
+@router.websocket("/live/audio/{session_id}")
+async def live_audio(websocket: WebSocket, session_id: str) -> None:
+    """
+    Transcribe a live recording while it is captured.
+
+    The client sends binary frames of 16-bit little-endian mono PCM at 16 kHz
+    and {"type": "stop"} when recording ends. The server replies with
+    "partial" and "final" messages ({type, start, end, text, latency_ms}) and
+    a closing {"type": "done", "text"} with the full transcript. Failed
+    windows are reported as {"type": "error", start, end, detail} while the
+    recording continues; an "error" without start and end before "done" means
+    transcription stopped early and "text" holds what was transcribed so far.
+    """
+    try:
+        check_session_id(session_id)
+    except InvalidSessionIdError:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    connected = True
+
+    async def send(message: dict) -> None:
+        nonlocal connected
+        if not connected:
+            return
+        try:
+            await websocket.send_json(message)
+        except (WebSocketDisconnect, RuntimeError):
+            connected = False
+
+    session = LiveTranscriptionSession(session_id, get_transcription_backend(), get_settings(), send)
+    session.start()
+    await send({"type": "ready"})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes"):
+                session.feed(message["bytes"])
+            elif message.get("text") and json.loads(message["text"]).get("type") == "stop":
+                break
+    finally:
+        # Persist whatever was recorded even if the client went away
+        try:
+            text = await session.finish()
+        except Exception as e:
+            logger.exception("saving live recording of session %s failed", session_id)
+            await send({"type": "error", "detail": f"Saving the recording failed: {e}"})
+            text = None
+
+    if text is not None:
+        await send({"type": "done", "text": text})
+    if connected:
+        await websocket.close()
+
+
+@router.get(
+    "/live/stats",
+    response_model=LiveStatsResponse,
+    summary="Get live transcription statistics",
+    description="Report window transcription calls and per-call latency of live recordings.",
+)
+async def live_stats() -> LiveStatsResponse:
+    """Get live transcription statistics."""
+    return LiveStatsResponse(**get_live_stats())
@@ -0,0 +1,32 @@
+"""Prometheus metrics and model API admission control endpoints."""
+from fastapi import APIRouter, Response
+
+from config import get_model_rate_limiter
+from schemas import RateLimitStatsResponse
+from services.metrics_service import PROMETHEUS_CONTENT_TYPE, render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    response_class=Response,
+    summary="Get Prometheus metrics",
+    description="Expose stage latency histograms, bytes processed, pages OCR'd, API request latency "
+    "model token usage and admission control counters in the Prometheus text format.",
+)
+async def metrics() -> Response:
+    """Get Prometheus metrics."""
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get(
+    "/metrics/rate-limits",
+    response_model=RateLimitStatsResponse,
+    summary="Get model API admission control statistics",
+    description="Report rate limit budgets, queued calls, admissions and queue time per priority, "
+    "calls refused with 503 and provider 429s.",
+)
+async def rate_limit_stats() -> RateLimitStatsResponse:
+    """Get model API admission control statistics."""
+    return RateLimitStatsResponse(**get_model_rate_limiter().get_stats())
@@ -0,0 +1,39 @@
+"""Session listing endpoints."""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from schemas import JanitorStatsResponse, SessionResponse
+from services.janitor_service import get_janitor_stats
+from storage import get_session_store
+
+router = APIRouter(tags=["sessions"])
+
+
+@router.get(
+    "/sessions",
+    response_model=list[SessionResponse],
+    summary="List sessions",
+    description="List sessions newest first, optionally filtered by creation time.",
+)
+async def list_sessions(
+    created_after: Optional[datetime] = Query(None, description="Only sessions created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only sessions created before this time"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of sessions to return"),
+    offset: int = Query(0, ge=0, description="Number of sessions to skip"),
+) -> list[SessionResponse]:
+    """List sessions by creation time."""
+    sessions = await get_session_store().list_sessions(created_after, created_before, limit, offset)
+    return [SessionResponse(**vars(session)) for session in sessions]
+
+
+@router.get(
+    "/sessions/janitor/stats",
+    response_model=JanitorStatsResponse,
+    summary="Get session janitor statistics",
+    description="Report sessions expired, evicted and compacted, bytes reclaimed and scan duration.",
+)
+async def janitor_stats() -> JanitorStatsResponse:
+    """Get session janitor statistics."""
+    return JanitorStatsResponse(**get_janitor_stats())
@@ -1,63 +1,150 @@
 """Upload endpoints for audio and document files."""
-from pathlib import Path
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-
-from config import Settings, get_settings
-from schemas import ErrorResponse, UploadResponse
-from services.ocr_service import extract_text_from_file
+from config import get_settings
+from routers.errors import overloaded_error
+from schemas import (
+    AudioStatsResponse,
+    BatchUploadResponse,
+    DocumentFileResult,
+    DocumentStatsResponse,
+    ErrorResponse,
+    UploadResponse,
+)
+from services.audio_service import get_audio_stats
+from services.image_service import get_image_stats
+from services.ocr_service import extract_text_from_file, extract_text_from_files
 from services.stt_service import transcribe_audio
+from services.upload_service import UploadRoute, UploadTooLargeError
+from storage import InvalidSessionIdError, check_session_id
 
-router = APIRouter(tags=["upload"])
+router = APIRouter(tags=["upload"], route_class=UploadRoute)
 
 
 @router.post(
     "/upload/audio",
     response_model=UploadResponse,
-    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    responses={
+        400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
     summary="Upload and transcribe audio file",
     description="Upload an audio file and transcribe it using OpenAI Whisper API.",
 )
 async def upload_audio(
     session_id: str = Form(..., description="Unique session identifier"),
     file: UploadFile = File(..., description="Audio file (WAV, MP3, etc.)"),
-    settings: Settings = Depends(get_settings),
 ) -> UploadResponse:
     """Upload and transcribe audio file."""
     try:
-        session_dir = Path(settings.storage_base_path) / session_id
-        text = await transcribe_audio(file, session_dir)
+        text = await transcribe_audio(file, check_session_id(session_id))
 
         return UploadResponse(
             session_id=session_id,
             text_preview=text[:200] + "..." if len(text) > 200 else text,
             text_length=len(text),
         )
+    except InvalidSessionIdError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Audio transcription failed: {str(e)}")
+        raise overloaded_error(e) or HTTPException(status_code=500, detail=f"Audio transcription failed: {str(e)}")
+
+
+@router.get(
+    "/upload/audio/stats",
+    response_model=AudioStatsResponse,
+    summary="Get audio preprocessing statistics",
+    description="Report bytes saved, trimmed duration and latency per preprocessing stage.",
+)
+async def audio_stats() -> AudioStatsResponse:
+    """Get audio preprocessing statistics."""
+    return AudioStatsResponse(**get_audio_stats())
 
 
 @router.post(
     "/upload/document",
     response_model=UploadResponse,
-    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    responses={
+        400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
     summary="Upload and extract text from document",
     description="Upload an image or PDF and extract text using OCR.",
 )
 async def upload_document(
     session_id: str = Form(..., description="Unique session identifier"),
     file: UploadFile = File(..., description="Image or PDF file"),
-    settings: Settings = Depends(get_settings),
 ) -> UploadResponse:
     """Upload and extract text from image or PDF."""
     try:
-        session_dir = Path(settings.storage_base_path) / session_id
-        text = await extract_text_from_file(file, session_dir)
+        text = await extract_text_from_file(file, check_session_id(session_id))
 
         return UploadResponse(
             session_id=session_id,
             text_preview=text[:200] + "..." if len(text) > 200 else text,
             text_length=len(text),
         )
+    except InvalidSessionIdError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Document processing failed: {str(e)}")
+        raise overloaded_error(e) or HTTPException(status_code=500, detail=f"Document processing failed: {str(e)}")
+
+
+@router.post(
+    "/upload/document/batch",
+    response_model=BatchUploadResponse,
+    responses={400: {"model": ErrorResponse}},
+    summary="Upload and extract text from several documents",
+    description="Upload images or PDFs in one request and extract text from them concurrently.",
+)
+async def upload_documents(
+    session_id: str = Form(..., description="Unique session identifier"),
+    files: list[UploadFile] = File(..., description="Image or PDF files, in document order"),
+) -> BatchUploadResponse:
+    """Upload and extract text from several images or PDFs."""
+    try:
+        check_session_id(session_id)
+    except InvalidSessionIdError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    max_files = get_settings().max_batch_files
+    if len(files) > max_files:
+        raise HTTPException(status_code=400, detail=f"At most {max_files} files can be uploaded at once")
+
+    results = []
+    for document in await extract_text_from_files(files, session_id):
+        if document.error is not None:
+            results.append(DocumentFileResult(filename=document.filename, status="error", error=document.error))
+            continue
+        text = document.text
+        results.append(
+            DocumentFileResult(
+                filename=document.filename,
+                status="ok",
+                pages=len(document.pages),
+                text_preview=text[:200] + "..." if len(text) > 200 else text,
+                text_length=len(text),
+            )
+        )
+
+    failed = sum(result.status == "error" for result in results)
+    return BatchUploadResponse(session_id=session_id, files=results, succeeded=len(results) - failed, failed=failed)
+
+
+@router.get(
+    "/upload/document/stats",
+    response_model=DocumentStatsResponse,
+    summary="Get document OCR statistics",
+    description="Report payload bytes before and after image normalization and Vision OCR latency.",
+)
+async def document_stats() -> DocumentStatsResponse:
+    """Get document OCR statistics."""
+    return DocumentStatsResponse(**get_image_stats())
@@ -1,5 +1,6 @@
 """Pydantic models for request/response validation."""
-from datetime import datetime
+from datetime import date, datetime
+from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -13,6 +14,92 @@ class UploadResponse(BaseModel):
     text_length: int = Field(..., description="Full length of extracted text")
 
 
+class DocumentFileResult(BaseModel):
+    """OCR status of one file in a batch upload."""
+
+    filename: str = Field(..., description="Uploaded file name")
+    status: str = Field(..., description="ok or error")
+    pages: int = Field(0, description="Number of pages extracted")
+    text_preview: str = Field("", description="Preview of extracted text (truncated)")
+    text_length: int = Field(0, description="Full length of extracted text")
+    error: Optional[str] = Field(None, description="Failure reason when status is error")
+
+
+class BatchUploadResponse(BaseModel):
+    """Response model for batch document upload."""
+
+    session_id: str = Field(..., description="Unique session identifier")
+    files: list[DocumentFileResult] = Field(..., description="Result per file, in upload order")
+    succeeded: int = Field(..., description="Number of files extracted")
+    failed: int = Field(..., description="Number of files that failed")
+
+
+class AnalysisMode(str, Enum):
+    """How the analysis agents are run."""
+
+    SUMMARY = "summary"
+    SEQUENTIAL = "sequential"
+    PARALLEL = "parallel"
+    STRUCTURED = "structured"
+
+
+class RiskLevel(str, Enum):
+    """Severity of a contract risk."""
+
+    HIGH = "높음"
+    MEDIUM = "중간"
+    LOW = "낮음"
+
+
+class ContractParty(BaseModel):
+    """One party to the contract."""
+
+    role: str = Field(..., description="Role such as 임대인, 임차인, 매도인, 매수인 or 공인중개사")
+    name: Optional[str] = Field(None, description="Name as written in the source")
+
+
+class PropertyInfo(BaseModel):
+    """Property the contract is about."""
+
+    address: Optional[str] = Field(None, description="Address as written in the source")
+    property_type: Optional[str] = Field(None, description="Type such as 아파트, 오피스텔, 다세대주택 or 상가")
+    area_m2: Optional[float] = Field(None, description="Exclusive area in square meters")
+
+
+class PaymentItem(BaseModel):
+    """One scheduled payment."""
+
+    label: str = Field(..., description="Payment such as 계약금, 중도금, 잔금 or 월세")
+    amount_krw: Optional[int] = Field(None, description="Amount in won")
+    due_date: Optional[date] = Field(None, description="Due date")
+
+
+class RiskItem(BaseModel):
+    """One risk found in the contract."""
+
+    level: RiskLevel = Field(..., description="Risk level")
+    title: str = Field(..., description="Short name of the risk")
+    description: str = Field(..., description="Why it is a risk")
+    recommendation: str = Field(..., description="What to do about it")
+
+
+class ContractAnalysis(BaseModel):
+    """Structured contract analysis produced in structured mode."""
+
+    contract_type: Optional[str] = Field(None, description="Contract type such as 매매, 전세 or 월세")
+    parties: list[ContractParty] = Field(default_factory=list, description="Contract parties")
+    property: PropertyInfo = Field(default_factory=PropertyInfo, description="Contracted property")
+    deposit_krw: Optional[int] = Field(None, description="Deposit (보증금) in won")
+    monthly_rent_krw: Optional[int] = Field(None, description="Monthly rent in won")
+    sale_price_krw: Optional[int] = Field(None, description="Sale price in won")
+    contract_start: Optional[date] = Field(None, description="Start of the contract term")
+    contract_end: Optional[date] = Field(None, description="End of the contract term")
+    payment_schedule: list[PaymentItem] = Field(default_factory=list, description="Payments in due order")
+    special_terms: list[str] = Field(default_factory=list, description="Special terms (특약 사항)")
+    risks: list[RiskItem] = Field(default_factory=list, description="Risks found in the contract")
+    summary: str = Field(..., description="Short plain-text summary")
+
+
 class AnalysisResponse(BaseModel):
     """Response model for analysis endpoint."""
 
@@ -20,7 +107,196 @@ class AnalysisResponse(BaseModel):
     stt_text: str = Field(..., description="Full transcribed speech text")
     ocr_text: str = Field(..., description="Full OCR extracted text")
     summary: str = Field(..., description="AI-generated summary")
+    structured: Optional[ContractAnalysis] = Field(None, description="Structured analysis (structured mode only)")
     timestamp: datetime = Field(..., description="Analysis timestamp")
+    mode: AnalysisMode = Field(AnalysisMode.SUMMARY, description="Agent execution mode used")
+    elapsed_seconds: Optional[float] = Field(None, description="Wall-clock time spent generating the summary")
+
+
+class JobResponse(BaseModel):
+    """Response model for analysis job status."""
+
+    job_id: str = Field(..., description="Job identifier")
+    session_id: str = Field(..., description="Session being analyzed")
+    mode: AnalysisMode = Field(..., description="Agent execution mode")
+    status: str = Field(..., description="Job status: queued, running, completed or failed")
+    progress: float = Field(..., description="Progress from 0 to 1")
+    stage: Optional[str] = Field(None, description="Current processing stage")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: datetime = Field(..., description="Job creation timestamp")
+    updated_at: datetime = Field(..., description="Last status update timestamp")
+
+
+class AudioStatsResponse(BaseModel):
+    """Response model for audio preprocessing statistics."""
+
+    ffmpeg_available: bool = Field(..., description="Whether ffmpeg is installed (otherwise only WAV is processed)")
+    files: int = Field(..., description="Number of uploads preprocessed")
+    skipped: int = Field(..., description="Uploads sent unchanged (no decoder, or no size reduction)")
+    input_bytes: int = Field(..., description="Total bytes uploaded")
+    output_bytes: int = Field(..., description="Total bytes sent to Whisper")
+    bytes_saved: int = Field(..., description="Total bytes saved by preprocessing")
+    chunks: int = Field(..., description="Total chunks transcribed (long recordings are split)")
+    input_seconds: float = Field(..., description="Total decoded audio duration")
+    output_seconds: float = Field(..., description="Total duration left after silence trimming")
+    stage_seconds: dict[str, float] = Field(..., description="Cumulative latency per stage (decode, vad, encode)")
+
+
+class DocumentStatsResponse(BaseModel):
+    """Response model for OCR input normalization statistics."""
+
+    images: int = Field(..., description="Number of images normalized")
+    image_input_bytes: int = Field(..., description="Total bytes of uploaded images")
+    image_output_bytes: int = Field(..., description="Total bytes of normalized images sent to OCR")
+    pdf_pages: int = Field(..., description="Number of PDF pages rendered for OCR")
+    pdf_page_output_bytes: int = Field(..., description="Total bytes of rendered PDF pages sent to OCR")
+    pdf_text_layer_pages: int = Field(..., description="PDF pages read from their text layer without OCR")
+    normalize_seconds: float = Field(..., description="Total time spent normalizing and encoding")
+    ocr_calls: int = Field(..., description="Number of Vision OCR calls")
+    average_ocr_seconds: Optional[float] = Field(None, description="Mean latency per Vision OCR call")
+
+
+class LiveStatsResponse(BaseModel):
+    """Response model for live transcription statistics."""
+
+    backend: str = Field(..., description="Live transcription backend (openai or fake)")
+    calls: int = Field(..., description="Number of window transcriptions (partial and final)")
+    errors: int = Field(..., description="Number of window transcriptions that failed")
+    audio_seconds: float = Field(..., description="Total audio duration sent for transcription")
+    average_latency_seconds: Optional[float] = Field(None, description="Mean latency per window transcription")
+    max_latency_seconds: Optional[float] = Field(None, description="Worst latency per window transcription")
+
+
+class CacheNamespaceStats(BaseModel):
+    """Hit/miss counters for one cache namespace."""
+
+    hits: int = Field(..., description="Number of cache hits")
+    misses: int = Field(..., description="Number of cache misses")
+
+
+class CacheStatsResponse(BaseModel):
+    """Response model for result cache statistics."""
+
+    enabled: bool = Field(..., description="Whether the result cache is enabled")
+    size_bytes: int = Field(..., description="Current on-disk size of the cache")
+    entries: int = Field(..., description="Number of cached results")
+    namespaces: dict[str, CacheNamespaceStats] = Field(..., description="Counters per cache namespace")
+
+
+class SessionResponse(BaseModel):
+    """Response model for session metadata."""
+
+    session_id: str = Field(..., description="Session identifier")
+    created_at: datetime = Field(..., description="Session creation timestamp")
+    updated_at: datetime = Field(..., description="Last upload or analysis timestamp")
+    analyzed_at: Optional[datetime] = Field(None, description="Last analysis timestamp")
+
+
+class JanitorStatsResponse(BaseModel):
+    """Response model for session janitor statistics."""
+
+    enabled: bool = Field(..., description="Whether the background janitor is enabled")
+    runs: int = Field(..., description="Number of completed passes")
+    sessions_expired: int = Field(..., description="Sessions deleted after exceeding the TTL")
+    sessions_evicted: int = Field(..., description="Sessions deleted to stay within the disk quota")
+    transcripts_compacted: int = Field(..., description="Number of transcript compactions")
+    bytes_reclaimed: int = Field(..., description="Total bytes freed by expiry, eviction and compaction")
+    last_run_at: Optional[datetime] = Field(None, description="Start time of the last completed pass")
+    last_scan_seconds: Optional[float] = Field(None, description="Duration of the last completed pass")
+    last_scanned_sessions: int = Field(..., description="Sessions visited by the last pass")
+    last_total_bytes: int = Field(..., description="Stored bytes after the last pass")
+    last_error: Optional[str] = Field(None, description="Error of the last failed pass")
+
+
+class ContractTypeStats(BaseModel):
+    """Aggregates of structured analyses of one contract type."""
+
+    contract_type: Optional[str] = Field(None, description="Contract type, or null if not identified")
+    contracts: int = Field(..., description="Number of analyzed contracts")
+    average_deposit_krw: Optional[float] = Field(None, description="Mean deposit in won")
+    average_monthly_rent_krw: Optional[float] = Field(None, description="Mean monthly rent in won")
+    average_sale_price_krw: Optional[float] = Field(None, description="Mean sale price in won")
+    average_risks: Optional[float] = Field(None, description="Mean number of risks per contract")
+
+
+class RiskOccurrence(BaseModel):
+    """How often a risk was found."""
+
+    title: str = Field(..., description="Risk title")
+    level: RiskLevel = Field(..., description="Risk level")
+    occurrences: int = Field(..., description="Number of contracts with this risk")
+
+
+class AnalyticsSummaryResponse(BaseModel):
+    """Response model for aggregates over structured analyses."""
+
+    contracts: int = Field(..., description="Number of sessions with a structured analysis")
+    contracts_with_high_risk: int = Field(..., description="Contracts with at least one high risk")
+    risk_levels: dict[RiskLevel, int] = Field(..., description="Total risks per level")
+    by_contract_type: list[ContractTypeStats] = Field(..., description="Aggregates per contract type")
+    top_risks: list[RiskOccurrence] = Field(..., description="Most frequent risks")
+
+
+class TokenUsageTotals(BaseModel):
+    """Token totals of one model and API operation."""
+
+    model: str = Field(..., description="Model name")
+    operation: str = Field(..., description="API operation, e.g. chat/completions")
+    requests: int = Field(..., description="Number of calls")
+    prompt_tokens: int = Field(..., description="Prompt tokens, including cached ones")
+    cached_tokens: int = Field(..., description="Prompt tokens served from the provider's prompt cache")
+    completion_tokens: int = Field(..., description="Completion tokens")
+    cached_ratio: Optional[float] = Field(None, description="Share of prompt tokens served from cache")
+    average_seconds: float = Field(..., description="Mean time from request to end of response")
+
+
+class TokenUsageCall(BaseModel):
+    """Token usage of one model API call."""
+
+    model: str = Field(..., description="Model name")
+    operation: str = Field(..., description="API operation")
+    prompt_tokens: int = Field(..., description="Prompt tokens, including cached ones")
+    cached_tokens: int = Field(..., description="Prompt tokens served from cache")
+    completion_tokens: int = Field(..., description="Completion tokens")
+    seconds: float = Field(..., description="Time from request to end of response")
+    at: datetime = Field(..., description="Completion time")
+
+
+class TokenStatsResponse(BaseModel):
+    """Response model for token accounting."""
+
+    totals: list[TokenUsageTotals] = Field(..., description="Totals per model and operation")
+    recent: list[TokenUsageCall] = Field(..., description="Most recent calls, oldest first")
+
+
+class RateLimitBudget(BaseModel):
+    """State of one model API rate limit budget."""
+
+    budget: str = Field(..., description="Budget name: chat or transcription")
+    requests_per_minute: int = Field(..., description="Configured request limit (0 if disabled)")
+    tokens_per_minute: int = Field(..., description="Configured token limit (0 if disabled)")
+    rate_scale: float = Field(..., description="Share of the limits in use after provider 429s (1.0 when recovered)")
+    paused_seconds: float = Field(..., description="Time left in a pause following a provider 429")
+    waiting: int = Field(..., description="Calls currently queued")
+
+
+class RateLimitPriority(BaseModel):
+    """Admission counters of one call priority."""
+
+    priority: str = Field(..., description="interactive or background")
+    requests: int = Field(..., description="Calls submitted")
+    admitted: int = Field(..., description="Calls sent to the model API")
+    wait_seconds: float = Field(..., description="Total time admitted calls spent queued")
+    average_wait_seconds: float = Field(..., description="Mean time admitted calls spent queued")
+
+
+class RateLimitStatsResponse(BaseModel):
+    """Response model for model API admission control statistics."""
+
+    budgets: list[RateLimitBudget] = Field(..., description="State per budget")
+    priorities: list[RateLimitPriority] = Field(..., description="Counters per priority")
+    rejected: int = Field(..., description="Interactive calls refused with 503 because the queue was full or slow")
+    throttled: int = Field(..., description="Provider 429 responses")
 
 
 class ErrorResponse(BaseModel):
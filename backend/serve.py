@@ -0,0 +1,65 @@
+"""
+Production server: runs the app in several uvicorn worker processes.
+
+Workers share the storage directory, job database, result cache and lock
+directory, and coordinate through them: session files are written under
+file locks, analysis jobs are claimed from the job database, and identical
+OCR, STT and analysis work is computed once. To run workers on several
+nodes, these paths must be on storage that all nodes share and that
+supports file locks.
+
+The number of workers is --workers, else WORKERS, else the number of cores
+available to this process. In-process state stays per worker: model rate
+limits are split evenly between workers, and the /api/metrics, cache and
+token statistics describe the worker that serves the request. The split
+relies on WORKERS, which this script sets for its workers; running
+uvicorn --workers N directly requires WORKERS=N as well.
+
+Usage (from backend/):
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import os
+
+import uvicorn
+
+from config import get_settings
+
+
+def available_cores() -> int:
+    """Number of cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0: WORKERS or one per core)")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    args = parser.parse_args()
+
+    cores = available_cores()
+    workers = args.workers or settings.workers or cores
+
+    # Workers read their settings from the environment when they start
+    os.environ["WORKERS"] = str(workers)
+    if "pdf_render_max_workers" not in settings.model_fields_set:
+        # Every worker has its own render process pool; together they should fit the cores
+        os.environ["PDF_RENDER_MAX_WORKERS"] = str(max(cores // workers, 1))
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level=settings.log_level.lower(),
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
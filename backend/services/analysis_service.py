@@ -1,39 +1,126 @@
 """Analysis service for contract summarization and risk detection using CrewAI."""
+import asyncio
 import json
+import time
 from datetime import datetime
-from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
-from agents import analyze_contract
-from schemas import AnalysisResponse
+import agents
+from agents.inputs import EXECUTION_PARALLEL, EXECUTION_SEQUENTIAL, build_combined_text
+from agents.prompts import PROMPT_VERSION
+from agents.streaming import AnalysisEventCallback
+from config import get_settings
+from schemas import AnalysisMode, AnalysisResponse, ContractAnalysis
+from services.cache_service import get_or_compute, hash_text, make_cache_key
+from services.executors import run_in_analysis_pool
+from services.metrics_service import stage
+from services.preanalysis_service import SEGMENT_OCR, SEGMENT_STT, collect_segment_facts
+from storage import ANALYSIS_FILE, OCR_FILE, STT_FILE, get_analysis_index, get_session_store
 
-async def analyze_session(session_id: str, base_path: str) -> AnalysisResponse:
+ProgressCallback = Callable[[float, str], Awaitable[None]]
+
+# analyze_combined_text arguments per analysis mode: (enable_risk_detection, execution_mode)
+MODE_OPTIONS = {
+    AnalysisMode.SUMMARY: (False, EXECUTION_SEQUENTIAL),
+    AnalysisMode.SEQUENTIAL: (True, EXECUTION_SEQUENTIAL),
+    AnalysisMode.PARALLEL: (True, EXECUTION_PARALLEL),
+}
+
+
+async def session_exists(session_id: str) -> bool:
+    """Check whether a session exists in the session store."""
+    return await get_session_store().session_exists(session_id)
+
+
+async def analyze_session(
+    session_id: str,
+    mode: AnalysisMode = AnalysisMode.SUMMARY,
+    on_progress: Optional[ProgressCallback] = None,
+    on_event: Optional[AnalysisEventCallback] = None,
+) -> AnalysisResponse:
     """
     Analyze session data by combining STT and OCR results.
 
     Args:
         session_id: Unique session identifier
-        base_path: Base storage path for sessions
+        mode: Summary only, or summary plus risk detection run sequentially or in parallel
+        on_progress: Optional callback receiving (progress 0..1, stage name)
+        on_event: Optional thread-safe callback receiving streamed agent events
 
     Returns:
         Analysis results with summary
 
     Raises:
-        FileNotFoundError: If session directory doesn't exist
+        FileNotFoundError: If session doesn't exist
     """
-    session_dir = Path(base_path) / session_id
+    store = get_session_store()
+
+    if not await store.session_exists(session_id):
+        raise FileNotFoundError(f"Session not found: {session_id}")
 
-    if not session_dir.exists():
-        raise FileNotFoundError(f"Session directory not found: {session_id}")
+    async def report(progress: float, stage: str) -> None:
+        if on_progress is not None:
+            await on_progress(progress, stage)
 
     # Read STT and OCR texts
-    stt_path = session_dir / "stt.txt"
-    ocr_path = session_dir / "ocr.txt"
+    await report(0.1, "reading")
+    with stage("session_read"):
+        texts = await store.read_texts(session_id, [STT_FILE, OCR_FILE])
+    stt_text = texts[STT_FILE] or ""
+    ocr_text = texts[OCR_FILE] or ""
+
+    # Generate summary using CrewAI agents (blocking, so run in the analysis pool)
+    await report(0.2, "analyzing")
+    settings = get_settings()
+    started = time.perf_counter()
+
+    # Prefer merging facts pre-extracted per upload over reprocessing the raw text,
+    # unless some upload has no segment
+    segment_facts = None
+    if settings.incremental_analysis_enabled:
+        with stage("segment_facts"):
+            segment_facts = await collect_segment_facts(session_id, {SEGMENT_STT: stt_text, SEGMENT_OCR: ocr_text})
+    if segment_facts is not None:
+        namespace, cache_input = "analysis_incremental", segment_facts
+        input_text = segment_facts
+    else:
+        namespace, cache_input = "analysis", f"{stt_text}\0{ocr_text}"
+        input_text = build_combined_text(stt_text, ocr_text)
+
+    # Agent entry points are resolved on the pool thread, so the first analysis
+    # loads CrewAI there rather than blocking the event loop
+    if mode == AnalysisMode.STRUCTURED:
+
+        def analyze() -> dict:
+            return agents.analyze_structured_text(input_text, on_event=on_event)
+
+    else:
+        enable_risk_detection, execution_mode = MODE_OPTIONS[mode]
 
-    stt_text = stt_path.read_text(encoding="utf-8") if stt_path.exists() else ""
-    ocr_text = ocr_path.read_text(encoding="utf-8") if ocr_path.exists() else ""
+        def analyze() -> str:
+            return agents.analyze_combined_text(
+                input_text,
+                enable_risk_detection,
+                on_event=on_event,
+                execution_mode=execution_mode,
+            )
 
-    # Generate summary using CrewAI agents
-    summary = analyze_contract(stt_text, ocr_text)
+    key = make_cache_key(
+        namespace,
+        settings.openai_model_name,
+        f"{PROMPT_VERSION}:{mode.value}",
+        hash_text(cache_input),
+    )
+    with stage(f"analysis_{mode.value}"):
+        output = await get_or_compute(namespace, key, lambda: run_in_analysis_pool(analyze))
+    elapsed_seconds = time.perf_counter() - started
+
+    structured = None
+    if mode == AnalysisMode.STRUCTURED:
+        structured = ContractAnalysis.model_validate(output)
+        summary = structured.summary
+    else:
+        summary = output
 
     # Create analysis result
     result = AnalysisResponse(
@@ -41,12 +128,57 @@ async def analyze_session(session_id: str, base_path: str) -> AnalysisResponse:
         stt_text=stt_text,
         ocr_text=ocr_text,
         summary=summary,
+        structured=structured,
         timestamp=datetime.now(),
+        mode=mode,
+        elapsed_seconds=elapsed_seconds,
     )
 
     # Save analysis results
-    analysis_path = session_dir / "analysis.json"
-    with open(analysis_path, "w", encoding="utf-8") as f:
-        json.dump(result.model_dump(), f, ensure_ascii=False, indent=2, default=str)
+    await report(0.9, "saving")
+    with stage("analysis_save"):
+        await store.write_text(
+            session_id,
+            ANALYSIS_FILE,
+            json.dumps(result.model_dump(), ensure_ascii=False, indent=2, default=str),
+        )
+        await store.mark_analyzed(session_id)
+        if structured is not None:
+            await get_analysis_index().record(session_id, structured.model_dump(mode="json"), result.timestamp)
 
     return result
+
+
+async def stream_session_analysis(
+    session_id: str,
+    mode: AnalysisMode = AnalysisMode.SUMMARY,
+    on_progress: Optional[ProgressCallback] = None,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Analyze a session while yielding streamed agent events.
+
+    Yields "task_start", "token" and "task_end" events as the agents run,
+    then a final "result" event carrying the AnalysisResponse. The result is
+    still saved to the session store by analyze_session. Runs the analysis
+    directly; JobQueue.stream serializes it with the session's other jobs.
+    Closing the generator early cancels the analysis before it saves anything.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[Optional[tuple[str, dict[str, Any]]]] = asyncio.Queue()
+
+    def on_event(event: str, payload: dict[str, Any]) -> None:
+        # Called from the analysis thread pool
+        loop.call_soon_threadsafe(events.put_nowait, (event, payload))
+
+    analysis = asyncio.create_task(analyze_session(session_id, mode, on_progress=on_progress, on_event=on_event))
+    analysis.add_done_callback(lambda _: events.put_nowait(None))
+
+    try:
+        while (item := await events.get()) is not None:
+            yield item
+    finally:
+        if not analysis.done():
+            analysis.cancel()
+
+    result = await analysis
+    yield "result", result.model_dump(mode="json")
@@ -0,0 +1,392 @@
+"""Local audio preprocessing before transcription: decode, downmix/resample, silence trimming and compression."""
+import asyncio
+import io
+import shutil
+import time
+import wave
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import anyio
+import numpy as np
+
+from config import Settings
+
+# Whisper works on 16 kHz mono internally, so nothing is lost by sending that
+TARGET_SAMPLE_RATE = 16000
+
+# Bump when preprocessing changes so cached transcriptions are invalidated
+AUDIO_PREPROCESS_VERSION = "2"
+
+# Energy VAD frame length
+VAD_FRAME_MS = 30
+
+# Frames this far above the quietest frames count as speech
+VAD_NOISE_MARGIN_DB = 10.0
+
+# How far before each chunk limit to look for a quiet cut point
+SPLIT_SEARCH_SECONDS = 15.0
+
+# Container signatures: (magic bytes, offset, suffix)
+_SIGNATURES = (
+    (b"RIFF", 0, ".wav"),
+    (b"OggS", 0, ".ogg"),
+    (b"\x1a\x45\xdf\xa3", 0, ".webm"),
+    (b"fLaC", 0, ".flac"),
+    (b"ID3", 0, ".mp3"),
+    (b"ftyp", 4, ".m4a"),
+)
+
+# In-process totals across preprocessed uploads
+_totals: Counter = Counter()
+_stage_seconds: Counter = Counter()
+
+
+@dataclass
+class AudioPreprocessReport:
+    """Outcome of preprocessing one upload."""
+
+    input_bytes: int
+    output_bytes: int = 0
+    input_seconds: float = 0.0
+    output_seconds: float = 0.0
+    chunks: int = 1
+    stages: dict[str, float] = field(default_factory=dict)
+    skipped: Optional[str] = None
+
+
+@dataclass
+class AudioChunk:
+    """One piece of a recording, transcribed on its own."""
+
+    path: Path
+    # Start of the chunk in the processed audio, in seconds
+    offset: float = 0.0
+    # Chunk-local window this chunk is responsible for; the rest is overlap with a neighbour
+    keep_from: float = float("-inf")
+    keep_until: float = float("inf")
+
+
+@dataclass
+class PreparedAudio:
+    """Audio ready for transcription, with the mapping back to the original timeline."""
+
+    source: Path
+    chunks: list[AudioChunk]
+    report: Optional[AudioPreprocessReport] = None
+    # Original start time of each kept VAD frame, if silences were trimmed
+    kept_frame_times: Optional[np.ndarray] = None
+
+    def source_time(self, seconds: float) -> float:
+        """Map a time in the processed audio back to the original recording."""
+        if self.kept_frame_times is None or len(self.kept_frame_times) == 0:
+            return seconds
+        frame_seconds = VAD_FRAME_MS / 1000
+        index = min(max(int(seconds / frame_seconds), 0), len(self.kept_frame_times) - 1)
+        return float(self.kept_frame_times[index]) + seconds - index * frame_seconds
+
+    async def cleanup(self) -> None:
+        """Delete chunk files created by preprocessing."""
+        for chunk in self.chunks:
+            if chunk.path != self.source:
+                await anyio.Path(chunk.path).unlink(missing_ok=True)
+
+
+@lru_cache()
+def get_ffmpeg_path() -> Optional[str]:
+    """Get path of the ffmpeg binary, or None if it isn't installed."""
+    return shutil.which("ffmpeg")
+
+
+def detect_audio_suffix(header: bytes, filename: str = "") -> str:
+    """
+    Detect the container format from the first bytes of a file.
+
+    Falls back to the uploaded filename's suffix, then ".wav".
+    """
+    for magic, offset, suffix in _SIGNATURES:
+        if header[offset : offset + len(magic)] == magic:
+            return suffix
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        return ".mp3"
+    return Path(filename).suffix.lower() or ".wav"
+
+
+async def preprocess_audio(path: Path, settings: Settings) -> PreparedAudio:
+    """
+    Decode, downmix to mono 16 kHz, trim silences, split and re-encode an audio file.
+
+    Uses ffmpeg when installed (any input format, Opus output). Without it,
+    only PCM WAV input is decoded and the output is 16-bit mono WAV; other
+    formats are passed through unchanged as a single chunk.
+
+    Audio longer than stt_chunk_seconds is split at the quietest point near
+    each boundary into chunks overlapping by stt_chunk_overlap_seconds.
+
+    Args:
+        path: Audio file with a suffix matching its format
+        settings: Application settings
+
+    Returns:
+        Chunks to transcribe (the input file itself if preprocessing didn't
+        help) with a report of bytes and per-stage latency; call cleanup()
+        when done
+    """
+    report = AudioPreprocessReport(input_bytes=(await anyio.Path(path).stat()).st_size)
+    prepared = PreparedAudio(source=path, chunks=[AudioChunk(path)], report=report)
+
+    started = time.perf_counter()
+    samples = await _decode(path, report)
+    if samples is None:
+        report.output_bytes = report.input_bytes
+        _record(report)
+        return prepared
+    report.stages["decode"] = time.perf_counter() - started
+    report.input_seconds = len(samples) / TARGET_SAMPLE_RATE
+
+    started = time.perf_counter()
+    samples, keep = await anyio.to_thread.run_sync(
+        trim_silence, samples, settings.audio_silence_threshold_db, settings.audio_silence_padding_ms
+    )
+    if keep is not None:
+        prepared.kept_frame_times = np.flatnonzero(keep) * (VAD_FRAME_MS / 1000)
+    report.stages["vad"] = time.perf_counter() - started
+    report.output_seconds = len(samples) / TARGET_SAMPLE_RATE
+
+    started = time.perf_counter()
+    cuts = await anyio.to_thread.run_sync(plan_chunks, samples, settings.stt_chunk_seconds)
+    overlap = int(settings.stt_chunk_overlap_seconds * TARGET_SAMPLE_RATE)
+    chunks = []
+    for index, (cut_start, cut_end) in enumerate(zip(cuts, cuts[1:])):
+        start = max(cut_start - overlap, 0)
+        end = min(cut_end + overlap, len(samples))
+        stem = path.with_name(f"{path.stem}-{index}")
+        chunk_path = await _encode(samples[start:end], stem, settings.audio_opus_bitrate_kbps)
+        chunks.append(
+            AudioChunk(
+                path=chunk_path,
+                offset=start / TARGET_SAMPLE_RATE,
+                keep_from=(cut_start - start) / TARGET_SAMPLE_RATE if index > 0 else float("-inf"),
+                keep_until=(cut_end - start) / TARGET_SAMPLE_RATE if cut_end < len(samples) else float("inf"),
+            )
+        )
+    prepared.chunks = chunks
+    report.chunks = len(chunks)
+    report.stages["encode"] = time.perf_counter() - started
+    for chunk in chunks:
+        report.output_bytes += (await anyio.Path(chunk.path).stat()).st_size
+
+    if len(chunks) == 1 and report.output_bytes >= report.input_bytes:
+        # Already compact (e.g. a short Opus capture); send the original
+        await prepared.cleanup()
+        prepared = PreparedAudio(source=path, chunks=[AudioChunk(path)], report=report)
+        report.output_bytes = report.input_bytes
+        report.skipped = "output not smaller than input"
+
+    _record(report)
+    return prepared
+
+
+def trim_silence(
+    samples: np.ndarray, threshold_db: float, padding_ms: int
+) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Drop silences with a frame-energy VAD, keeping padding_ms around speech.
+
+    Gaps between speech shorter than twice the padding are kept whole, so
+    words are never glued together. If no frame counts as speech the audio
+    is returned unchanged rather than risk dropping quiet speech.
+
+    Returns:
+        Trimmed samples and the per-frame keep mask (None if nothing was trimmed)
+    """
+    frame = TARGET_SAMPLE_RATE * VAD_FRAME_MS // 1000
+    count = len(samples) // frame
+    if count == 0:
+        return samples, None
+
+    energy_db = frame_energy_db(samples, frame)
+
+    # Adapt to background noise, but never treat audio below the absolute floor as speech
+    threshold = max(threshold_db, float(np.percentile(energy_db, 10)) + VAD_NOISE_MARGIN_DB)
+    speech = energy_db > threshold
+    if not speech.any():
+        return samples, None
+
+    pad = max(padding_ms // VAD_FRAME_MS, 0)
+    keep = np.convolve(speech.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="same") > 0
+    if keep.all():
+        return samples, None
+
+    # Trailing partial frame follows the last full frame
+    tail = samples[count * frame :] if keep[-1] else samples[:0]
+    return np.concatenate([samples[: count * frame][np.repeat(keep, frame)], tail]), keep
+
+
+def plan_chunks(samples: np.ndarray, chunk_seconds: float) -> list[int]:
+    """
+    Choose cut points (sample indexes, including 0 and the end) at most chunk_seconds apart.
+
+    Each cut is placed at the quietest frame in the last SPLIT_SEARCH_SECONDS
+    before the limit, so words are rarely split.
+    """
+    total = len(samples)
+    chunk = int(chunk_seconds * TARGET_SAMPLE_RATE)
+    if chunk <= 0 or total <= chunk:
+        return [0, total]
+
+    frame = TARGET_SAMPLE_RATE * VAD_FRAME_MS // 1000
+    energy_db = frame_energy_db(samples, frame)
+    search = min(int(SPLIT_SEARCH_SECONDS * TARGET_SAMPLE_RATE), chunk // 2)
+
+    cuts = [0]
+    while total - cuts[-1] > chunk:
+        first = (cuts[-1] + chunk - search) // frame + 1
+        last = (cuts[-1] + chunk) // frame
+        window = energy_db[first:last]
+        cuts.append((first + int(np.argmin(window))) * frame if len(window) else cuts[-1] + chunk)
+    cuts.append(total)
+    return cuts
+
+
+def frame_energy_db(samples: np.ndarray, frame: int) -> np.ndarray:
+    """Mean energy of each full frame in dBFS."""
+    count = len(samples) // frame
+    frames = samples[: count * frame].reshape(count, frame).astype(np.float32) / 32768.0
+    return 10 * np.log10(np.mean(frames**2, axis=1) + 1e-10)
+
+
+def encode_wav(samples: np.ndarray) -> bytes:
+    """Encode mono 16 kHz samples as a 16-bit WAV file in memory."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(TARGET_SAMPLE_RATE)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def get_audio_stats() -> dict:
+    """Get preprocessing totals and cumulative latency per stage."""
+    return {
+        "ffmpeg_available": get_ffmpeg_path() is not None,
+        "files": _totals["files"],
+        "skipped": _totals["skipped"],
+        "input_bytes": _totals["input_bytes"],
+        "output_bytes": _totals["output_bytes"],
+        "bytes_saved": _totals["input_bytes"] - _totals["output_bytes"],
+        "chunks": _totals["chunks"],
+        "input_seconds": _totals["input_seconds"],
+        "output_seconds": _totals["output_seconds"],
+        "stage_seconds": dict(_stage_seconds),
+    }
+
+
+def _record(report: AudioPreprocessReport) -> None:
+    _totals["files"] += 1
+    _totals["skipped"] += report.skipped is not None
+    _totals["input_bytes"] += report.input_bytes
+    _totals["output_bytes"] += report.output_bytes
+    _totals["chunks"] += report.chunks
+    _totals["input_seconds"] += report.input_seconds
+    _totals["output_seconds"] += report.output_seconds
+    _stage_seconds.update(report.stages)
+
+
+async def _decode(path: Path, report: AudioPreprocessReport) -> Optional[np.ndarray]:
+    """Decode to mono 16 kHz int16 samples, or None if no decoder is available."""
+    ffmpeg = get_ffmpeg_path()
+    if ffmpeg is not None:
+        args = [ffmpeg, "-nostdin", "-v", "error", "-i", str(path)]
+        args += ["-ac", "1", "-ar", str(TARGET_SAMPLE_RATE), "-f", "s16le", "-"]
+        try:
+            return np.frombuffer(await _run_ffmpeg(args), dtype=np.int16)
+        except RuntimeError as e:
+            report.skipped = str(e)
+            return None
+
+    if path.suffix != ".wav":
+        report.skipped = f"no decoder for {path.suffix} (ffmpeg not installed)"
+        return None
+
+    try:
+        return await anyio.to_thread.run_sync(_decode_wav, path)
+    except (wave.Error, EOFError, ValueError) as e:
+        report.skipped = f"unsupported WAV: {e}"
+        return None
+
+
+def _decode_wav(path: Path) -> np.ndarray:
+    """Decode PCM WAV with the standard library, then downmix and resample."""
+    with wave.open(str(path), "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif width == 2:
+        data = np.frombuffer(raw, dtype="<i2").astype(np.float32)
+    elif width == 4:
+        data = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 65536
+    else:
+        raise ValueError(f"{width * 8}-bit samples")
+
+    mono = data.reshape(-1, channels).mean(axis=1)
+    return _resample(mono, rate).clip(-32768, 32767).astype(np.int16)
+
+
+def _resample(samples: np.ndarray, rate: int) -> np.ndarray:
+    """Resample to TARGET_SAMPLE_RATE (block averaging for integer ratios, else linear)."""
+    if rate == TARGET_SAMPLE_RATE or len(samples) == 0:
+        return samples
+    if rate % TARGET_SAMPLE_RATE == 0:
+        # Averaging each block doubles as a crude anti-aliasing filter
+        factor = rate // TARGET_SAMPLE_RATE
+        usable = len(samples) // factor * factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1)
+    positions = np.arange(0, len(samples), rate / TARGET_SAMPLE_RATE)
+    return np.interp(positions, np.arange(len(samples)), samples)
+
+
+async def _encode(samples: np.ndarray, stem: Path, bitrate_kbps: int) -> Path:
+    """Encode samples next to stem as Opus with ffmpeg, or as 16-bit WAV without it."""
+    ffmpeg = get_ffmpeg_path()
+    if ffmpeg is not None:
+        output_path = stem.with_name(stem.name + "-preprocessed.ogg")
+        try:
+            args = [ffmpeg, "-nostdin", "-v", "error", "-y"]
+            args += ["-f", "s16le", "-ar", str(TARGET_SAMPLE_RATE), "-ac", "1", "-i", "-"]
+            args += ["-c:a", "libopus", "-b:a", f"{bitrate_kbps}k", "-application", "voip", str(output_path)]
+            await _run_ffmpeg(args, samples.tobytes())
+            return output_path
+        except RuntimeError:
+            # ffmpeg built without libopus; fall back to WAV
+            await anyio.Path(output_path).unlink(missing_ok=True)
+
+    output_path = stem.with_name(stem.name + "-preprocessed.wav")
+    await anyio.to_thread.run_sync(_write_wav, output_path, samples)
+    return output_path
+
+
+def _write_wav(path: Path, samples: np.ndarray) -> None:
+    path.write_bytes(encode_wav(samples))
+
+
+async def _run_ffmpeg(args: list[str], stdin: Optional[bytes] = None) -> bytes:
+    """Run ffmpeg and return its stdout."""
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate(stdin)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace').strip()}")
+    return stdout
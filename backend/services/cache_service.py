@@ -0,0 +1,164 @@
+"""Content-addressed result cache for OCR, STT and analysis outputs."""
+import asyncio
+import hashlib
+from collections import Counter
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import anyio
+from diskcache import Cache
+from filelock import FileLock
+
+from config import get_settings
+from services.lock_service import try_lock
+
+T = TypeVar("T")
+
+# Read size for hashing files on disk (1 MiB)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Interval at which a worker waiting on another worker's computation checks for its result
+SINGLE_FLIGHT_POLL_SECONDS = 0.2
+
+# Lock namespace of in-flight computations, one lock file per cache key
+SINGLE_FLIGHT_LOCKS = "cache"
+
+# In-process hit/miss counters per cache namespace
+_hits: Counter = Counter()
+_misses: Counter = Counter()
+
+# Computations in flight in this process, keyed by cache key
+_inflight: dict[str, asyncio.Task] = {}
+
+
+@lru_cache()
+def get_result_cache() -> Cache:
+    """Get cached disk-backed result store with size-based LRU eviction."""
+    settings = get_settings()
+    return Cache(
+        settings.cache_dir,
+        size_limit=settings.cache_size_limit_mb * 1024 * 1024,
+        eviction_policy="least-recently-used",
+    )
+
+
+def make_cache_key(namespace: str, model: str, version: str, digest: str) -> str:
+    """Build a cache key from the input digest, model name and prompt version."""
+    return f"{namespace}:{model}:{version}:{digest}"
+
+
+def hash_bytes(data: bytes) -> str:
+    """Get SHA-256 hex digest of raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Get SHA-256 hex digest of whitespace-normalized text."""
+    return hash_bytes(" ".join(text.split()).encode("utf-8"))
+
+
+async def hash_file(path: Path) -> str:
+    """Get SHA-256 hex digest of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    async with await anyio.open_file(path, "rb") as f:
+        while chunk := await f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+async def get_or_compute(namespace: str, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+    """
+    Return the cached value for key, computing and storing it on a miss.
+
+    Concurrent misses of the same key are computed once: within the process
+    callers await the same computation, and across worker processes sharing
+    the cache a file lock per key makes the others wait for its result.
+
+    Args:
+        namespace: Counter bucket (e.g. "ocr_image", "stt")
+        key: Content-addressed cache key
+        compute: Coroutine factory producing the value on a miss
+
+    Returns:
+        Cached or freshly computed value
+    """
+    settings = get_settings()
+    if not settings.cache_enabled:
+        return await compute()
+
+    cache = get_result_cache()
+    value = await anyio.to_thread.run_sync(cache.get, key)
+    if value is not None:
+        _hits[namespace] += 1
+        return value
+
+    # Callers missing the same key share one computation (single flight);
+    # it is shielded so a cancelled caller does not cancel it for the others
+    task = _inflight.get(key)
+    if task is not None:
+        _hits[namespace] += 1
+    else:
+        task = asyncio.ensure_future(_compute_once(namespace, key, compute))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _compute_once(namespace: str, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+    """Compute and store a value, or wait for another worker process computing the same key."""
+    settings = get_settings()
+    cache = get_result_cache()
+    while True:
+        lock, value = await anyio.to_thread.run_sync(_claim, cache, key)
+        if value is not None:
+            _hits[namespace] += 1
+            return value
+        if lock is not None:
+            break
+        await asyncio.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+
+    try:
+        _misses[namespace] += 1
+        value = await compute()
+        await anyio.to_thread.run_sync(partial(cache.set, key, value, expire=settings.cache_ttl_seconds))
+    finally:
+        lock.release()
+    return value
+
+
+def _claim(cache: Cache, key: str) -> tuple[Optional[FileLock], Any]:
+    """Return (None, value) if key is cached, else (held lock, None) or (None, None) if another worker holds it."""
+    value = cache.get(key)
+    if value is not None:
+        return None, value
+    lock = try_lock(SINGLE_FLIGHT_LOCKS, key)
+    if lock is None:
+        return None, None
+    # Another worker may have stored the value between the read and taking the lock
+    value = cache.get(key)
+    if value is not None:
+        lock.release()
+        return None, value
+    return lock, None
+
+
+async def get_cache_stats() -> dict:
+    """Get hit/miss counters per namespace and current store usage."""
+    settings = get_settings()
+    namespaces = sorted(set(_hits) | set(_misses))
+    stats = {
+        "enabled": settings.cache_enabled,
+        "size_bytes": 0,
+        "entries": 0,
+        "namespaces": {name: {"hits": _hits[name], "misses": _misses[name]} for name in namespaces},
+    }
+
+    if settings.cache_enabled:
+        cache = get_result_cache()
+        # Both query the cache database
+        stats["size_bytes"] = await anyio.to_thread.run_sync(cache.volume)
+        stats["entries"] = await anyio.to_thread.run_sync(len, cache)
+
+    return stats
@@ -0,0 +1,42 @@
+"""Bounded worker pools for blocking and CPU-heavy work kept off the event loop."""
+import asyncio
+import contextvars
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from config import get_settings
+
+
+@lru_cache()
+def get_analysis_executor() -> ThreadPoolExecutor:
+    """Get thread pool for blocking CrewAI runs."""
+    settings = get_settings()
+    return ThreadPoolExecutor(max_workers=settings.analysis_max_workers, thread_name_prefix="analysis")
+
+
+@lru_cache()
+def get_render_executor() -> ProcessPoolExecutor:
+    """Get process pool for CPU-heavy PDF rendering."""
+    settings = get_settings()
+    return ProcessPoolExecutor(max_workers=settings.pdf_render_max_workers)
+
+
+async def run_in_analysis_pool(func, *args, **kwargs):
+    """Run a blocking callable in the analysis thread pool, keeping the caller's context (trace id)."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_analysis_executor(), partial(context.run, func, *args, **kwargs))
+
+
+async def run_in_render_pool(func, *args, **kwargs):
+    """Run a picklable CPU-bound callable in the render process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_render_executor(), partial(func, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    """Shut down any worker pools that were started."""
+    for getter in (get_analysis_executor, get_render_executor):
+        if getter.cache_info().currsize:
+            getter().shutdown(wait=False, cancel_futures=True)
+            getter.cache_clear()
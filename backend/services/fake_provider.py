@@ -0,0 +1,327 @@
+"""Local stand-in for the OpenAI API, used to benchmark and demo the service without network access."""
+import asyncio
+import hashlib
+import io
+import json
+import re
+import time
+import wave
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import httpx
+
+from services.token_service import estimate_prompt_tokens, estimate_tokens
+
+# Audio covered by each fake transcript segment
+FAKE_SEGMENT_SECONDS = 5.0
+
+# Bitrate assumed for audio that is not WAV (Opus at the preprocessing default)
+FAKE_AUDIO_BYTES_PER_SECOND = 24_000 // 8
+
+# Streamed replies are sent in pieces of this many characters
+STREAM_PIECE_CHARS = 8
+
+CHAT_REPLY = (
+    "계약 당사자는 임대인 홍길동과 임차인 김철수입니다. "
+    "보증금은 3억원, 월세는 50만원이며 계약 기간은 2년입니다. "
+    "잔금일 전 등기부등본을 다시 확인하고, 특약의 원상복구 범위를 명확히 하세요."
+)
+VISION_REPLY = "\n".join(
+    f"제{clause}조 (조항 {clause}) 임차인은 보증금 3억원을 계약금, 중도금, 잔금으로 나누어 지급한다."
+    for clause in range(1, 21)
+)
+TRANSCRIPT_SEGMENT = "임대인 보증금은 3억이고 월세는 50만원입니다 관리비는 별도입니다"
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """Simulated response time of one kind of model call."""
+
+    # Delay before the first byte of the response
+    first_token_seconds: float
+    # Completion tokens generated per second (0 sends the whole reply at once)
+    tokens_per_second: float = 0.0
+    # Extra processing time per second of input audio (transcription only)
+    seconds_per_audio_second: float = 0.0
+
+    def generation_seconds(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+
+
+@dataclass(frozen=True)
+class FakeProfile:
+    """Latency profiles per kind of call."""
+
+    chat: LatencyProfile
+    vision: LatencyProfile
+    transcription: LatencyProfile
+
+
+# Named profiles selectable with FAKE_PROVIDER_PROFILE; "typical" approximates gpt-4o-mini and whisper-1
+FAKE_PROFILES = {
+    "instant": FakeProfile(
+        chat=LatencyProfile(0.0),
+        vision=LatencyProfile(0.0),
+        transcription=LatencyProfile(0.0),
+    ),
+    "fast": FakeProfile(
+        chat=LatencyProfile(0.1, tokens_per_second=500.0),
+        vision=LatencyProfile(0.2, tokens_per_second=500.0),
+        transcription=LatencyProfile(0.1, seconds_per_audio_second=0.005),
+    ),
+    "typical": FakeProfile(
+        chat=LatencyProfile(0.5, tokens_per_second=80.0),
+        vision=LatencyProfile(1.5, tokens_per_second=60.0),
+        transcription=LatencyProfile(0.5, seconds_per_audio_second=0.05),
+    ),
+    "slow": FakeProfile(
+        chat=LatencyProfile(2.0, tokens_per_second=25.0),
+        vision=LatencyProfile(4.0, tokens_per_second=20.0),
+        transcription=LatencyProfile(1.5, seconds_per_audio_second=0.2),
+    ),
+}
+
+
+@dataclass
+class _Reply:
+    """A prepared fake response: its delay schedule and the body or stream pieces to send."""
+
+    first_token_seconds: float
+    generation_seconds: float
+    body: Optional[dict] = None
+    # Server-sent event payloads for streamed chat completions
+    events: Optional[list[dict]] = None
+    status_code: int = 200
+
+    @property
+    def piece_seconds(self) -> float:
+        return self.generation_seconds / len(self.events) if self.events else 0.0
+
+
+class FakeModelTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Answers chat, vision, structured output and transcription requests locally.
+
+    Replies are deterministic for a given request and carry a digest of it,
+    so distinct inputs stay distinct downstream (and in the result cache).
+    Structured outputs are filled from the requested JSON schema, and
+    transcripts have one segment per FAKE_SEGMENT_SECONDS of audio. Delays
+    follow the selected latency profile, and usage is reported like the real
+    API so token accounting works unchanged.
+    """
+
+    def __init__(self, profile: str = "typical"):
+        if profile not in FAKE_PROFILES:
+            raise ValueError(f"Unknown fake provider profile: {profile}")
+        self.profile = FAKE_PROFILES[profile]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        reply = self._reply(request, request.read())
+        if reply.events is not None:
+            return self._stream_response(_SyncEventStream(reply))
+        time.sleep(reply.first_token_seconds + reply.generation_seconds)
+        return httpx.Response(reply.status_code, json=reply.body)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        reply = self._reply(request, await request.aread())
+        if reply.events is not None:
+            return self._stream_response(_AsyncEventStream(reply))
+        await asyncio.sleep(reply.first_token_seconds + reply.generation_seconds)
+        return httpx.Response(reply.status_code, json=reply.body)
+
+    @staticmethod
+    def _stream_response(stream) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream)
+
+    def _reply(self, request: httpx.Request, content: bytes) -> _Reply:
+        path = request.url.path
+        if path.endswith("/chat/completions"):
+            return self._chat_reply(json.loads(content))
+        if path.endswith("/audio/transcriptions"):
+            return self._transcription_reply(request, content)
+        body = {"error": {"message": f"Not supported by the fake provider: {path}", "type": "invalid_request_error"}}
+        return _Reply(0.0, 0.0, body=body, status_code=404)
+
+    def _chat_reply(self, body: dict) -> _Reply:
+        messages = body.get("messages", [])
+        vision = any(
+            isinstance(message.get("content"), list)
+            and any(part.get("type") == "image_url" for part in message["content"])
+            for message in messages
+        )
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()[:16]
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            text = json.dumps(sample_json(schema, schema.get("$defs", {})), ensure_ascii=False)
+        elif vision:
+            text = f"{VISION_REPLY}\n문서 번호 {digest}"
+        elif any("Final Answer" in str(message.get("content")) for message in messages):
+            # CrewAI agents stop at a final answer in their ReAct format
+            text = f"Thought: I now can give a great answer\nFinal Answer: {CHAT_REPLY} (참조 {digest})"
+        else:
+            text = f"{CHAT_REPLY} (참조 {digest})"
+
+        prompt_tokens = estimate_prompt_tokens(messages)
+        completion_tokens = estimate_tokens(text)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        model = body.get("model", "fake")
+        completion_id = f"chatcmpl-fake-{digest}"
+        profile = self.profile.vision if vision else self.profile.chat
+
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": text, "refusal": None}
+            return _Reply(
+                profile.first_token_seconds,
+                profile.generation_seconds(completion_tokens),
+                body={
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                    "usage": usage,
+                },
+            )
+
+        def chunk(choices: list[dict], **extra: Any) -> dict:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                **extra,
+            }
+
+        pieces = [text[start : start + STREAM_PIECE_CHARS] for start in range(0, len(text), STREAM_PIECE_CHARS)]
+        events = [chunk([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])]
+        events += [chunk([{"index": 0, "delta": {"content": piece}, "finish_reason": None}]) for piece in pieces]
+        events.append(chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append(chunk([], usage=usage))
+        return _Reply(profile.first_token_seconds, profile.generation_seconds(completion_tokens), events=events)
+
+    def _transcription_reply(self, request: httpx.Request, content: bytes) -> _Reply:
+        fields = _multipart_fields(request, content)
+        audio = fields.get("file", b"")
+        seconds = _audio_seconds(audio)
+        digest = hashlib.sha256(audio).hexdigest()[:16]
+        segments = []
+        start = 0.0
+        while start < seconds or not segments:
+            end = min(start + FAKE_SEGMENT_SECONDS, max(seconds, 0.1))
+            segments.append(
+                {
+                    "id": len(segments),
+                    "seek": 0,
+                    "start": round(start, 2),
+                    "end": round(end, 2),
+                    "text": f" {TRANSCRIPT_SEGMENT} {digest} {len(segments) + 1}",
+                    "tokens": [],
+                    "temperature": 0.0,
+                    "avg_logprob": -0.2,
+                    "compression_ratio": 1.2,
+                    "no_speech_prob": 0.01,
+                }
+            )
+            start = end
+        text = "".join(segment["text"] for segment in segments).strip()
+
+        profile = self.profile.transcription
+        if fields.get("response_format", b"").decode() == "verbose_json":
+            language = fields.get("language", b"ko").decode()
+            body = {"task": "transcribe", "language": language, "duration": seconds, "text": text, "segments": segments}
+        else:
+            body = {"text": text, "usage": {"type": "duration", "seconds": round(seconds)}}
+        return _Reply(profile.first_token_seconds, seconds * profile.seconds_per_audio_second, body=body)
+
+
+class _SyncEventStream(httpx.SyncByteStream):
+    def __init__(self, reply: _Reply):
+        self._reply = reply
+
+    def __iter__(self) -> Iterator[bytes]:
+        time.sleep(self._reply.first_token_seconds)
+        for event in self._reply.events:
+            time.sleep(self._reply.piece_seconds)
+            yield _encode_event(event)
+        yield b"data: [DONE]\n\n"
+
+
+class _AsyncEventStream(httpx.AsyncByteStream):
+    def __init__(self, reply: _Reply):
+        self._reply = reply
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        await asyncio.sleep(self._reply.first_token_seconds)
+        for event in self._reply.events:
+            await asyncio.sleep(self._reply.piece_seconds)
+            yield _encode_event(event)
+        yield b"data: [DONE]\n\n"
+
+
+def _encode_event(event: dict) -> bytes:
+    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode()
+
+
+def sample_json(schema: dict, defs: dict) -> Any:
+    """Build a deterministic value that satisfies a strict structured-output JSON schema."""
+    if "$ref" in schema:
+        return sample_json(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    if "anyOf" in schema:
+        # Prefer a non-null option so optional fields carry data
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"] or schema["anyOf"]
+        return sample_json(options[0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((option for option in kind if option != "null"), "null")
+    if kind == "object":
+        return {name: sample_json(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [sample_json(schema.get("items", {}), defs)]
+    if kind == "string":
+        return "2026-01-01" if schema.get("format") == "date" else "샘플"
+    if kind == "integer":
+        return 100_000_000
+    if kind == "number":
+        return 84.5
+    if kind == "boolean":
+        return True
+    return None
+
+
+def _multipart_fields(request: httpx.Request, content: bytes) -> dict[str, bytes]:
+    """Split a multipart/form-data body into its named fields."""
+    match = re.search(r"boundary=([^;]+)", request.headers.get("content-type", ""))
+    if not match:
+        return {}
+    fields = {}
+    for part in content.split(b"--" + match.group(1).strip('"').encode()):
+        head, _, value = part.partition(b"\r\n\r\n")
+        name = re.search(rb'name="([^"]+)"', head)
+        if name:
+            fields[name.group(1).decode()] = value[:-2] if value.endswith(b"\r\n") else value
+    return fields
+
+
+def _audio_seconds(audio: bytes) -> float:
+    """Duration of a WAV file from its header, or an estimate from the size of compressed audio."""
+    if audio[:4] == b"RIFF":
+        try:
+            with wave.open(io.BytesIO(audio), "rb") as wav:
+                return wav.getnframes() / wav.getframerate()
+        except (wave.Error, EOFError):
+            pass
+    return len(audio) / FAKE_AUDIO_BYTES_PER_SECOND
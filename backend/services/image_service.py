@@ -0,0 +1,161 @@
+"""Image normalization before Vision OCR: EXIF rotation, deskew, grayscale, resizing and compact encoding."""
+import base64
+import io
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Bump when normalization changes so cached OCR results are invalidated
+IMAGE_PREPROCESS_VERSION = "1"
+
+# Skew search range and resolution in degrees; smaller skews are left alone
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+DESKEW_MIN_ANGLE = 0.5
+
+# Longest side of the thumbnail used to estimate skew
+DESKEW_SAMPLE_PX = 600
+
+JPEG_QUALITY = 85
+
+# In-process totals across OCR inputs
+_totals: Counter = Counter()
+
+
+def normalize_image(image: Image.Image, max_side: int, short_side: int) -> Image.Image:
+    """
+    Apply EXIF rotation, flatten to grayscale, deskew and downscale for the Vision model.
+
+    Args:
+        image: Decoded image
+        max_side: Longest side the model keeps (larger images are downscaled by the API anyway)
+        short_side: Shortest side the model keeps
+
+    Returns:
+        Normalized grayscale image
+    """
+    image = ImageOps.exif_transpose(image)
+
+    # Transparent areas would turn black in grayscale; put them on white paper
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, rgba)
+    image = image.convert("L")
+
+    angle = estimate_skew(image)
+    if abs(angle) >= DESKEW_MIN_ANGLE:
+        image = image.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+
+    size = vision_size(image.size, max_side, short_side)
+    if size != image.size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    return image
+
+
+def vision_size(size: tuple[int, int], max_side: int, short_side: int) -> tuple[int, int]:
+    """Size the Vision API scales an image to in high detail (longest side <= max_side, shortest <= short_side)."""
+    width, height = size
+    scale = min(1.0, max_side / max(width, height), short_side / min(width, height))
+    return max(round(width * scale), 1), max(round(height * scale), 1)
+
+
+def estimate_skew(image: Image.Image) -> float:
+    """
+    Estimate the rotation (degrees, counter-clockwise) that straightens text lines.
+
+    Uses the projection profile: rows of ink are sharpest, so the row-sum
+    variance is highest, when lines are horizontal.
+    """
+    thumb = image.copy()
+    thumb.thumbnail((DESKEW_SAMPLE_PX, DESKEW_SAMPLE_PX))
+    pixels = np.asarray(thumb)
+    ink = Image.fromarray(((pixels < pixels.mean() * 0.75) * 255).astype(np.uint8))
+    if not np.asarray(ink).any():
+        return 0.0
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP / 2, DESKEW_STEP):
+        rotated = ink.rotate(float(angle), resample=Image.Resampling.NEAREST, fillcolor=0)
+        score = float(np.var(np.asarray(rotated).sum(axis=1, dtype=np.float64)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def encode_image(image: Image.Image) -> tuple[bytes, str]:
+    """Encode as JPEG or PNG, whichever is smaller (PNG often wins on clean scans)."""
+    jpeg = io.BytesIO()
+    image.save(jpeg, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    png = io.BytesIO()
+    image.save(png, format="PNG", optimize=True)
+
+    if png.tell() < jpeg.tell():
+        return png.getvalue(), "image/png"
+    return jpeg.getvalue(), "image/jpeg"
+
+
+def prepare_image_file(path: str, max_side: int, short_side: int) -> Optional[tuple[str, str, int, float]]:
+    """
+    Normalize and encode an image file for Vision OCR (runs in the render process pool).
+
+    Returns:
+        (base64 payload, MIME type, payload bytes, seconds spent), or None if
+        Pillow cannot decode the file and it should be sent as uploaded
+    """
+    started = time.perf_counter()
+    try:
+        with Image.open(path) as image:
+            image.load()
+            data, mime_type = encode_image(normalize_image(image, max_side, short_side))
+    except (UnidentifiedImageError, OSError):
+        return None
+    return base64.b64encode(data).decode("ascii"), mime_type, len(data), time.perf_counter() - started
+
+
+def detect_image_mime(path: Path) -> str:
+    """Get the MIME type of an image file from its contents (JPEG if it cannot be identified)."""
+    try:
+        with Image.open(path) as image:
+            return Image.MIME.get(image.format, "image/jpeg")
+    except (UnidentifiedImageError, OSError):
+        return "image/jpeg"
+
+
+def record_image(kind: str, input_bytes: int, output_bytes: int, seconds: float) -> None:
+    """Add one OCR input ("image" or "pdf_page") to the totals."""
+    _totals[f"{kind}s"] += 1
+    _totals[f"{kind}_input_bytes"] += input_bytes
+    _totals[f"{kind}_output_bytes"] += output_bytes
+    _totals["normalize_seconds"] += seconds
+
+
+def record_ocr_call(seconds: float) -> None:
+    """Add the latency of one Vision OCR call to the totals."""
+    _totals["ocr_calls"] += 1
+    _totals["ocr_seconds"] += seconds
+
+
+def record_text_layer_pages(count: int) -> None:
+    """Add PDF pages whose embedded text was used instead of Vision OCR."""
+    _totals["pdf_text_layer_pages"] += count
+
+
+def get_image_stats() -> dict:
+    """Get payload totals before and after normalization, and OCR latency."""
+    calls = _totals["ocr_calls"]
+    return {
+        "images": _totals["images"],
+        "image_input_bytes": _totals["image_input_bytes"],
+        "image_output_bytes": _totals["image_output_bytes"],
+        "pdf_pages": _totals["pdf_pages"],
+        "pdf_page_output_bytes": _totals["pdf_page_output_bytes"],
+        "pdf_text_layer_pages": _totals["pdf_text_layer_pages"],
+        "normalize_seconds": _totals["normalize_seconds"],
+        "ocr_calls": calls,
+        "average_ocr_seconds": _totals["ocr_seconds"] / calls if calls else None,
+    }
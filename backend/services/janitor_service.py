@@ -0,0 +1,181 @@
+"""Background session janitor: TTL expiry, transcript compaction and disk quota enforcement."""
+import asyncio
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+import anyio
+from filelock import FileLock
+
+from config import get_settings
+from services.cache_service import SINGLE_FLIGHT_LOCKS
+from services.lock_service import lock_path, prune_lock_files, try_lock
+from storage import STT_FILE, SessionStore, get_session_store
+
+# Single-flight lock files of cache keys unused for this long are deleted
+LOCK_FILE_MAX_AGE_SECONDS = 24 * 60 * 60
+
+
+class SessionJanitor:
+    """
+    Periodically sweeps the session store in small batches.
+
+    Each pass pages through sessions by id, expiring sessions idle longer than
+    the TTL and compressing large transcripts, then evicts the least recently
+    analyzed sessions until total usage fits the quota. Every batch runs in a
+    worker thread, so the event loop is never held for a full scan.
+
+    With several worker processes, each runs a janitor, but a shared lock and
+    pass marker let only one of them sweep per interval.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        interval_seconds: float,
+        batch_size: int,
+        ttl_seconds: int,
+        quota_bytes: int,
+        compact_threshold_bytes: int,
+    ):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.compact_threshold_bytes = compact_threshold_bytes
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "runs": 0,
+            "sessions_expired": 0,
+            "sessions_evicted": 0,
+            "transcripts_compacted": 0,
+            "bytes_reclaimed": 0,
+            "last_run_at": None,
+            "last_scan_seconds": None,
+            "last_scanned_sessions": 0,
+            "last_total_bytes": 0,
+            "last_error": None,
+        }
+
+    def start(self) -> None:
+        """Start the periodic sweep."""
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Cancel the sweep; a partial pass simply resumes from the start next time."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                lock = await anyio.to_thread.run_sync(self._claim_pass)
+                if lock is not None:
+                    try:
+                        await self.run_once()
+                    finally:
+                        await anyio.to_thread.run_sync(self._finish_pass, lock)
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+            await asyncio.sleep(self.interval_seconds)
+
+    def _claim_pass(self) -> Optional[FileLock]:
+        """Take the pass lock unless another worker holds it or swept within the interval."""
+        lock = try_lock("janitor", "pass")
+        if lock is None:
+            return None
+        marker = lock_path("janitor", "last_pass")
+        try:
+            if time.time() - marker.stat().st_mtime < self.interval_seconds:
+                lock.release()
+                return None
+        except FileNotFoundError:
+            pass
+        return lock
+
+    def _finish_pass(self, lock: FileLock) -> None:
+        try:
+            lock_path("janitor", "last_pass").touch()
+        finally:
+            lock.release()
+
+    async def run_once(self) -> None:
+        """Run one full incremental pass over the session store."""
+        started = time.perf_counter()
+        now = datetime.now()
+        # (last analyzed or updated time, session id, size) of sessions kept by this pass
+        kept: list[tuple[datetime, str, int]] = []
+        scanned = 0
+        after = None
+
+        while batch := await self.store.scan_sessions(after, self.batch_size):
+            after = batch[-1].session_id
+            scanned += len(batch)
+
+            for session in batch:
+                size = session.size_bytes or 0
+                if self.ttl_seconds and (now - session.updated_at).total_seconds() > self.ttl_seconds:
+                    await self.store.delete_session(session.session_id)
+                    self.stats["sessions_expired"] += 1
+                    self.stats["bytes_reclaimed"] += size
+                    continue
+
+                if self.compact_threshold_bytes:
+                    saved = await self.store.compact_text(
+                        session.session_id, STT_FILE, self.compact_threshold_bytes
+                    )
+                    if saved:
+                        size -= saved
+                        self.stats["transcripts_compacted"] += 1
+                        self.stats["bytes_reclaimed"] += saved
+
+                kept.append((session.analyzed_at or session.updated_at, session.session_id, size))
+
+        total_bytes = sum(size for _, _, size in kept)
+        if self.quota_bytes and total_bytes > self.quota_bytes:
+            total_bytes = await self._evict(kept, total_bytes)
+
+        await self.store.vacuum()
+        await anyio.to_thread.run_sync(prune_lock_files, SINGLE_FLIGHT_LOCKS, LOCK_FILE_MAX_AGE_SECONDS)
+
+        self.stats["runs"] += 1
+        self.stats["last_run_at"] = now
+        self.stats["last_scan_seconds"] = time.perf_counter() - started
+        self.stats["last_scanned_sessions"] = scanned
+        self.stats["last_total_bytes"] = total_bytes
+        self.stats["last_error"] = None
+
+    async def _evict(self, sessions: list[tuple[datetime, str, int]], total_bytes: int) -> int:
+        """Delete least recently analyzed sessions until usage fits the quota."""
+        sessions.sort()
+        for _, session_id, size in sessions:
+            if total_bytes <= self.quota_bytes:
+                break
+            await self.store.delete_session(session_id)
+            total_bytes -= size
+            self.stats["sessions_evicted"] += 1
+            self.stats["bytes_reclaimed"] += size
+        return total_bytes
+
+
+@lru_cache()
+def get_janitor() -> SessionJanitor:
+    """Get process-wide session janitor."""
+    settings = get_settings()
+    return SessionJanitor(
+        get_session_store(),
+        interval_seconds=settings.janitor_interval_seconds,
+        batch_size=settings.janitor_batch_size,
+        ttl_seconds=settings.session_ttl_seconds,
+        quota_bytes=settings.storage_quota_mb * 1024 * 1024,
+        compact_threshold_bytes=settings.stt_compact_threshold_kb * 1024,
+    )
+
+
+def get_janitor_stats() -> dict:
+    """Get janitor counters and the results of the last pass."""
+    return {"enabled": get_settings().janitor_enabled, **get_janitor().stats}
@@ -0,0 +1,379 @@
+"""Persistent analysis job queue with a bounded asyncio worker pool."""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+import anyio
+
+from config import get_settings
+from schemas import AnalysisMode
+from services.analysis_service import ProgressCallback, analyze_session, session_exists, stream_session_analysis
+from services.metrics_service import set_trace_id
+from services.rate_limit_service import PRIORITY_BACKGROUND, set_call_priority
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    mode TEXT NOT NULL DEFAULT 'summary',
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    stage TEXT,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    worker_id TEXT,
+    heartbeat_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_session_status ON jobs (session_id, status);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue shared by all worker processes using the job database.
+
+    Any worker may run a job enqueued by another. A worker claims a job with a
+    conditional update, so each job runs once, and a job is only claimed while
+    no other job of its session is running, so a session's analyses never run
+    at once. Analyses streamed to a client run in the request, but as a job
+    claimed by the serving worker, so they are serialized the same way. Running
+    jobs carry the worker's heartbeat; jobs of a worker that stopped
+    heartbeating for the lease time are requeued for the others, and the
+    stopped worker's later updates to them are ignored.
+    """
+
+    def __init__(self, db_path: str, concurrency: int, poll_seconds: float = 1.0, lease_seconds: float = 60.0):
+        self.db_path = db_path
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = asyncio.Event()
+        self._workers: list[asyncio.Task] = []
+        self._streams: set[asyncio.Task] = set()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "mode" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN mode TEXT NOT NULL DEFAULT 'summary'")
+            for column in ("worker_id", "heartbeat_at"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    async def start(self) -> None:
+        """Requeue jobs of stopped workers and start the worker pool."""
+        await anyio.to_thread.run_sync(self._recover_jobs)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._workers.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        """Cancel workers and streamed analyses, and requeue their running jobs for later."""
+        tasks = [*self._workers, *self._streams]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        await anyio.to_thread.run_sync(self._release_jobs)
+
+    async def enqueue(self, session_id: str, mode: AnalysisMode = AnalysisMode.SUMMARY) -> dict:
+        """
+        Enqueue analysis for a session, reusing an active job for the same session and mode.
+
+        Raises:
+            FileNotFoundError: If session doesn't exist
+        """
+        if not await session_exists(session_id):
+            raise FileNotFoundError(f"Session not found: {session_id}")
+
+        job, created = await anyio.to_thread.run_sync(self._insert_job, session_id, mode.value)
+        if created:
+            self._wakeup.set()
+            # Links the request's trace id to the job's, which is the job id
+            logger.info("queued job %s for session %s (%s)", job["job_id"], session_id, mode.value)
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """Get job record by id."""
+        return await anyio.to_thread.run_sync(self._select_job, job_id)
+
+    async def stream(
+        self,
+        session_id: str,
+        mode: AnalysisMode = AnalysisMode.SUMMARY,
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """
+        Analyze a session in this request, yielding the events of stream_session_analysis.
+
+        The analysis runs as a job claimed by this worker, recorded like queued
+        ones, and waits while another job of the session is running. If the
+        caller stops iterating (e.g. the client disconnects), the analysis
+        still runs to its end, with the job running until then.
+
+        Raises:
+            FileNotFoundError: If session doesn't exist
+        """
+        if not await session_exists(session_id):
+            raise FileNotFoundError(f"Session not found: {session_id}")
+
+        while (job := await anyio.to_thread.run_sync(self._insert_running_job, session_id, mode.value)) is None:
+            await asyncio.sleep(self.poll_seconds)
+        job_id = job["job_id"]
+        logger.info("streaming job %s for session %s (%s)", job_id, session_id, mode.value)
+
+        async def on_progress(progress: float, stage: str) -> None:
+            await self._update(job_id, progress=progress, stage=stage)
+
+        # Driven by its own task, so a client disconnecting stops only the delivery of events:
+        # the job stays running until the analysis ends and records its outcome
+        events: asyncio.Queue = asyncio.Queue()
+        driver = asyncio.create_task(self._drive_stream(job_id, session_id, mode, on_progress, events))
+        self._streams.add(driver)
+        driver.add_done_callback(self._streams.discard)
+
+        while (item := await events.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    async def _drive_stream(
+        self,
+        job_id: str,
+        session_id: str,
+        mode: AnalysisMode,
+        on_progress: ProgressCallback,
+        events: asyncio.Queue,
+    ) -> None:
+        try:
+            async for event, payload in stream_session_analysis(session_id, mode, on_progress=on_progress):
+                if event == "result":
+                    result = json.dumps(payload, ensure_ascii=False)
+                    await self._update(job_id, status=JOB_COMPLETED, progress=1.0, stage="completed", result=result)
+                events.put_nowait((event, payload))
+        except Exception as e:
+            logger.exception("job %s failed", job_id)
+            await self._update(job_id, status=JOB_FAILED, error=str(e))
+            events.put_nowait(e)
+        finally:
+            events.put_nowait(None)
+            # A finished job may unblock a queued job of the same session
+            self._wakeup.set()
+
+    async def _worker(self) -> None:
+        # Jobs yield model API capacity to interactive uploads
+        set_call_priority(PRIORITY_BACKGROUND)
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await anyio.to_thread.run_sync(self._claim_job)
+                if job is not None:
+                    set_trace_id(job["job_id"])
+                    await self._run(job)
+                    # A finished job may unblock a queued job of the same session
+                    self._wakeup.set()
+                    continue
+            except Exception:
+                # E.g. jobs.db locked by other workers beyond the timeout; losing the worker would shrink the pool
+                logger.exception("job worker failed")
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            # Woken by a local enqueue, or polling for jobs enqueued by other workers
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await anyio.to_thread.run_sync(self._renew_and_recover)
+            except sqlite3.Error:
+                logger.exception("job heartbeat failed")
+
+    async def _run(self, job: dict) -> None:
+        job_id = job["job_id"]
+
+        async def on_progress(progress: float, stage: str) -> None:
+            await self._update(job_id, status=JOB_RUNNING, progress=progress, stage=stage)
+
+        try:
+            await on_progress(0.0, "started")
+            result = await analyze_session(job["session_id"], AnalysisMode(job["mode"]), on_progress=on_progress)
+        except Exception as e:
+            logger.exception("job %s failed", job_id)
+            await self._update(job_id, status=JOB_FAILED, error=str(e))
+            return
+        logger.info("job %s completed in %.3fs", job_id, result.elapsed_seconds)
+
+        await self._update(
+            job_id,
+            status=JOB_COMPLETED,
+            progress=1.0,
+            stage="completed",
+            result=result.model_dump_json(),
+        )
+
+    async def _update(self, job_id: str, **fields) -> None:
+        if not await anyio.to_thread.run_sync(self._update_job, job_id, fields):
+            logger.warning("job %s was requeued after its lease expired; dropped its update", job_id)
+
+    def _claim_job(self) -> Optional[dict]:
+        """Mark the oldest queued job of a session with no running job as running here."""
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE job_id = ("
+                "  SELECT job_id FROM jobs AS queued WHERE status = ? AND NOT EXISTS ("
+                "    SELECT 1 FROM jobs AS running WHERE running.session_id = queued.session_id AND running.status = ?"
+                "  ) ORDER BY created_at LIMIT 1"
+                ") AND status = ? RETURNING *",
+                (JOB_RUNNING, self.worker_id, now, now, JOB_QUEUED, JOB_RUNNING, JOB_QUEUED),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def _renew_and_recover(self) -> None:
+        now = datetime.now()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE worker_id = ? AND status = ?",
+                (now.isoformat(), self.worker_id, JOB_RUNNING),
+            )
+        self._recover_jobs()
+
+    def _recover_jobs(self) -> None:
+        """Requeue running jobs whose worker stopped heartbeating, e.g. after a crash."""
+        expired = (datetime.now() - timedelta(seconds=self.lease_seconds)).isoformat()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = NULL WHERE status = ? "
+                "AND (heartbeat_at IS NULL OR heartbeat_at < ?) RETURNING job_id",
+                (JOB_QUEUED, JOB_RUNNING, expired),
+            ).fetchall()
+        for row in rows:
+            logger.warning("requeued job %s of a stopped worker", row["job_id"])
+
+    def _release_jobs(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = NULL WHERE worker_id = ? AND status = ?",
+                (JOB_QUEUED, self.worker_id, JOB_RUNNING),
+            )
+
+    def _insert_job(self, session_id: str, mode: str) -> tuple[dict, bool]:
+        with self._connect() as conn:
+            # Serialize check-and-insert so concurrent requests, from any worker, dedupe to one job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE session_id = ? AND mode = ? AND status IN (?, ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (session_id, mode, *ACTIVE_STATUSES),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("COMMIT")
+                    return dict(row), False
+
+                now = datetime.now().isoformat()
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (job_id, session_id, mode, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, session_id, mode, JOB_QUEUED, now, now),
+                )
+                row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                conn.execute("COMMIT")
+                return dict(row), True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _insert_running_job(self, session_id: str, mode: str) -> Optional[dict]:
+        """Insert a job running here, unless a job of the session is running."""
+        with self._connect() as conn:
+            # Serialized with claims, so the session's jobs still run one at a time
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                running = conn.execute(
+                    "SELECT 1 FROM jobs WHERE session_id = ? AND status = ?", (session_id, JOB_RUNNING)
+                ).fetchone()
+                if running is not None:
+                    conn.execute("COMMIT")
+                    return None
+
+                now = datetime.now().isoformat()
+                row = conn.execute(
+                    "INSERT INTO jobs (job_id, session_id, mode, status, stage, created_at, updated_at, worker_id, "
+                    "heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) RETURNING *",
+                    (uuid.uuid4().hex, session_id, mode, JOB_RUNNING, "started", now, now, self.worker_id, now),
+                ).fetchone()
+                conn.execute("COMMIT")
+                return dict(row)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _select_job(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def _update_job(self, job_id: str, fields: dict) -> bool:
+        """Update a job running here; False if it was requeued (and maybe claimed elsewhere) meanwhile."""
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ? AND worker_id = ?",
+                (*fields.values(), job_id, self.worker_id),
+            )
+        return cursor.rowcount > 0
+
+
+@lru_cache()
+def get_job_queue() -> JobQueue:
+    """Get process-wide analysis job queue."""
+    settings = get_settings()
+    return JobQueue(
+        settings.job_db_path,
+        settings.job_max_concurrency,
+        poll_seconds=settings.job_poll_seconds,
+        lease_seconds=settings.job_lease_seconds,
+    )
+
+
+def load_job_result(job: dict) -> Optional[dict]:
+    """Decode stored analysis result of a completed job."""
+    return json.loads(job["result"]) if job.get("result") else None
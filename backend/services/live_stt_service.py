@@ -0,0 +1,260 @@
+"""Incremental transcription of live recordings streamed as raw PCM."""
+import asyncio
+import json
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
+
+import numpy as np
+
+from config import Settings, get_openai_client, get_settings
+from services.audio_service import TARGET_SAMPLE_RATE, VAD_FRAME_MS, encode_wav, frame_energy_db, plan_chunks
+from services.preanalysis_service import SEGMENT_STT, add_segment
+from services.rate_limit_service import overload_retry_after
+from services.stt_service import TRANSCRIPTION_LANGUAGE
+from storage import STT_FILE, STT_SEGMENTS_FILE, get_session_store
+
+logger = logging.getLogger(__name__)
+
+# Live audio is 16-bit little-endian mono PCM at TARGET_SAMPLE_RATE
+BYTES_PER_SAMPLE = 2
+
+# Sends one message to the client
+SendCallback = Callable[[dict[str, Any]], Awaitable[None]]
+
+# In-process latency counters across live transcription calls
+_latency: Counter = Counter()
+
+
+class TranscriptionBackend(ABC):
+    """Transcribes one window of live audio."""
+
+    @abstractmethod
+    async def transcribe(self, samples: np.ndarray) -> str:
+        """Transcribe mono 16 kHz int16 samples."""
+
+
+class OpenAITranscriptionBackend(TranscriptionBackend):
+    """Sends each window to the OpenAI transcription API as an in-memory WAV file."""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    async def transcribe(self, samples: np.ndarray) -> str:
+        result = await get_openai_client().audio.transcriptions.create(
+            model=self.model,
+            file=("window.wav", encode_wav(samples)),
+            language=TRANSCRIPTION_LANGUAGE,
+        )
+        return result.text.strip()
+
+
+class FakeTranscriptionBackend(TranscriptionBackend):
+    """
+    Local stand-in for tests and demos without network access.
+
+    Emits one placeholder word per second of audio after a fixed delay, so
+    partial transcripts grow as the window grows.
+    """
+
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    async def transcribe(self, samples: np.ndarray) -> str:
+        await asyncio.sleep(self.latency_seconds)
+        seconds = len(samples) // TARGET_SAMPLE_RATE
+        return " ".join(f"단어{index + 1}" for index in range(max(seconds, 1)))
+
+
+@lru_cache()
+def get_transcription_backend() -> TranscriptionBackend:
+    """Get live transcription backend selected in settings."""
+    settings = get_settings()
+    if settings.live_stt_backend == "fake":
+        return FakeTranscriptionBackend(settings.live_stt_fake_latency_seconds)
+    if settings.live_stt_backend == "openai":
+        return OpenAITranscriptionBackend(settings.whisper_model)
+    raise ValueError(f"Unknown live STT backend: {settings.live_stt_backend}")
+
+
+class LiveTranscriptionSession:
+    """
+    Rolling-window transcription of one live recording.
+
+    Audio accumulates in an open window. Every live_step_seconds of new
+    audio the whole window is re-transcribed and sent as a "partial"
+    message. The window is finalized once speech is followed by
+    live_commit_silence_ms of silence, or at the quietest point when it
+    reaches live_max_window_seconds. Finalized text is sent as a "final"
+    message and appended to the session's stt.txt right away.
+
+    A window whose transcription fails is reported in an "error" message
+    ({type, start, end, detail}, plus retry_after when the model API is at
+    capacity) and dropped; the session stays open for the next window.
+    """
+
+    def __init__(self, session_id: str, backend: TranscriptionBackend, settings: Settings, send: SendCallback):
+        self.session_id = session_id
+        self.backend = backend
+        self.settings = settings
+        self.send = send
+        self._pending = bytearray()
+        # Samples finalized so far, i.e. the stream time where the open window starts
+        self._committed = 0
+        self._partial_at = 0.0
+        self._segments: list[dict] = []
+        self._data = asyncio.Event()
+        self._closed = False
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start transcribing in the background as audio arrives."""
+        self._worker = asyncio.create_task(self._run())
+
+    def feed(self, data: bytes) -> None:
+        """Add received PCM bytes to the open window."""
+        self._pending.extend(data)
+        self._data.set()
+
+    async def finish(self) -> str:
+        """
+        Finalize the open window and persist the recording.
+
+        If transcription stopped on an error, sends a closing "error" message
+        and still persists the text transcribed so far.
+
+        Returns:
+            Full transcript of the recording (partial if the worker failed)
+        """
+        self._closed = True
+        self._data.set()
+        if self._worker is not None:
+            try:
+                await self._worker
+            except Exception as e:
+                await self._report_failure(e)
+        try:
+            await self._finalize(len(self._pending) // BYTES_PER_SAMPLE)
+        except Exception as e:
+            await self._report_failure(e)
+
+        text = " ".join(segment["text"] for segment in self._segments)
+        if self._segments:
+            line = json.dumps({"segments": self._segments}, ensure_ascii=False)
+            await get_session_store().append_text(self.session_id, STT_SEGMENTS_FILE, f"{line}\n")
+            # Extract facts once for the whole recording rather than per window
+            await add_segment(self.session_id, SEGMENT_STT, text)
+        return text
+
+    async def _report_failure(self, error: Exception) -> None:
+        logger.error("live transcription of session %s failed", self.session_id, exc_info=error)
+        await self.send(self._error_message(error))
+
+    async def _run(self) -> None:
+        while True:
+            await self._data.wait()
+            self._data.clear()
+            if self._closed:
+                return
+            await self._step()
+
+    async def _step(self) -> None:
+        samples = self._window()
+        duration = len(samples) / TARGET_SAMPLE_RATE
+        if duration - self._partial_at < self.settings.live_step_seconds:
+            return
+
+        frame = TARGET_SAMPLE_RATE * VAD_FRAME_MS // 1000
+        speech = frame_energy_db(samples, frame) > self.settings.audio_silence_threshold_db
+        silence_frames = self.settings.live_commit_silence_ms // VAD_FRAME_MS
+
+        if speech.any() and not speech[-silence_frames:].any():
+            await self._finalize(len(samples))
+        elif duration >= self.settings.live_max_window_seconds:
+            await self._finalize(plan_chunks(samples, self.settings.live_max_window_seconds)[1])
+        elif speech.any():
+            transcript = await self._transcribe(samples)
+            self._partial_at = duration
+            if transcript is not None:
+                await self._send_window("partial", *transcript, len(samples))
+
+    async def _finalize(self, count: int) -> None:
+        """Transcribe and commit the first count samples of the open window."""
+        samples = self._window()[:count]
+        frame = TARGET_SAMPLE_RATE * VAD_FRAME_MS // 1000
+        has_speech = len(samples) >= frame and bool(
+            (frame_energy_db(samples, frame) > self.settings.audio_silence_threshold_db).any()
+        )
+
+        transcript = await self._transcribe(samples) if has_speech else None
+        if transcript is not None:
+            text, latency = transcript
+            if text:
+                await self._send_window("final", text, latency, count)
+                await get_session_store().append_text(self.session_id, STT_FILE, f"\n{text}")
+                self._segments.append(self._timestamps(text, count))
+
+        # Silence-only windows are dropped without a call, avoiding hallucinated text;
+        # failed windows are dropped too, so one error doesn't stall the stream
+        del self._pending[: count * BYTES_PER_SAMPLE]
+        self._committed += count
+        self._partial_at = 0.0
+
+    def _window(self) -> np.ndarray:
+        usable = len(self._pending) // BYTES_PER_SAMPLE * BYTES_PER_SAMPLE
+        return np.frombuffer(bytes(self._pending[:usable]), dtype="<i2")
+
+    async def _transcribe(self, samples: np.ndarray) -> Optional[tuple[str, float]]:
+        """Transcribe a window; on failure sends an "error" message for it and returns None."""
+        started = time.perf_counter()
+        try:
+            text = await self.backend.transcribe(samples)
+        except Exception as e:
+            logger.warning("live transcription of session %s failed: %s", self.session_id, e)
+            _latency["errors"] += 1
+            await self.send(self._error_message(e, len(samples)))
+            return None
+        latency = time.perf_counter() - started
+        _latency["calls"] += 1
+        _latency["total_seconds"] += latency
+        _latency["audio_seconds"] += len(samples) / TARGET_SAMPLE_RATE
+        _latency["max_seconds"] = max(_latency["max_seconds"], latency)
+        return text, latency
+
+    def _timestamps(self, text: str, count: int) -> dict:
+        return {
+            "start": round(self._committed / TARGET_SAMPLE_RATE, 2),
+            "end": round((self._committed + count) / TARGET_SAMPLE_RATE, 2),
+            "text": text,
+        }
+
+    async def _send_window(self, kind: str, text: str, latency: float, count: int) -> None:
+        await self.send({"type": kind, **self._timestamps(text, count), "latency_ms": round(latency * 1000)})
+
+    def _error_message(self, error: Exception, count: Optional[int] = None) -> dict:
+        message: dict[str, Any] = {"type": "error"}
+        if count is not None:
+            window = self._timestamps("", count)
+            message.update(start=window["start"], end=window["end"])
+        message["detail"] = f"Transcription failed: {error}"
+        retry_after = overload_retry_after(error)
+        if retry_after is not None:
+            message["retry_after"] = max(1, math.ceil(retry_after))
+        return message
+
+
+def get_live_stats() -> dict:
+    """Get live transcription call counts, failures and latency."""
+    calls = _latency["calls"]
+    return {
+        "backend": get_settings().live_stt_backend,
+        "calls": calls,
+        "errors": _latency["errors"],
+        "audio_seconds": _latency["audio_seconds"],
+        "average_latency_seconds": _latency["total_seconds"] / calls if calls else None,
+        "max_latency_seconds": _latency["max_seconds"] if calls else None,
+    }
@@ -0,0 +1,72 @@
+"""Cross-process file locks coordinating the workers that share one storage directory."""
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from filelock import FileLock, Timeout
+
+from config import get_settings
+
+
+def lock_path(namespace: str, name: str) -> Path:
+    """Get the lock file for name (hashed, so any string works) under the namespace's lock directory."""
+    directory = Path(get_settings().lock_dir) / namespace
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{hashlib.sha256(name.encode('utf-8')).hexdigest()[:32]}.lock"
+
+
+def try_lock(namespace: str, name: str) -> Optional[FileLock]:
+    """
+    Take a lock without waiting.
+
+    The lock excludes other processes and other holders in this process, and
+    may be released from any thread.
+
+    Returns:
+        The held lock, or None if it is held elsewhere
+    """
+    lock = FileLock(lock_path(namespace, name), thread_local=False)
+    try:
+        lock.acquire(blocking=False)
+    except Timeout:
+        return None
+    return lock
+
+
+def prune_lock_files(namespace: str, max_age_seconds: float) -> int:
+    """
+    Delete lock files of a namespace not used for max_age_seconds.
+
+    A process racing with the deletion may end up holding a lock on the
+    removed file, so use this only for locks that avoid duplicate work
+    rather than guard data.
+
+    Returns:
+        Number of files deleted
+    """
+    directory = Path(get_settings().lock_dir) / namespace
+    cutoff = time.time() - max_age_seconds
+    deleted = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        lock = FileLock(entry.path, thread_local=False)
+        try:
+            lock.acquire(blocking=False)
+        except Timeout:
+            continue
+        try:
+            Path(entry.path).unlink(missing_ok=True)
+            deleted += 1
+        finally:
+            lock.release()
+    return deleted
@@ -0,0 +1,294 @@
+"""Prometheus metrics and per-request trace ids for the upload, OCR, STT and analysis stages."""
+import logging
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from config import get_model_rate_limiter, get_settings
+from services.token_service import get_token_stats
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, from a cache hit to a long crew run
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+TRACE_HEADER = "x-request-id"
+# Client-supplied request ids are reused only if they are short and plain
+_TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+_trace_id: ContextVar[str] = ContextVar("trace_id", default="-")
+
+
+def new_trace_id() -> str:
+    """Generate a trace id for a request or background job."""
+    return uuid.uuid4().hex[:16]
+
+
+def get_trace_id() -> str:
+    """Get the trace id of the current request or job ("-" outside of one)."""
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: str) -> None:
+    """Set the trace id for the current context; tasks and pool runs started from it inherit it."""
+    _trace_id.set(trace_id)
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds the current trace id to log records as %(trace_id)s."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = _trace_id.get()
+        return True
+
+
+def _label_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_label_text(self.labels, labels)} {value}" for labels, value in values)
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with labels and fixed buckets."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # Per label set: count per bucket (plus +Inf), sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total[0]) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, labels)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("contract_stage_seconds", "Latency of processing stages.", ("stage",))
+STAGE_ERRORS = Counter("contract_stage_errors_total", "Processing stages that raised.", ("stage",))
+STAGE_BYTES = Counter("contract_stage_bytes_total", "Bytes read or sent by processing stages.", ("stage",))
+OCR_PAGES = Counter("contract_ocr_pages_total", "Document pages extracted, by text source.", ("source",))
+HTTP_SECONDS = Histogram(
+    "contract_http_request_seconds", "Latency of API requests.", ("method", "route", "status")
+)
+
+METRICS = (STAGE_SECONDS, STAGE_ERRORS, STAGE_BYTES, OCR_PAGES, HTTP_SECONDS)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a processing stage into contract_stage_seconds.
+
+    Usable around sync and async code alike. The duration is also logged at
+    DEBUG level with the current trace id.
+    """
+    if not get_settings().metrics_enabled:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, name)
+        logger.debug("stage %s took %.3fs", name, elapsed)
+
+
+def record_bytes(stage_name: str, count: int) -> None:
+    """Add bytes processed by a stage to contract_stage_bytes_total."""
+    if get_settings().metrics_enabled:
+        STAGE_BYTES.inc(stage_name, amount=count)
+
+
+def record_pages(source: str, count: int) -> None:
+    """Count OCR'd or text-layer pages in contract_ocr_pages_total."""
+    if count and get_settings().metrics_enabled:
+        OCR_PAGES.inc(source, amount=count)
+
+
+def render_metrics() -> str:
+    """Render all metrics, including model token usage and admission control, in the Prometheus text format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    # Token usage is kept by the token accounting transport; exported from its totals
+    totals = get_token_stats()["totals"]
+    model_labels = ("model", "operation")
+    lines += [
+        "# HELP contract_model_requests_total Model API calls with reported usage.",
+        "# TYPE contract_model_requests_total counter",
+    ]
+    lines += [
+        f"contract_model_requests_total{_label_text(model_labels, (row['model'], row['operation']))} {row['requests']}"
+        for row in totals
+    ]
+    lines += [
+        "# HELP contract_model_tokens_total Model tokens by kind (prompt, cached prompt, completion).",
+        "# TYPE contract_model_tokens_total counter",
+    ]
+    for row in totals:
+        for kind in ("prompt", "cached", "completion"):
+            labels = _label_text((*model_labels, "kind"), (row["model"], row["operation"], kind))
+            lines.append(f"contract_model_tokens_total{labels} {row[f'{kind}_tokens']}")
+    lines += [
+        "# HELP contract_model_request_seconds_total Time spent in model API calls.",
+        "# TYPE contract_model_request_seconds_total counter",
+    ]
+    lines += [
+        f"contract_model_request_seconds_total{_label_text(model_labels, (row['model'], row['operation']))} "
+        f"{row['average_seconds'] * row['requests']}"
+        for row in totals
+    ]
+
+    # Admission control keeps its own counters in the shared rate limiter
+    limits = get_model_rate_limiter().get_stats()
+    lines += [
+        "# HELP contract_model_admitted_total Model API calls admitted by the rate limiter.",
+        "# TYPE contract_model_admitted_total counter",
+    ]
+    lines += [
+        f"contract_model_admitted_total{_label_text(('priority',), (row['priority'],))} {row['admitted']}"
+        for row in limits["priorities"]
+    ]
+    lines += [
+        "# HELP contract_model_queue_seconds_total Time admitted model API calls spent queued.",
+        "# TYPE contract_model_queue_seconds_total counter",
+    ]
+    lines += [
+        f"contract_model_queue_seconds_total{_label_text(('priority',), (row['priority'],))} {row['wait_seconds']}"
+        for row in limits["priorities"]
+    ]
+    lines += [
+        "# HELP contract_model_rejected_total Model API calls refused with 503 by admission control.",
+        "# TYPE contract_model_rejected_total counter",
+        f"contract_model_rejected_total {limits['rejected']}",
+        "# HELP contract_model_throttled_total Provider 429 responses.",
+        "# TYPE contract_model_throttled_total counter",
+        f"contract_model_throttled_total {limits['throttled']}",
+        "# HELP contract_model_queue_waiting Model API calls currently queued.",
+        "# TYPE contract_model_queue_waiting gauge",
+    ]
+    lines += [
+        f"contract_model_queue_waiting{_label_text(('budget',), (row['budget'],))} {row['waiting']}"
+        for row in limits["budgets"]
+    ]
+    lines += [
+        "# HELP contract_model_rate_scale Share of the configured rate limits in use after provider 429s.",
+        "# TYPE contract_model_rate_scale gauge",
+    ]
+    lines += [
+        f"contract_model_rate_scale{_label_text(('budget',), (row['budget'],))} {row['rate_scale']}"
+        for row in limits["budgets"]
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class TraceMiddleware:
+    """
+    ASGI middleware giving each request a trace id and recording its latency.
+
+    The id comes from a well-formed X-Request-ID header or is generated, is
+    echoed in the response's X-Request-ID header, and is available to log
+    records through TraceIdFilter, including those from tasks and pool runs
+    the request starts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        supplied = dict(scope["headers"]).get(TRACE_HEADER.encode(), b"").decode("latin-1")
+        trace_id = supplied if _TRACE_ID_PATTERN.match(supplied) else new_trace_id()
+        token = _trace_id.set(trace_id)
+        if scope["type"] == "websocket":
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _trace_id.reset(token)
+            return
+
+        started = time.perf_counter()
+        status: Optional[int] = None
+
+        async def send_with_trace(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (TRACE_HEADER.encode(), trace_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Label by route template so session ids do not create a series each;
+            # static files and unmatched paths have no API route and are not recorded
+            route = getattr(scope.get("route"), "path", None)
+            if get_settings().metrics_enabled and route is not None:
+                HTTP_SECONDS.observe(elapsed, scope["method"], route, str(status or 500))
+            logger.info("%s %s %s %.3fs", scope["method"], scope["path"], status or 500, elapsed)
+            _trace_id.reset(token)
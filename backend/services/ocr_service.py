@@ -1,133 +1,352 @@
 """OCR service for extracting text from images and PDFs using GPT-4o Vision."""
+import asyncio
 import base64
-import tempfile
+import io
+import json
+import time
+import unicodedata
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Optional
 
+import anyio
 from fastapi import UploadFile
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 
 from config import get_openai_client, get_settings
+from services.cache_service import get_or_compute, hash_bytes, hash_file, make_cache_key
+from services.executors import run_in_render_pool
+from services.image_service import (
+    IMAGE_PREPROCESS_VERSION,
+    detect_image_mime,
+    encode_image,
+    normalize_image,
+    prepare_image_file,
+    record_image,
+    record_ocr_call,
+    record_text_layer_pages,
+)
+from services.metrics_service import record_bytes, record_pages, stage
+from services.preanalysis_service import SEGMENT_OCR, add_segment
+from services.rate_limit_service import overload_retry_after
+from services.upload_service import UploadTooLargeError, read_base64, save_upload_to_temp
+from storage import OCR_DOCUMENTS_FILE, OCR_FILE, get_session_store
 
-async def extract_text_from_file(file: UploadFile, session_dir: Path) -> str:
+PDF_PAGE_PROMPT = "이 PDF 페이지에서 모든 텍스트를 정확히 추출해주세요. 텍스트만 반환하고 다른 설명은 하지 마세요."
+IMAGE_PROMPT = "이미지에서 모든 텍스트를 추출해주세요."
+
+# Bump when the OCR prompts change so cached results are invalidated
+OCR_PROMPT_VERSION = "1"
+
+# Transient upstream errors worth retrying per page
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+
+
+@dataclass
+class DocumentResult:
+    """OCR result of one uploaded document."""
+
+    filename: str
+    # Extracted text per page in page order (a single entry for images)
+    pages: list[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self.pages)
+
+
+async def extract_text_from_file(file: UploadFile, session_id: str) -> str:
     """
     Extract text from image or PDF file using OCR.
 
     Args:
         file: Uploaded image or PDF file
-        session_dir: Directory to store OCR results
+        session_id: Session to store the OCR result in
 
     Returns:
         Extracted text content
     """
-    session_dir.mkdir(parents=True, exist_ok=True)
+    document = DocumentResult(file.filename, await _ocr_upload(file, get_settings()))
+    await _store_documents(session_id, [document])
+    return document.text
+
+
+async def extract_text_from_files(files: list[UploadFile], session_id: str) -> list[DocumentResult]:
+    """
+    Extract text from several images or PDFs concurrently.
+
+    A failing file does not fail the batch; its result carries the error
+    instead. Successful documents are stored in upload order.
+
+    Args:
+        files: Uploaded image or PDF files
+        session_id: Session to store the OCR results in
+
+    Returns:
+        Result per file, in upload order
+    """
     settings = get_settings()
-    client = get_openai_client()
+    semaphore = asyncio.Semaphore(settings.ocr_max_concurrent_files)
+
+    async def ocr_file(file: UploadFile) -> DocumentResult:
+        async with semaphore:
+            try:
+                return DocumentResult(file.filename, await _ocr_upload(file, settings))
+            except UploadTooLargeError as e:
+                return DocumentResult(file.filename, error=str(e))
+            except Exception as e:
+                return DocumentResult(file.filename, error=f"Document processing failed: {str(e)}")
 
+    documents = await asyncio.gather(*(ocr_file(file) for file in files))
+    await _store_documents(session_id, [document for document in documents if document.error is None])
+    return documents
+
+
+async def _ocr_upload(file: UploadFile, settings) -> list[str]:
+    """Save one upload to a temporary file and extract its text per page."""
     filename = file.filename.lower()
     suffix = ".pdf" if filename.endswith(".pdf") else ".jpg"
 
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = Path(tmp.name)
+    # Stream upload to a temporary file, enforcing the size limit as it arrives
+    max_size_mb = settings.max_document_size_mb if suffix == ".pdf" else settings.max_image_size_mb
+    tmp_path = await save_upload_to_temp(file, suffix, max_size_mb)
 
     try:
-        text = await _process_file(client, tmp_path, suffix, settings)
+        return await _process_file(get_openai_client(), tmp_path, suffix, settings)
+    finally:
+        # Clean up temporary file
+        await anyio.Path(tmp_path).unlink(missing_ok=True)
 
-        # Save OCR result
-        output_path = session_dir / "ocr.txt"
-        output_path.write_text(text, encoding="utf-8")
 
-        return text
+async def _store_documents(session_id: str, documents: list[DocumentResult]) -> None:
+    """Append documents to the session's OCR text and per-document page records."""
+    if not documents:
+        return
 
-    finally:
-        # Clean up temporary file
-        tmp_path.unlink(missing_ok=True)
+    store = get_session_store()
+    lines = "".join(
+        json.dumps({"filename": document.filename, "pages": document.pages}, ensure_ascii=False) + "\n"
+        for document in documents
+    )
+    await store.append_text(session_id, OCR_DOCUMENTS_FILE, lines)
+    await store.append_text(session_id, OCR_FILE, "".join(f"\n\n{document.text}" for document in documents))
 
+    # Start background fact extraction per document
+    for document in documents:
+        await add_segment(session_id, SEGMENT_OCR, document.text)
 
-async def _process_file(client, tmp_path: Path, suffix: str, settings) -> str:
-    """Process PDF or image file and extract text."""
+
+async def _process_file(client, tmp_path: Path, suffix: str, settings) -> list[str]:
+    """Process PDF or image file and extract text per page."""
     if suffix == ".pdf":
         return await _process_pdf(client, tmp_path, settings)
     else:
-        return await _process_image(client, tmp_path, settings)
+        return [await _process_image(client, tmp_path, settings)]
 
 
-async def _process_pdf(client, pdf_path: Path, settings) -> str:
-    """Process PDF file using Vision API or fallback to PyPDF2."""
-    try:
-        from pdf2image import convert_from_path
-        import io
-
-        images = convert_from_path(str(pdf_path))
-        text_parts = []
-
-        for image in images:
-            # Convert image to base64
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format="PNG")
-            base64_image = base64.b64encode(img_byte_arr.getvalue()).decode("utf-8")
-
-            # Extract text using Vision API
-            response = client.chat.completions.create(
-                model=settings.openai_model_name,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "이 PDF 페이지에서 모든 텍스트를 정확히 추출해주세요. 텍스트만 반환하고 다른 설명은 하지 마세요.",
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/png;base64,{base64_image}"},
-                            },
-                        ],
-                    }
-                ],
-            )
-            text_parts.append(response.choices[0].message.content.strip())
-
-        return "\n\n".join(text_parts)
+async def _process_pdf(client, pdf_path: Path, settings) -> list[str]:
+    """
+    Extract PDF text page by page, using the embedded text layer where it is usable.
+
+    Only pages without a usable text layer (scans, image-only pages) are
+    rendered and sent to the Vision API. Pages are merged in their original order.
+    """
+    layers = None
+    if settings.pdf_text_layer_enabled:
+        with stage("pdf_text_layer"):
+            layers = await run_in_render_pool(_read_pdf_text_layers, str(pdf_path))
 
+    try:
+        import pdf2image  # noqa: F401
     except ImportError:
-        # Fallback to PyPDF2 for text-based PDFs
-        try:
-            from PyPDF2 import PdfReader
+        if layers is None and not settings.pdf_text_layer_enabled:
+            layers = await run_in_render_pool(_read_pdf_text_layers, str(pdf_path))
+        return [_join_text_layers(layers)]
+
+    if layers is None:
+        # Text layer disabled or unreadable: OCR every page
+        page_count = await anyio.to_thread.run_sync(_count_pdf_pages, pdf_path)
+        texts: list[Optional[str]] = [None] * page_count
+    else:
+        texts = [
+            text if is_usable_text_layer(text, settings.pdf_text_layer_min_chars, settings.pdf_text_layer_min_quality)
+            else None
+            for text in layers
+        ]
+        record_text_layer_pages(sum(text is not None for text in texts))
+        record_pages("text_layer", sum(text is not None for text in texts))
+
+    scanned = [number for number, text in enumerate(texts, start=1) if text is None]
+    if not scanned:
+        return texts
 
-            reader = PdfReader(str(pdf_path))
-            text_parts = [page.extract_text() for page in reader.pages]
-            text = "\n".join(text_parts)
+    # Pages are rendered and OCRed one at a time, so rendering overlaps with OCR and at most
+    # this many rendered pages are held in memory at once, whatever the page count
+    window = asyncio.Semaphore(settings.ocr_max_concurrent_pages + settings.pdf_render_max_workers)
+    ocr_slots = asyncio.Semaphore(settings.ocr_max_concurrent_pages)
 
-            if not text.strip():
-                return "PDF에서 텍스트를 추출할 수 없습니다. 스캔된 PDF의 경우 'pip install pdf2image'를 실행하세요."
+    async def ocr_page(number: int) -> str:
+        async with window:
+            with stage("pdf_render"):
+                base64_image, mime_type, size, seconds = await run_in_render_pool(
+                    _render_pdf_page,
+                    str(pdf_path),
+                    number,
+                    settings.ocr_pdf_dpi,
+                    settings.ocr_image_preprocessing_enabled,
+                    settings.ocr_image_max_side_px,
+                    settings.ocr_image_short_side_px,
+                )
+            record_image("pdf_page", 0, size, seconds)
+            record_bytes("pdf_render", size)
 
-            return text
+            async with ocr_slots:
+                digest = hash_bytes(base64_image.encode("ascii"))
+                key = make_cache_key("ocr_pdf_page", settings.openai_model_name, OCR_PROMPT_VERSION, digest)
+                return await get_or_compute(
+                    "ocr_pdf_page",
+                    key,
+                    lambda: _extract_with_retry(client, PDF_PAGE_PROMPT, mime_type, base64_image, settings),
+                )
 
-        except Exception as e:
-            return f"PDF 처리 중 오류 발생: {str(e)}"
+    # Semaphores wake waiters in order, so pages start in page order; gather keeps results in it
+    ocr_texts = await asyncio.gather(*(ocr_page(number) for number in scanned))
+    for number, text in zip(scanned, ocr_texts):
+        texts[number - 1] = text
+    return texts
+
+
+def _render_pdf_page(
+    pdf_path: str, page_number: int, dpi: int, normalize: bool, max_side: int, short_side: int
+) -> tuple[str, str, int, float]:
+    """
+    Render one 1-based PDF page for Vision OCR (runs in the render process pool).
+
+    Returns:
+        (base64 payload, MIME type, payload bytes, seconds spent normalizing)
+    """
+    from pdf2image import convert_from_path
+
+    (image,) = convert_from_path(pdf_path, dpi=dpi, grayscale=normalize, first_page=page_number, last_page=page_number)
+
+    started = time.perf_counter()
+    if normalize:
+        data, mime_type = encode_image(normalize_image(image, max_side, short_side))
+    else:
+        img_byte_arr = io.BytesIO()
+        image.save(img_byte_arr, format="PNG")
+        data, mime_type = img_byte_arr.getvalue(), "image/png"
+    return base64.b64encode(data).decode("utf-8"), mime_type, len(data), time.perf_counter() - started
+
+
+def _read_pdf_text_layers(pdf_path: str) -> Optional[list[str]]:
+    """Extract the embedded text of each page, or None if the PDF cannot be parsed (runs in the render process pool)."""
+    try:
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(pdf_path)
+        return [page.extract_text() or "" for page in reader.pages]
+    except Exception:
+        return None
+
+
+def is_usable_text_layer(text: str, min_chars: int, min_quality: float) -> bool:
+    """
+    Check whether a page's embedded text can stand in for OCR.
+
+    The page needs at least min_chars visible characters, and at least
+    min_quality of them must be printable. Fonts without a Unicode mapping
+    extract as control, private-use or replacement characters.
+    """
+    visible = [char for char in text if not char.isspace()]
+    if len(visible) < min_chars:
+        return False
+    garbled = sum(char == "\ufffd" or unicodedata.category(char)[0] == "C" for char in visible)
+    return 1 - garbled / len(visible) >= min_quality
+
+
+def _count_pdf_pages(pdf_path: Path) -> int:
+    """Get the number of pages of a PDF."""
+    from pdf2image import pdfinfo_from_path
+
+    return int(pdfinfo_from_path(str(pdf_path))["Pages"])
+
+
+def _join_text_layers(layers: Optional[list[str]]) -> str:
+    """Fallback without pdf2image: return whatever text layer exists."""
+    if layers is None:
+        return "PDF 처리 중 오류 발생: PDF를 읽을 수 없습니다."
+
+    text = "\n".join(layers)
+    if not text.strip():
+        return "PDF에서 텍스트를 추출할 수 없습니다. 스캔된 PDF의 경우 'pip install pdf2image'를 실행하세요."
+    return text
 
 
 async def _process_image(client, image_path: Path, settings) -> str:
     """Process image file using Vision API."""
-    with open(image_path, "rb") as image_file:
-        base64_image = base64.b64encode(image_file.read()).decode("utf-8")
-
-    response = client.chat.completions.create(
-        model=settings.openai_model_name,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": "이미지에서 모든 텍스트를 추출해주세요."},
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
-                    },
-                ],
-            }
-        ],
-    )
+    version = OCR_PROMPT_VERSION
+    if settings.ocr_image_preprocessing_enabled:
+        version = f"{OCR_PROMPT_VERSION}:{IMAGE_PREPROCESS_VERSION}"
+    key = make_cache_key("ocr_image", settings.openai_model_name, version, await hash_file(image_path))
+
+    async def compute() -> str:
+        prepared = None
+        if settings.ocr_image_preprocessing_enabled:
+            with stage("image_prepare"):
+                prepared = await run_in_render_pool(
+                    prepare_image_file,
+                    str(image_path),
+                    settings.ocr_image_max_side_px,
+                    settings.ocr_image_short_side_px,
+                )
+
+        if prepared is not None:
+            base64_image, mime_type, size, seconds = prepared
+            record_image("image", (await anyio.Path(image_path).stat()).st_size, size, seconds)
+        else:
+            mime_type = await anyio.to_thread.run_sync(detect_image_mime, image_path)
+            base64_image = await read_base64(image_path)
+        return await _extract_with_retry(client, IMAGE_PROMPT, mime_type, base64_image, settings)
+
+    return await get_or_compute("ocr_image", key, compute)
+
+
+async def _extract_with_retry(client, prompt: str, mime_type: str, base64_image: str, settings) -> str:
+    """Extract text with Vision API, retrying transient failures with exponential backoff."""
+    for attempt in range(settings.ocr_page_max_retries + 1):
+        try:
+            return await _vision_extract(client, prompt, mime_type, base64_image, settings)
+        except RETRYABLE_ERRORS as e:
+            # Retrying a saturated model API only adds load; the shared rate limiter already backs off
+            if attempt == settings.ocr_page_max_retries or overload_retry_after(e) is not None:
+                raise
+            await asyncio.sleep(settings.ocr_retry_backoff_seconds * 2**attempt)
+
+
+async def _vision_extract(client, prompt: str, mime_type: str, base64_image: str, settings) -> str:
+    """Send a single image to the Vision API and return the extracted text."""
+    started = time.perf_counter()
+    with stage("vision"):
+        response = await client.chat.completions.create(
+            model=settings.openai_model_name,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {"url": f"data:{mime_type};base64,{base64_image}"},
+                        },
+                    ],
+                }
+            ],
+        )
+
+    record_ocr_call(time.perf_counter() - started)
+    record_bytes("vision", len(base64_image))
+    record_pages("vision", 1)
 
     return response.choices[0].message.content.strip()
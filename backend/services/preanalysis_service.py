@@ -0,0 +1,125 @@
+"""Incremental per-upload fact extraction so session analysis only merges cached results."""
+import asyncio
+import logging
+from collections import Counter
+from typing import Optional
+
+import agents
+from agents.prompts import PROMPT_VERSION
+from config import get_settings
+from services.cache_service import get_or_compute, hash_text, make_cache_key
+from services.executors import run_in_analysis_pool
+from services.rate_limit_service import PRIORITY_BACKGROUND, set_call_priority
+from storage import Segment, get_session_store
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_STT = "stt"
+SEGMENT_OCR = "ocr"
+
+SEGMENT_LABELS = {SEGMENT_STT: "음성 대화", SEGMENT_OCR: "문서 내용"}
+
+# In-flight extraction tasks keyed by (session id, segment id)
+_pending: dict[tuple[str, str], asyncio.Task] = {}
+
+
+async def add_segment(session_id: str, kind: str, text: str, replace: bool = False) -> None:
+    """
+    Record a new session segment and start background fact extraction for it.
+
+    Args:
+        session_id: Session identifier
+        kind: SEGMENT_STT or SEGMENT_OCR
+        text: Text of the new segment only
+        replace: Drop existing segments of the same kind (for overwritten session files)
+    """
+    settings = get_settings()
+    if not settings.incremental_analysis_enabled or not text.strip():
+        return
+
+    record = {"kind": kind, "text": text, "facts": None}
+    segment_id = await get_session_store().add_segment(session_id, kind, record, replace=replace)
+
+    key = (session_id, segment_id)
+    _pending[key] = asyncio.create_task(_extract_and_store(key, record))
+
+
+async def collect_segment_facts(session_id: str, texts: dict[str, str]) -> Optional[str]:
+    """
+    Merge extracted facts of all session segments in upload order.
+
+    Waits for in-flight extractions and extracts any segment that has no
+    facts yet (e.g. after a restart).
+
+    Args:
+        session_id: Session identifier
+        texts: Full session text per segment kind (SEGMENT_STT, SEGMENT_OCR)
+
+    Returns:
+        Merged facts text, or None if the segments don't cover the session
+        text, e.g. for uploads made while incremental analysis was off or by
+        a worker with it disabled; only the full text covers those
+    """
+    segments = await get_session_store().list_segments(session_id)
+    if not segments or not all(_covers(segments, kind, text) for kind, text in texts.items()):
+        return None
+
+    records = await asyncio.gather(*(_load_facts(session_id, segment) for segment in segments))
+
+    counters = {kind: 0 for kind in SEGMENT_LABELS}
+    parts = []
+    for record in records:
+        counters[record["kind"]] += 1
+        label = SEGMENT_LABELS[record["kind"]]
+        parts.append(f"[{label} {counters[record['kind']]} 추출 내용]\n{record['facts']}")
+
+    return "\n\n".join(parts)
+
+
+async def _load_facts(session_id: str, segment: Segment) -> dict:
+    pending = _pending.get((session_id, segment.segment_id))
+    if pending is not None:
+        record = await asyncio.shield(pending)
+        if record["facts"] is not None:
+            return record
+
+    record = segment.record
+    if record["facts"] is None:
+        record["facts"] = await _extract_segment_facts(record["text"])
+    return record
+
+
+async def _extract_and_store(key: tuple[str, str], record: dict) -> dict:
+    # Runs as its own task, so this does not affect the upload that started it
+    set_call_priority(PRIORITY_BACKGROUND)
+    try:
+        record["facts"] = await _extract_segment_facts(record["text"])
+        # No-op if the segment was replaced while extracting
+        await get_session_store().update_segment(*key, record)
+    except Exception:
+        # Left without facts; collect_segment_facts retries at analysis time
+        logger.exception("fact extraction for segment %s of session %s failed", key[1], key[0])
+    finally:
+        _pending.pop(key, None)
+
+    return record
+
+
+def _covers(segments: list[Segment], kind: str, text: str) -> bool:
+    """Whether the segments of a kind hold exactly the words of the session text (in any upload order)."""
+    words: Counter = Counter()
+    for segment in segments:
+        if segment.kind == kind:
+            words.update(segment.record["text"].split())
+    return words == Counter(text.split())
+
+
+async def _extract_segment_facts(text: str) -> str:
+    settings = get_settings()
+    key = make_cache_key("segment_facts", settings.openai_model_name, PROMPT_VERSION, hash_text(text))
+    return await get_or_compute("segment_facts", key, lambda: run_in_analysis_pool(_extract_facts, text))
+
+
+def _extract_facts(text: str) -> str:
+    # Resolved on the pool thread, so the first extraction loads CrewAI there rather than on the event loop
+    return agents.extract_facts(text)
@@ -0,0 +1,411 @@
+"""
+Admission control and rate limiting shared by every model API call.
+
+All clients (Vision and Whisper through the async OpenAI client, CrewAI and
+structured analysis through the agents' client) send requests through a
+RateLimitTransport, so one scheduler sees the whole process's traffic:
+
+- Requests and estimated tokens are drawn from per-minute token buckets,
+  one budget for chat models and one for transcription.
+- Waiting calls are served strictly by priority, then arrival: interactive
+  uploads before background analysis jobs and fact extraction.
+- Interactive calls that would overflow the wait queue, or wait longer
+  than the configured limit, are refused at once with a 503 carrying
+  Retry-After (and x-should-retry: false so the OpenAI client does not retry).
+- A 429 from the provider pauses the budget for its reset time and halves
+  the rate used, which then recovers gradually with successful calls.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from services.token_service import estimate_prompt_tokens
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BACKGROUND: "background"}
+
+BUDGET_CHAT = "chat"
+BUDGET_TRANSCRIPTION = "transcription"
+
+# Bucket capacity in seconds of budget; providers enforce per-minute limits over shorter windows
+BURST_SECONDS = 10.0
+
+# Rate scale after 429s (multiplicative decrease) and its recovery per successful call
+MIN_RATE_SCALE = 0.1
+RATE_RECOVERY_STEP = 0.02
+
+# Pause after a 429 without reset headers
+DEFAULT_THROTTLE_SECONDS = 1.0
+
+# Longest sleep between checks while queued
+MAX_POLL_SECONDS = 0.25
+
+# Marks a refusal made by this scheduler rather than the provider
+REJECTED_HEADER = "x-admission-rejected"
+
+_priority: ContextVar[int] = ContextVar("model_call_priority", default=PRIORITY_INTERACTIVE)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def set_call_priority(priority: int) -> None:
+    """Set the priority of model calls made from the current context and the tasks it starts."""
+    _priority.set(priority)
+
+
+def parse_reset_seconds(value: str) -> Optional[float]:
+    """Parse an OpenAI reset duration such as "1s", "6m0s" or "120ms"."""
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def throttle_seconds(headers: httpx.Headers) -> float:
+    """Time to hold off after a 429, from the response's retry and reset headers."""
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+    resets = [
+        parse_reset_seconds(headers[name])
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if name in headers
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else DEFAULT_THROTTLE_SECONDS
+
+
+class ModelBusyError(Exception):
+    """Raised when a model call cannot be admitted in time."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Model API is at capacity, retry in {math.ceil(retry_after)}s")
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    """Token bucket refilled continuously at a per-minute rate; 0 disables it."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.capacity = per_minute / 60 * BURST_SECONDS
+        self.level = self.capacity
+
+    def refill(self, elapsed: float, scale: float) -> None:
+        self.level = min(self.capacity, self.level + elapsed * self.per_minute / 60 * scale)
+
+    def shortfall_seconds(self, amount: float, scale: float) -> float:
+        """Seconds until amount can be drawn (an amount above capacity needs a full bucket)."""
+        if not self.per_minute:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / (self.per_minute / 60 * scale))
+
+    def take(self, amount: float) -> None:
+        if self.per_minute:
+            self.level -= amount
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class _Budget:
+    """Request and token buckets of one rate limit, with its waiting calls."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.scale = 1.0
+        self.paused_until = 0.0
+        self.updated = time.monotonic()
+        self.waiting: list[_Ticket] = []
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests.refill(elapsed, self.scale)
+        self.tokens.refill(elapsed, self.scale)
+
+    def ready_in(self, tokens: int, now: float) -> float:
+        """Seconds until a call of tokens could start, ignoring queued calls."""
+        return max(
+            self.paused_until - now,
+            self.requests.shortfall_seconds(1, self.scale),
+            self.tokens.shortfall_seconds(tokens, self.scale),
+        )
+
+    def take(self, tokens: int) -> None:
+        self.requests.take(1)
+        self.tokens.take(tokens)
+
+    def head(self) -> Optional[_Ticket]:
+        while self.waiting and self.waiting[0].cancelled:
+            heapq.heappop(self.waiting)
+        return self.waiting[0] if self.waiting else None
+
+    def estimate_wait(self, ticket: _Ticket, now: float) -> float:
+        """Rough wait of a new ticket behind the calls queued at or above its priority."""
+        ahead = [queued for queued in self.waiting if not queued.cancelled and queued < ticket]
+        requests = len(ahead) + 1
+        tokens = sum(queued.tokens for queued in ahead) + ticket.tokens
+        waits = [self.paused_until - now, 0.0]
+        if self.requests.per_minute:
+            waits.append((requests - self.requests.level) / (self.requests.per_minute / 60 * self.scale))
+        if self.tokens.per_minute:
+            waits.append((tokens - self.tokens.level) / (self.tokens.per_minute / 60 * self.scale))
+        return max(waits)
+
+
+class ModelRateLimiter:
+    """Schedules model calls from threads and event loops against shared budgets."""
+
+    def __init__(
+        self,
+        chat_rpm: int,
+        chat_tpm: int,
+        transcription_rpm: int,
+        max_waiting: int,
+        max_wait_seconds: float,
+    ):
+        self.budgets = {
+            BUDGET_CHAT: _Budget(chat_rpm, chat_tpm),
+            BUDGET_TRANSCRIPTION: _Budget(transcription_rpm, 0),
+        }
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def _enter(self, budget_name: str, tokens: int, priority: int) -> tuple[_Ticket, Optional[float]]:
+        """Admit or queue a call; returns its ticket and, if it was queued, its deadline."""
+        budget = self.budgets[budget_name]
+        ticket = _Ticket(priority, next(self._seq), tokens)
+        now = time.monotonic()
+        with self._lock:
+            budget.refill(now)
+            self.stats[f"{PRIORITY_NAMES[priority]}_requests"] += 1
+            if budget.head() is None and budget.ready_in(tokens, now) == 0:
+                budget.take(tokens)
+                return ticket, None
+
+            deadline = math.inf
+            if priority == PRIORITY_INTERACTIVE:
+                waiting = sum(1 for queued in budget.waiting if not queued.cancelled and queued.priority == priority)
+                estimate = budget.estimate_wait(ticket, now)
+                if waiting >= self.max_waiting or estimate > self.max_wait_seconds:
+                    self.stats["rejected"] += 1
+                    raise ModelBusyError(max(estimate, 1.0))
+                deadline = now + self.max_wait_seconds
+            heapq.heappush(budget.waiting, ticket)
+            return ticket, deadline
+
+    def _poll(self, budget_name: str, ticket: _Ticket, deadline: float) -> Optional[float]:
+        """Start the call if it is first in line and affordable; otherwise seconds to sleep."""
+        budget = self.budgets[budget_name]
+        now = time.monotonic()
+        with self._lock:
+            budget.refill(now)
+            if budget.head() is ticket:
+                delay = budget.ready_in(ticket.tokens, now)
+                if delay == 0:
+                    heapq.heappop(budget.waiting)
+                    budget.take(ticket.tokens)
+                    return None
+            else:
+                delay = MAX_POLL_SECONDS
+
+            if now + delay > deadline:
+                ticket.cancelled = True
+                self.stats["rejected"] += 1
+                raise ModelBusyError(max(budget.estimate_wait(ticket, now), 1.0))
+            return min(delay, MAX_POLL_SECONDS)
+
+    def acquire(self, budget_name: str, tokens: int) -> float:
+        """Block the calling thread until the call may start; returns seconds waited."""
+        started = time.monotonic()
+        ticket, deadline = self._enter(budget_name, tokens, _priority.get())
+        if deadline is not None:
+            while (delay := self._poll(budget_name, ticket, deadline)) is not None:
+                time.sleep(delay)
+        return self._admitted(ticket, started)
+
+    async def acquire_async(self, budget_name: str, tokens: int) -> float:
+        """Wait without blocking the event loop until the call may start; returns seconds waited."""
+        started = time.monotonic()
+        ticket, deadline = self._enter(budget_name, tokens, _priority.get())
+        if deadline is not None:
+            try:
+                while (delay := self._poll(budget_name, ticket, deadline)) is not None:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                ticket.cancelled = True
+                raise
+        return self._admitted(ticket, started)
+
+    def _admitted(self, ticket: _Ticket, started: float) -> float:
+        waited = time.monotonic() - started
+        name = PRIORITY_NAMES[ticket.priority]
+        with self._lock:
+            self.stats[f"{name}_admitted"] += 1
+            self.stats[f"{name}_wait_seconds"] += waited
+        return waited
+
+    def report(self, budget_name: str, response: httpx.Response) -> None:
+        """Adapt the budget to a provider response: back off on 429, recover on success."""
+        budget = self.budgets[budget_name]
+        with self._lock:
+            if response.status_code == 429:
+                self.stats["throttled"] += 1
+                budget.scale = max(MIN_RATE_SCALE, budget.scale / 2)
+                budget.paused_until = max(budget.paused_until, time.monotonic() + throttle_seconds(response.headers))
+            elif response.status_code < 400:
+                budget.scale = min(1.0, budget.scale + RATE_RECOVERY_STEP)
+
+    def get_stats(self) -> dict:
+        """Get budget state, admissions and waits per priority, refusals and provider 429s."""
+        with self._lock:
+            now = time.monotonic()
+            budgets = [
+                {
+                    "budget": name,
+                    "requests_per_minute": budget.requests.per_minute,
+                    "tokens_per_minute": budget.tokens.per_minute,
+                    "rate_scale": budget.scale,
+                    "paused_seconds": max(0.0, budget.paused_until - now),
+                    "waiting": sum(1 for ticket in budget.waiting if not ticket.cancelled),
+                }
+                for name, budget in self.budgets.items()
+            ]
+            stats = Counter(self.stats)
+
+        priorities = []
+        for name in PRIORITY_NAMES.values():
+            admitted = stats[f"{name}_admitted"]
+            priorities.append(
+                {
+                    "priority": name,
+                    "requests": stats[f"{name}_requests"],
+                    "admitted": admitted,
+                    "wait_seconds": stats[f"{name}_wait_seconds"],
+                    "average_wait_seconds": stats[f"{name}_wait_seconds"] / admitted if admitted else 0.0,
+                }
+            )
+        return {
+            "budgets": budgets,
+            "priorities": priorities,
+            "rejected": stats["rejected"],
+            "throttled": stats["throttled"],
+        }
+
+
+def request_cost(request: httpx.Request, completion_reserve: int) -> tuple[str, int]:
+    """Budget and estimated tokens of a model API request (prompt plus allowed completion)."""
+    if request.url.path.endswith("/audio/transcriptions"):
+        return BUDGET_TRANSCRIPTION, 0
+    try:
+        body = json.loads(request.content)
+    except (ValueError, httpx.RequestNotRead):
+        return BUDGET_CHAT, completion_reserve
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or completion_reserve
+    return BUDGET_CHAT, estimate_prompt_tokens(body.get("messages", [])) + completion
+
+
+def _busy_response(error: ModelBusyError) -> httpx.Response:
+    retry_after = str(math.ceil(error.retry_after))
+    return httpx.Response(
+        503,
+        headers={"retry-after": retry_after, "x-should-retry": "false", REJECTED_HEADER: "true"},
+        json={"error": {"message": str(error), "type": "server_overloaded", "code": "admission_rejected"}},
+    )
+
+
+class RateLimitTransport(httpx.BaseTransport):
+    """Wraps a transport so every request is admitted by the rate limiter first."""
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: ModelRateLimiter, completion_reserve: int):
+        self._transport = transport
+        self._limiter = limiter
+        self._completion_reserve = completion_reserve
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        budget, tokens = request_cost(request, self._completion_reserve)
+        try:
+            self._limiter.acquire(budget, tokens)
+        except ModelBusyError as e:
+            return _busy_response(e)
+        response = self._transport.handle_request(request)
+        self._limiter.report(budget, response)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRateLimitTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of RateLimitTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: ModelRateLimiter, completion_reserve: int):
+        self._transport = transport
+        self._limiter = limiter
+        self._completion_reserve = completion_reserve
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        budget, tokens = request_cost(request, self._completion_reserve)
+        try:
+            await self._limiter.acquire_async(budget, tokens)
+        except ModelBusyError as e:
+            return _busy_response(e)
+        response = await self._transport.handle_async_request(request)
+        self._limiter.report(budget, response)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def overload_retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds to suggest in Retry-After if error (or its cause) means the model API is saturated.
+
+    Covers refusals by this scheduler and provider 429s that outlived the
+    client's retries; returns None for any other error.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, ModelBusyError):
+            return error.retry_after
+        response = getattr(error, "response", None)
+        if isinstance(response, httpx.Response):
+            if response.headers.get(REJECTED_HEADER) == "true":
+                return float(response.headers.get("retry-after", 1))
+            if response.status_code == 429:
+                return throttle_seconds(response.headers)
+        error = error.__cause__ or error.__context__
+    return None
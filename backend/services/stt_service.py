@@ -1,54 +1,195 @@
 """Speech-to-text service using OpenAI Whisper API."""
-import tempfile
+import asyncio
+import json
 from pathlib import Path
+from typing import Optional
 
+import anyio
 from fastapi import UploadFile
 
-from config import get_openai_client, get_settings
+from config import Settings, get_openai_client, get_settings
+from services.audio_service import (
+    AUDIO_PREPROCESS_VERSION,
+    AudioChunk,
+    PreparedAudio,
+    detect_audio_suffix,
+    preprocess_audio,
+)
+from services.cache_service import get_or_compute, hash_file, make_cache_key
+from services.metrics_service import record_bytes, stage
+from services.preanalysis_service import SEGMENT_STT, add_segment
+from services.upload_service import UploadTooLargeError, save_upload_to_temp
+from storage import STT_FILE, STT_SEGMENTS_FILE, get_session_store
 
+TRANSCRIPTION_LANGUAGE = "ko"
 
-async def transcribe_audio(file: UploadFile, session_dir: Path) -> str:
+# Bump when the cached transcript format changes
+TRANSCRIPT_FORMAT_VERSION = "2"
+
+# Longest run of words de-duplicated between chunks without segment timestamps
+MAX_OVERLAP_WORDS = 30
+
+
+async def transcribe_audio(file: UploadFile, session_id: str) -> str:
     """
     Transcribe audio file to text using OpenAI Whisper.
 
+    Long recordings are split into overlapping chunks at silences, transcribed
+    concurrently and stitched back in order.
+
     Args:
         file: Uploaded audio file
-        session_dir: Directory to store transcription results
+        session_id: Session to append the transcription to
 
     Returns:
         Transcribed text
 
     Note:
-        Multiple recordings are appended to stt.txt file.
+        Multiple recordings are appended to stt.txt file, and their segment
+        timestamps to stt_segments.jsonl (one line per recording).
     """
-    session_dir.mkdir(parents=True, exist_ok=True)
     settings = get_settings()
     client = get_openai_client()
 
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = Path(tmp.name)
+    # Stream upload to a temporary file, enforcing the size limit as it arrives
+    tmp_path = await save_upload_to_temp(file, Path(file.filename or "").suffix, settings.max_audio_size_mb)
 
     try:
-        # Transcribe using Whisper
-        with open(tmp_path, "rb") as audio_file:
-            result = client.audio.transcriptions.create(
-                model=settings.whisper_model,
-                file=audio_file,
-                language="ko",
-            )
+        # Whisper picks the decoder from the file name, so name it after the actual format
+        tmp_path = await _rename_to_detected_format(tmp_path, file.filename or "")
+
+        async def transcribe() -> dict:
+            if settings.audio_preprocessing_enabled:
+                with stage("audio_preprocess"):
+                    prepared = await preprocess_audio(tmp_path, settings)
+            else:
+                prepared = PreparedAudio(source=tmp_path, chunks=[AudioChunk(tmp_path)])
+
+            try:
+                semaphore = asyncio.Semaphore(settings.stt_max_concurrent_chunks)
+
+                async def run(chunk: AudioChunk) -> tuple[str, Optional[list[dict]]]:
+                    async with semaphore:
+                        return await _transcribe_chunk(client, chunk.path, settings)
+
+                results = await asyncio.gather(*(run(chunk) for chunk in prepared.chunks))
+                return stitch_transcripts(prepared, results)
+            finally:
+                await prepared.cleanup()
 
-        text = result.text.strip()
+        # Preprocessing changes what Whisper hears, so it is part of the cache key
+        version = f"{TRANSCRIPTION_LANGUAGE}:{TRANSCRIPT_FORMAT_VERSION}"
+        if settings.audio_preprocessing_enabled:
+            version = f"{version}:{AUDIO_PREPROCESS_VERSION}"
+        key = make_cache_key("stt", settings.whisper_model, version, await hash_file(tmp_path))
+        transcript = await get_or_compute("stt", key, transcribe)
+        text = transcript["text"]
 
-        # Append to session STT file
-        output_path = session_dir / "stt.txt"
-        with open(output_path, "a", encoding="utf-8") as f:
-            f.write(f"\n{text}")
+        # Append to session STT files
+        store = get_session_store()
+        await store.append_text(session_id, STT_FILE, f"\n{text}")
+        segments_line = json.dumps({"segments": transcript["segments"]}, ensure_ascii=False)
+        await store.append_text(session_id, STT_SEGMENTS_FILE, f"{segments_line}\n")
+
+        # Start background fact extraction for just this recording
+        await add_segment(session_id, SEGMENT_STT, text)
 
         return text
 
     finally:
         # Clean up temporary file
-        tmp_path.unlink(missing_ok=True)
+        await anyio.Path(tmp_path).unlink(missing_ok=True)
+
+
+def stitch_transcripts(prepared: PreparedAudio, results: list[tuple[str, Optional[list[dict]]]]) -> dict:
+    """
+    Join chunk transcripts in order, dropping what was transcribed twice in overlaps.
+
+    Each chunk keeps only segments centred in the window it is responsible
+    for; timestamps are mapped back to the original recording. Chunks without
+    segment timestamps fall back to trimming repeated words at the seams.
+
+    Returns:
+        {"text": full transcript, "segments": [{"start", "end", "text"}, ...]}
+    """
+    pieces: list[list[str]] = []
+    segments: list[dict] = []
+    timed = all(chunk_segments is not None for _, chunk_segments in results)
+
+    for chunk, (text, chunk_segments) in zip(prepared.chunks, results):
+        if not timed:
+            pieces.append(text.split())
+            continue
+
+        for segment in chunk_segments:
+            middle = (segment["start"] + segment["end"]) / 2
+            if not chunk.keep_from <= middle < chunk.keep_until:
+                continue
+            segments.append(
+                {
+                    "start": round(prepared.source_time(chunk.offset + segment["start"]), 2),
+                    "end": round(prepared.source_time(chunk.offset + segment["end"]), 2),
+                    "text": segment["text"],
+                }
+            )
+
+    if timed:
+        return {"text": " ".join(segment["text"] for segment in segments), "segments": segments}
+
+    words: list[str] = []
+    for piece in pieces:
+        words.extend(piece[_overlap_length(words, piece) :])
+    return {"text": " ".join(words), "segments": segments}
+
+
+def _overlap_length(previous: list[str], following: list[str]) -> int:
+    """Length of the longest run ending previous that also starts following."""
+    for length in range(min(len(previous), len(following), MAX_OVERLAP_WORDS), 0, -1):
+        if previous[-length:] == following[:length]:
+            return length
+    return 0
+
+
+async def _transcribe_chunk(client, path: Path, settings: Settings) -> tuple[str, Optional[list[dict]]]:
+    """Transcribe one file, returning its text and segment timestamps when the model provides them."""
+    size = (await anyio.Path(path).stat()).st_size
+    if size > settings.whisper_max_file_size_mb * 1024 * 1024:
+        raise UploadTooLargeError(settings.whisper_max_file_size_mb)
+
+    # Only whisper models return segment timestamps
+    timed = settings.whisper_model.startswith("whisper")
+    options = {"response_format": "verbose_json", "timestamp_granularities": ["segment"]} if timed else {}
+
+    # The request body is streamed from disk
+    with stage("whisper"), open(path, "rb") as audio_file:
+        result = await client.audio.transcriptions.create(
+            model=settings.whisper_model,
+            file=audio_file,
+            language=TRANSCRIPTION_LANGUAGE,
+            **options,
+        )
+    record_bytes("whisper", size)
+
+    raw_segments = getattr(result, "segments", None)
+    if raw_segments is None:
+        return result.text.strip(), None
+    segments = [
+        {"start": segment.start, "end": segment.end, "text": segment.text.strip()}
+        for segment in raw_segments
+        if segment.text.strip()
+    ]
+    return result.text.strip(), segments
+
+
+async def _rename_to_detected_format(path: Path, filename: str) -> Path:
+    """Rename a temporary upload so its suffix matches the sniffed container format."""
+    async with await anyio.open_file(path, "rb") as f:
+        header = await f.read(16)
+
+    suffix = detect_audio_suffix(header, filename)
+    if suffix == path.suffix:
+        return path
+
+    target = path.with_suffix(suffix)
+    await anyio.Path(path).rename(target)
+    return target
@@ -0,0 +1,271 @@
+"""Token accounting for model API calls, recorded at the HTTP transport of the shared clients."""
+import json
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import httpx
+
+# Number of most recent calls kept for inspection
+RECENT_CALLS = 200
+
+# Largest non-streamed response body buffered to read its usage
+MAX_METERED_BODY_BYTES = 4 * 1024 * 1024
+
+# Prompt tokens of one high detail image normalized to 2048x768 (4 tiles of 170 plus 85)
+IMAGE_PROMPT_TOKENS = 765
+
+_lock = threading.Lock()
+# Totals keyed by (model, operation)
+_totals: dict[tuple[str, str], Counter] = {}
+_recent: deque = deque(maxlen=RECENT_CALLS)
+
+
+def record_usage(
+    model: str,
+    operation: str,
+    prompt_tokens: int,
+    cached_tokens: int,
+    completion_tokens: int,
+    seconds: float,
+) -> None:
+    """Add one model API call to the totals."""
+    call = {
+        "model": model,
+        "operation": operation,
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": completion_tokens,
+        "seconds": seconds,
+        "at": time.time(),
+    }
+    with _lock:
+        totals = _totals.setdefault((model, operation), Counter())
+        totals["requests"] += 1
+        totals["prompt_tokens"] += prompt_tokens
+        totals["cached_tokens"] += cached_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["seconds"] += seconds
+        _recent.append(call)
+
+
+def get_token_stats() -> dict:
+    """Get token totals per model and operation, and the most recent calls."""
+    with _lock:
+        totals = [
+            {
+                "model": model,
+                "operation": operation,
+                "requests": counter["requests"],
+                "prompt_tokens": counter["prompt_tokens"],
+                "cached_tokens": counter["cached_tokens"],
+                "completion_tokens": counter["completion_tokens"],
+                "cached_ratio": counter["cached_tokens"] / counter["prompt_tokens"] if counter["prompt_tokens"] else None,
+                "average_seconds": counter["seconds"] / counter["requests"],
+            }
+            for (model, operation), counter in sorted(_totals.items())
+        ]
+        recent = list(_recent)
+    return {"totals": totals, "recent": recent}
+
+
+def reset_token_stats() -> None:
+    """Clear all recorded usage (used by benchmarks between runs)."""
+    with _lock:
+        _totals.clear()
+        _recent.clear()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough o200k token count: about four ASCII characters or one Hangul syllable per token."""
+    ascii_chars = sum(1 for char in text if char.isascii())
+    return max(1, ascii_chars // 4 + len(text) - ascii_chars)
+
+
+def estimate_prompt_tokens(messages: list[dict]) -> int:
+    """Estimate the prompt tokens of chat messages, counting images at their normalized size."""
+    tokens = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if part.get("type") == "image_url":
+                    tokens += IMAGE_PROMPT_TOKENS
+                else:
+                    tokens += estimate_tokens(part.get("text", ""))
+        else:
+            tokens += estimate_tokens(content or "")
+    return tokens
+
+
+def parse_usage(usage: dict[str, Any]) -> tuple[int, int, int]:
+    """
+    Normalize a usage object to (prompt, cached prompt, completion) tokens.
+
+    Handles both Chat Completions (prompt_/completion_tokens) and
+    Responses / transcription (input_/output_tokens) field names.
+    """
+    prompt = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+    completion = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+    details = usage.get("prompt_tokens_details") or usage.get("input_tokens_details") or {}
+    return prompt, details.get("cached_tokens") or 0, completion
+
+
+class _UsageMeter:
+    """Collects one response body as it streams and records its usage when the stream closes."""
+
+    def __init__(self, request: httpx.Request, response: httpx.Response, started: float):
+        self.operation = request.url.path.rsplit("/v1/", 1)[-1]
+        self.model = _request_model(request)
+        self.streamed = response.headers.get("content-type", "").startswith("text/event-stream")
+        self.started = started
+        self._body = bytearray()
+        self._usage: Optional[dict] = None
+        self._done = False
+
+        # The transport sees the body before httpx decodes it
+        encoding = response.headers.get("content-encoding", "identity")
+        self._decoder = None
+        if encoding == "gzip":
+            self._decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        elif encoding == "deflate":
+            self._decoder = zlib.decompressobj()
+        elif encoding != "identity":
+            self._done = True
+
+    def feed(self, chunk: bytes) -> None:
+        if self._done:
+            return
+        if self._decoder is not None:
+            try:
+                chunk = self._decoder.decompress(chunk)
+            except zlib.error:
+                self._done = True
+                return
+        self._body.extend(chunk)
+        if self.streamed:
+            # Keep only the unfinished line; usage comes in its own data line near the end
+            *lines, rest = self._body.split(b"\n")
+            self._body = bytearray(rest)
+            for line in lines:
+                self._scan_event(line)
+        elif len(self._body) > MAX_METERED_BODY_BYTES:
+            self._done = True
+
+    def finish(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        if self.streamed:
+            self._scan_event(bytes(self._body))
+        else:
+            try:
+                body = json.loads(self._body)
+            except ValueError:
+                return
+            if isinstance(body, dict):
+                self._usage = body.get("usage") or self._usage
+                self.model = body.get("model") or self.model
+
+        if self._usage:
+            record_usage(self.model, self.operation, *parse_usage(self._usage), time.perf_counter() - self.started)
+
+    def _scan_event(self, line: bytes) -> None:
+        if not line.startswith(b"data:") or b'"usage"' not in line:
+            return
+        try:
+            event = json.loads(line[5:])
+        except ValueError:
+            return
+        # Responses API streams wrap usage in the final response object
+        event = event.get("response", event)
+        if event.get("usage"):
+            self._usage = event["usage"]
+            self.model = event.get("model") or self.model
+
+
+def _request_model(request: httpx.Request) -> str:
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            return json.loads(request.content).get("model") or "unknown"
+        except ValueError:
+            pass
+    return "unknown"
+
+
+class _MeteredStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, meter: _UsageMeter):
+        self._stream = stream
+        self._meter = meter
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._meter.feed(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        self._meter.finish()
+        self._stream.close()
+
+
+class _AsyncMeteredStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, meter: _UsageMeter):
+        self._stream = stream
+        self._meter = meter
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._meter.feed(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        self._meter.finish()
+        await self._stream.aclose()
+
+
+class UsageTransport(httpx.BaseTransport):
+    """Wraps a transport and records the token usage of every successful model API response."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        if response.status_code != 200:
+            return response
+        meter = _UsageMeter(request, response, started)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_MeteredStream(response.stream, meter),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncUsageTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of UsageTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        if response.status_code != 200:
+            return response
+        meter = _UsageMeter(request, response, started)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_AsyncMeteredStream(response.stream, meter),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
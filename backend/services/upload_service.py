@@ -0,0 +1,301 @@
+"""Chunked upload ingestion helpers shared by the STT and OCR services."""
+import base64
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+import anyio
+from fastapi import HTTPException, Request, Response, UploadFile
+from fastapi.routing import APIRoute
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+from starlette.datastructures import FormData, Headers
+
+from config import Settings, get_settings
+from services.metrics_service import record_bytes, stage
+
+# Read size for streaming uploads to disk (1 MiB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Read size for streaming base64 encoding; a multiple of 3 so chunks encode without padding
+BASE64_CHUNK_SIZE = 3 * 256 * 1024
+
+# Allowance for multipart boundaries, part headers and form fields on top of the file limits
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Largest non-file form field, as in Starlette's own form parser
+MAX_FIELD_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds its configured size limit."""
+
+    def __init__(self, limit_mb: int):
+        super().__init__(f"File exceeds the {limit_mb} MB upload limit")
+        self.limit_mb = limit_mb
+
+
+class StreamedUploadFile(UploadFile):
+    """
+    Uploaded file received straight into a named temporary file.
+
+    Data past max_file_bytes is counted in size but not written, so an
+    oversized file takes bounded disk space and is still reported with its
+    full size. The file is deleted on close unless it was moved away.
+    """
+
+    def __init__(self, filename: Optional[str], headers: Headers):
+        fd, path = tempfile.mkstemp(prefix="upload-")
+        super().__init__(file=os.fdopen(fd, "w+b"), size=0, filename=filename, headers=headers)
+        self.path: Optional[Path] = Path(path)
+        self.written = 0
+
+    def move_to(self, path: Path) -> None:
+        """Rename the file to path; the caller then owns (and deletes) it."""
+        os.replace(self.path, path)
+        self.path = None
+
+    async def close(self) -> None:
+        await super().close()
+        if self.path is not None:
+            await anyio.Path(self.path).unlink(missing_ok=True)
+
+
+class UploadRequest(Request):
+    """
+    Request whose multipart form streams file parts to disk as they arrive.
+
+    Unlike Starlette's parser, which spools each file to an anonymous
+    temporary file, files land in named temporary files that
+    save_upload_to_temp can move instead of copying, and the body is refused
+    with 413 as soon as it passes max_body_bytes.
+    """
+
+    max_file_bytes: int = 0
+    max_body_bytes: int = 0
+
+    async def form(self, **kwargs) -> FormData:
+        if self._form is None:
+            content_type, params = parse_options_header(self.headers.get("Content-Type"))
+            if content_type != b"multipart/form-data":
+                self._form = await super().form(**kwargs)
+            elif b"boundary" not in params:
+                raise HTTPException(status_code=400, detail="Missing boundary in multipart.")
+            else:
+                self._form = await _MultipartReceiver(self, params[b"boundary"]).receive()
+        return self._form
+
+
+class UploadRoute(APIRoute):
+    """
+    Route class for upload endpoints.
+
+    Rejects a request whose Content-Length exceeds the endpoint's limit with
+    413 before reading its body, and streams the body through UploadRequest
+    otherwise.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def upload_handler(request: Request) -> Response:
+            request = UploadRequest(request.scope, request.receive)
+            request.max_file_bytes, request.max_body_bytes = upload_limits(path, get_settings())
+            content_length = request.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > request.max_body_bytes:
+                raise HTTPException(status_code=413, detail=_body_too_large(request.max_body_bytes))
+            return await handler(request)
+
+        return upload_handler
+
+
+def upload_limits(path: str, settings: Settings) -> tuple[int, int]:
+    """
+    Largest file and largest request body an upload endpoint accepts.
+
+    Per-type limits (e.g. images vs PDFs on the document endpoints) are
+    checked exactly by save_upload_to_temp; these bounds only keep oversized
+    bodies off the disk.
+
+    Returns:
+        (max file bytes, max request body bytes)
+    """
+    if path.endswith("/upload/audio"):
+        max_file_mb, max_files = settings.max_audio_size_mb, 1
+    else:
+        max_file_mb = max(settings.max_image_size_mb, settings.max_document_size_mb)
+        max_files = settings.max_batch_files if path.endswith("/batch") else 1
+    max_file_bytes = max_file_mb * 1024 * 1024
+    return max_file_bytes, max_file_bytes * max_files + MULTIPART_OVERHEAD_BYTES
+
+
+def _body_too_large(max_body_bytes: int) -> str:
+    return f"Request body exceeds the {max_body_bytes // (1024 * 1024)} MB upload limit"
+
+
+class _MultipartReceiver:
+    """Parses a multipart body chunk by chunk, writing file parts to StreamedUploadFiles."""
+
+    def __init__(self, request: UploadRequest, boundary: bytes):
+        self.request = request
+        self.parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+            },
+        )
+        self.items: list[tuple[str, str | UploadFile]] = []
+        self.files: list[StreamedUploadFile] = []
+        self._headers: list[tuple[bytes, bytes]] = []
+        self._header_field = b""
+        self._header_value = b""
+        self._name = ""
+        self._file: Optional[StreamedUploadFile] = None
+        self._field = bytearray()
+        # File data parsed from the current chunk, written off the event loop
+        self._pending: list[tuple[StreamedUploadFile, bytes]] = []
+
+    async def receive(self) -> FormData:
+        received = 0
+        try:
+            async for chunk in self.request.stream():
+                received += len(chunk)
+                if received > self.request.max_body_bytes:
+                    raise HTTPException(status_code=413, detail=_body_too_large(self.request.max_body_bytes))
+                self.parser.write(chunk)
+                if self._pending:
+                    pending, self._pending = self._pending, []
+                    await anyio.to_thread.run_sync(_write_parts, pending)
+            self.parser.finalize()
+            for file in self.files:
+                await file.seek(0)
+        except BaseException:
+            for file in self.files:
+                await file.close()
+            raise
+        return FormData(self.items)
+
+    def _on_part_begin(self) -> None:
+        self._headers = []
+        self._file = None
+        self._field = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers.append((self._header_field.lower(), self._header_value))
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        disposition = dict(self._headers).get(b"content-disposition", b"")
+        _, options = parse_options_header(disposition)
+        if b"name" not in options:
+            raise HTTPException(status_code=400, detail='The Content-Disposition header field "name" must be provided.')
+        self._name = _decode(options[b"name"])
+        if b"filename" in options:
+            self._file = StreamedUploadFile(_decode(options[b"filename"]), Headers(raw=self._headers))
+            self.files.append(self._file)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        if self._file is None:
+            if len(self._field) + len(chunk) > MAX_FIELD_BYTES:
+                raise HTTPException(status_code=400, detail="Form field exceeds the 1 MB limit")
+            self._field.extend(chunk)
+            return
+        self._file.size += len(chunk)
+        # Past the limit, only count: save_upload_to_temp rejects the file by its size
+        room = self.request.max_file_bytes - self._file.written
+        if room > 0:
+            self._pending.append((self._file, chunk[:room]))
+            self._file.written += min(room, len(chunk))
+
+    def _on_part_end(self) -> None:
+        if self._file is None:
+            self.items.append((self._name, _decode(bytes(self._field))))
+        else:
+            self.items.append((self._name, self._file))
+
+
+def _write_parts(parts: list[tuple[StreamedUploadFile, bytes]]) -> None:
+    for file, data in parts:
+        file.file.write(data)
+
+
+def _decode(value: bytes) -> str:
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.decode("latin-1")
+
+
+async def save_upload_to_temp(file: UploadFile, suffix: str, max_size_mb: int) -> Path:
+    """
+    Get an uploaded file as a temporary file with the given suffix.
+
+    Files received through UploadRoute are already on disk and are moved
+    into place without copying; others are streamed to disk in fixed-size
+    chunks.
+
+    Args:
+        file: Uploaded file
+        suffix: Suffix for the temporary file
+        max_size_mb: Size limit
+
+    Returns:
+        Path to the temporary file (caller is responsible for deleting it)
+
+    Raises:
+        UploadTooLargeError: If the file exceeds the limit (before any copying)
+    """
+    max_bytes = max_size_mb * 1024 * 1024
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(max_size_mb)
+
+    if isinstance(file, StreamedUploadFile) and file.path is not None:
+        tmp_path = file.path.with_name(file.path.name + suffix)
+        await anyio.to_thread.run_sync(file.move_to, tmp_path)
+        record_bytes("upload_save", file.size)
+        return tmp_path
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp_path = Path(tmp.name)
+
+    try:
+        written = 0
+        with stage("upload_save"):
+            async with await anyio.open_file(tmp_path, "wb") as out:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    written += len(chunk)
+                    if written > max_bytes:
+                        raise UploadTooLargeError(max_size_mb)
+                    await out.write(chunk)
+    except BaseException:
+        await anyio.Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    record_bytes("upload_save", written)
+
+    return tmp_path
+
+
+async def read_base64(path: Path) -> str:
+    """Base64-encode a file chunk by chunk without holding the raw bytes in memory."""
+    encoded_parts = []
+    async with await anyio.open_file(path, "rb") as f:
+        while chunk := await f.read(BASE64_CHUNK_SIZE):
+            encoded_parts.append(base64.b64encode(chunk).decode("ascii"))
+
+    return "".join(encoded_parts)
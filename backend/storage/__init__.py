@@ -0,0 +1,55 @@
+"""Pluggable session storage backends."""
+from functools import lru_cache
+
+from config import get_settings
+
+from .base import (
+    ANALYSIS_FILE,
+    OCR_DOCUMENTS_FILE,
+    OCR_FILE,
+    STT_FILE,
+    STT_SEGMENTS_FILE,
+    InvalidSessionIdError,
+    Segment,
+    SessionInfo,
+    SessionStore,
+    check_session_id,
+)
+from .analytics import AnalysisIndex
+from .filesystem import FilesystemSessionStore
+from .sqlite import SQLiteSessionStore
+
+__all__ = [
+    "ANALYSIS_FILE",
+    "OCR_DOCUMENTS_FILE",
+    "OCR_FILE",
+    "STT_FILE",
+    "STT_SEGMENTS_FILE",
+    "InvalidSessionIdError",
+    "check_session_id",
+    "Segment",
+    "SessionInfo",
+    "SessionStore",
+    "FilesystemSessionStore",
+    "SQLiteSessionStore",
+    "AnalysisIndex",
+    "get_session_store",
+    "get_analysis_index",
+]
+
+
+@lru_cache()
+def get_session_store() -> SessionStore:
+    """Get process-wide session store for the configured backend."""
+    settings = get_settings()
+    if settings.storage_backend == "sqlite":
+        return SQLiteSessionStore(settings.storage_db_path)
+    if settings.storage_backend == "filesystem":
+        return FilesystemSessionStore(settings.storage_base_path)
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+
+@lru_cache()
+def get_analysis_index() -> AnalysisIndex:
+    """Get process-wide index of structured analyses."""
+    return AnalysisIndex(get_settings().analytics_db_path)
@@ -0,0 +1,178 @@
+"""Flat, typed index of structured analyses for aggregate queries without LLM calls."""
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import anyio
+
+from .base import check_session_id
+from .sqlite import transaction
+
+# One row per session plus one row per payment and per risk; every column is a
+# typed scalar, so the tables also export directly to columnar formats.
+# Identifying fields (party names, addresses) are not copied into the index.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contracts (
+    session_id TEXT PRIMARY KEY,
+    analyzed_at REAL NOT NULL,
+    contract_type TEXT,
+    property_type TEXT,
+    area_m2 REAL,
+    deposit_krw INTEGER,
+    monthly_rent_krw INTEGER,
+    sale_price_krw INTEGER,
+    contract_start TEXT,
+    contract_end TEXT,
+    party_count INTEGER NOT NULL,
+    payment_count INTEGER NOT NULL,
+    payment_total_krw INTEGER,
+    risk_high INTEGER NOT NULL,
+    risk_medium INTEGER NOT NULL,
+    risk_low INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_contracts_analyzed ON contracts (analyzed_at);
+CREATE INDEX IF NOT EXISTS idx_contracts_type ON contracts (contract_type);
+
+CREATE TABLE IF NOT EXISTS payments (
+    session_id TEXT NOT NULL REFERENCES contracts (session_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    amount_krw INTEGER,
+    due_date TEXT,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS risks (
+    session_id TEXT NOT NULL REFERENCES contracts (session_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    level TEXT NOT NULL,
+    title TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_risks_level ON risks (level);
+"""
+
+# RiskLevel values mapped to contracts columns
+_RISK_COLUMNS = {"높음": "risk_high", "중간": "risk_medium", "낮음": "risk_low"}
+
+
+class AnalysisIndex:
+    """SQLite tables holding the scalar fields of each session's latest structured analysis."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    async def record(self, session_id: str, analysis: dict, analyzed_at: datetime) -> None:
+        """Replace the indexed rows of a session with a ContractAnalysis dict."""
+        await anyio.to_thread.run_sync(self._record, check_session_id(session_id), analysis, analyzed_at)
+
+    async def summarize(
+        self,
+        analyzed_after: Optional[datetime] = None,
+        analyzed_before: Optional[datetime] = None,
+        top_risks: int = 10,
+    ) -> dict:
+        """Aggregate indexed analyses, optionally limited to an analysis time range."""
+        return await anyio.to_thread.run_sync(self._summarize, analyzed_after, analyzed_before, top_risks)
+
+    def _record(self, session_id: str, analysis: dict, analyzed_at: datetime) -> None:
+        payments = analysis.get("payment_schedule") or []
+        risks = analysis.get("risks") or []
+        amounts = [payment["amount_krw"] for payment in payments if payment.get("amount_krw") is not None]
+        risk_counts = dict.fromkeys(_RISK_COLUMNS.values(), 0)
+        for risk in risks:
+            if risk["level"] in _RISK_COLUMNS:
+                risk_counts[_RISK_COLUMNS[risk["level"]]] += 1
+        prop = analysis.get("property") or {}
+
+        with transaction(self._conn()) as conn:
+            conn.execute("DELETE FROM contracts WHERE session_id = ?", (session_id,))
+            conn.execute(
+                "INSERT INTO contracts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session_id,
+                    analyzed_at.timestamp(),
+                    analysis.get("contract_type"),
+                    prop.get("property_type"),
+                    prop.get("area_m2"),
+                    analysis.get("deposit_krw"),
+                    analysis.get("monthly_rent_krw"),
+                    analysis.get("sale_price_krw"),
+                    analysis.get("contract_start"),
+                    analysis.get("contract_end"),
+                    len(analysis.get("parties") or []),
+                    len(payments),
+                    sum(amounts) if amounts else None,
+                    risk_counts["risk_high"],
+                    risk_counts["risk_medium"],
+                    risk_counts["risk_low"],
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO payments VALUES (?, ?, ?, ?, ?)",
+                [
+                    (session_id, seq, payment["label"], payment.get("amount_krw"), payment.get("due_date"))
+                    for seq, payment in enumerate(payments)
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO risks VALUES (?, ?, ?, ?)",
+                [(session_id, seq, risk["level"], risk["title"]) for seq, risk in enumerate(risks)],
+            )
+
+    def _summarize(
+        self, analyzed_after: Optional[datetime], analyzed_before: Optional[datetime], top_risks: int
+    ) -> dict:
+        where, params = [], []
+        if analyzed_after is not None:
+            where.append("analyzed_at >= ?")
+            params.append(analyzed_after.timestamp())
+        if analyzed_before is not None:
+            where.append("analyzed_at < ?")
+            params.append(analyzed_before.timestamp())
+        condition = f"WHERE {' AND '.join(where)}" if where else ""
+
+        conn = self._conn()
+        totals = conn.execute(
+            "SELECT COUNT(*) AS contracts, COALESCE(SUM(risk_high), 0) AS high, "
+            "COALESCE(SUM(risk_medium), 0) AS medium, COALESCE(SUM(risk_low), 0) AS low, "
+            f"COALESCE(SUM(risk_high > 0), 0) AS with_high FROM contracts {condition}",
+            params,
+        ).fetchone()
+        by_type = conn.execute(
+            "SELECT contract_type, COUNT(*) AS contracts, AVG(deposit_krw) AS average_deposit_krw, "
+            "AVG(monthly_rent_krw) AS average_monthly_rent_krw, AVG(sale_price_krw) AS average_sale_price_krw, "
+            f"AVG(risk_high + risk_medium + risk_low) AS average_risks FROM contracts {condition} "
+            "GROUP BY contract_type ORDER BY contracts DESC",
+            params,
+        ).fetchall()
+        risks = conn.execute(
+            "SELECT title, level, COUNT(*) AS occurrences FROM risks "
+            f"WHERE session_id IN (SELECT session_id FROM contracts {condition}) "
+            "GROUP BY title, level ORDER BY occurrences DESC, title LIMIT ?",
+            [*params, top_risks],
+        ).fetchall()
+
+        return {
+            "contracts": totals["contracts"],
+            "contracts_with_high_risk": totals["with_high"],
+            "risk_levels": {"높음": totals["high"], "중간": totals["medium"], "낮음": totals["low"]},
+            "by_contract_type": [dict(row) for row in by_type],
+            "top_risks": [dict(row) for row in risks],
+        }
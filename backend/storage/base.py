@@ -0,0 +1,217 @@
+"""Session storage interface shared by all backends."""
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import anyio
+
+# Well-known session file names
+STT_FILE = "stt.txt"
+STT_SEGMENTS_FILE = "stt_segments.jsonl"
+OCR_FILE = "ocr.txt"
+OCR_DOCUMENTS_FILE = "ocr_documents.jsonl"
+ANALYSIS_FILE = "analysis.json"
+
+# Suffix of the compressed part of a compacted session file
+COMPRESSED_SUFFIX = ".gz"
+
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+class InvalidSessionIdError(ValueError):
+    """Raised when a session id is not safe to use as a storage key."""
+
+    def __init__(self, session_id: str):
+        super().__init__(f"Invalid session id: {session_id!r}")
+        self.session_id = session_id
+
+
+def check_session_id(session_id: str) -> str:
+    """Return session_id if it is a valid storage key, otherwise raise InvalidSessionIdError."""
+    if not _SESSION_ID_PATTERN.match(session_id):
+        raise InvalidSessionIdError(session_id)
+    return session_id
+
+
+@dataclass
+class SessionInfo:
+    """Indexed metadata of one session."""
+
+    session_id: str
+    created_at: datetime
+    updated_at: datetime
+    analyzed_at: Optional[datetime] = None
+    # Stored bytes, filled in by scan_sessions only
+    size_bytes: Optional[int] = None
+
+
+@dataclass
+class Segment:
+    """One uploaded segment of a session with its extraction record."""
+
+    segment_id: str
+    kind: str
+    record: dict
+
+
+class SessionStore(ABC):
+    """
+    Session storage backend.
+
+    Public methods are async and run the backend's blocking implementation
+    in a worker thread. Backends implement the underscore-prefixed methods.
+    """
+
+    async def session_exists(self, session_id: str) -> bool:
+        """Check whether a session exists (invalid ids never exist)."""
+        try:
+            check_session_id(session_id)
+        except InvalidSessionIdError:
+            return False
+        return await anyio.to_thread.run_sync(self._session_exists, session_id)
+
+    async def append_text(self, session_id: str, name: str, text: str) -> None:
+        """Atomically append text to a session file, creating the session if needed."""
+        await anyio.to_thread.run_sync(self._append_text, session_id, name, text)
+
+    async def write_text(self, session_id: str, name: str, text: str) -> None:
+        """Atomically replace a session file, creating the session if needed."""
+        await anyio.to_thread.run_sync(self._write_text, session_id, name, text)
+
+    async def read_text(self, session_id: str, name: str) -> Optional[str]:
+        """Read a session file, or None if it doesn't exist."""
+        return (await self.read_texts(session_id, [name]))[name]
+
+    async def read_texts(self, session_id: str, names: list[str]) -> dict[str, Optional[str]]:
+        """Read several session files in one batch (missing files map to None)."""
+        return await anyio.to_thread.run_sync(self._read_texts, session_id, names)
+
+    async def mark_analyzed(self, session_id: str) -> None:
+        """Record that the session was just analyzed."""
+        await anyio.to_thread.run_sync(self._mark_analyzed, session_id)
+
+    async def get_sessions(self, session_ids: list[str]) -> list[SessionInfo]:
+        """Get metadata of several sessions in one batch, skipping unknown ids."""
+        return await anyio.to_thread.run_sync(self._get_sessions, session_ids)
+
+    async def list_sessions(
+        self,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[SessionInfo]:
+        """
+        List sessions by creation time, newest first.
+
+        Bounds may be naive (local time, like SessionInfo times) or timezone-aware.
+        """
+        created_after, created_before = _local_naive(created_after), _local_naive(created_before)
+        return await anyio.to_thread.run_sync(self._list_sessions, created_after, created_before, limit, offset)
+
+    async def scan_sessions(self, after: Optional[str] = None, limit: int = 500) -> list[SessionInfo]:
+        """
+        Get the next batch of sessions in id order, with their stored size.
+
+        Args:
+            after: Last session id of the previous batch (None to start over)
+            limit: Maximum batch size
+
+        Returns:
+            Sessions with ids greater than after; an empty list ends the scan
+        """
+        return await anyio.to_thread.run_sync(self._scan_sessions, after, limit)
+
+    async def compact_text(self, session_id: str, name: str, min_bytes: int) -> int:
+        """
+        Compress a session file once its uncompressed part reaches min_bytes.
+
+        Later appends go to a new uncompressed part; reads return both parts
+        joined, so compaction is invisible to callers.
+
+        Returns:
+            Bytes reclaimed (0 if the file was left as is)
+        """
+        return await anyio.to_thread.run_sync(self._compact_text, session_id, name, min_bytes)
+
+    async def vacuum(self) -> None:
+        """Return space freed by deletions to the operating system, if the backend needs it."""
+        await anyio.to_thread.run_sync(self._vacuum)
+
+    async def delete_session(self, session_id: str) -> None:
+        """Delete a session and all of its data."""
+        await anyio.to_thread.run_sync(self._delete_session, session_id)
+
+    async def add_segment(self, session_id: str, kind: str, record: dict, replace: bool = False) -> str:
+        """
+        Add a segment record, optionally replacing existing segments of the same kind.
+
+        Returns:
+            New segment id (segment ids sort in upload order)
+        """
+        return await anyio.to_thread.run_sync(self._add_segment, session_id, kind, record, replace)
+
+    async def update_segment(self, session_id: str, segment_id: str, record: dict) -> bool:
+        """Update a segment record; returns False if it no longer exists."""
+        return await anyio.to_thread.run_sync(self._update_segment, session_id, segment_id, record)
+
+    async def list_segments(self, session_id: str) -> list[Segment]:
+        """List segments of a session in upload order."""
+        return await anyio.to_thread.run_sync(self._list_segments, session_id)
+
+    @abstractmethod
+    def _session_exists(self, session_id: str) -> bool: ...
+
+    @abstractmethod
+    def _append_text(self, session_id: str, name: str, text: str) -> None: ...
+
+    @abstractmethod
+    def _write_text(self, session_id: str, name: str, text: str) -> None: ...
+
+    @abstractmethod
+    def _read_texts(self, session_id: str, names: list[str]) -> dict[str, Optional[str]]: ...
+
+    @abstractmethod
+    def _mark_analyzed(self, session_id: str) -> None: ...
+
+    @abstractmethod
+    def _get_sessions(self, session_ids: list[str]) -> list[SessionInfo]: ...
+
+    @abstractmethod
+    def _list_sessions(
+        self,
+        created_after: Optional[datetime],
+        created_before: Optional[datetime],
+        limit: int,
+        offset: int,
+    ) -> list[SessionInfo]: ...
+
+    @abstractmethod
+    def _scan_sessions(self, after: Optional[str], limit: int) -> list[SessionInfo]: ...
+
+    @abstractmethod
+    def _compact_text(self, session_id: str, name: str, min_bytes: int) -> int: ...
+
+    def _vacuum(self) -> None:
+        pass
+
+    @abstractmethod
+    def _delete_session(self, session_id: str) -> None: ...
+
+    @abstractmethod
+    def _add_segment(self, session_id: str, kind: str, record: dict, replace: bool) -> str: ...
+
+    @abstractmethod
+    def _update_segment(self, session_id: str, segment_id: str, record: dict) -> bool: ...
+
+    @abstractmethod
+    def _list_segments(self, session_id: str) -> list[Segment]: ...
+
+
+def _local_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert a timezone-aware time to naive local time, as stored session times are."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
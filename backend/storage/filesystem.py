@@ -0,0 +1,287 @@
+"""Filesystem session store: one directory per session under the base path."""
+import bisect
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from filelock import FileLock
+
+from .base import COMPRESSED_SUFFIX, InvalidSessionIdError, Segment, SessionInfo, SessionStore, check_session_id
+
+META_FILE = "meta.json"
+SEGMENTS_DIR = "segments"
+# Lock files shared by all processes using the base path (not a valid session id)
+LOCKS_DIR = ".locks"
+
+# Striped locks serialize read-modify-write of a session, within the process
+# (thread locks) and across worker processes (file locks of the same stripe)
+_LOCK_STRIPES = 64
+
+
+class FilesystemSessionStore(SessionStore):
+    """Stores each session as loose files; listing scans the directory tree."""
+
+    def __init__(self, base_path: str):
+        self.base_path = Path(base_path)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self._locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        # Sorted session ids of the current scan_sessions pass
+        self._scan_names: Optional[list[str]] = None
+        locks_dir = self.base_path / LOCKS_DIR
+        locks_dir.mkdir(exist_ok=True)
+        self._file_locks = [
+            FileLock(locks_dir / f"{stripe}.lock", thread_local=False) for stripe in range(_LOCK_STRIPES)
+        ]
+
+    def _session_dir(self, session_id: str) -> Path:
+        return self.base_path / check_session_id(session_id)
+
+    @contextmanager
+    def _lock(self, session_id: str) -> Iterator[None]:
+        stripe = zlib.crc32(session_id.encode("utf-8")) % _LOCK_STRIPES
+        # The thread lock is taken first, so each file lock has one holder per process
+        with self._locks[stripe], self._file_locks[stripe]:
+            yield
+
+    def _session_exists(self, session_id: str) -> bool:
+        return self._session_dir(session_id).is_dir()
+
+    def _append_text(self, session_id: str, name: str, text: str) -> None:
+        session_dir = self._session_dir(session_id)
+        with self._lock(session_id):
+            self._touch(session_dir)
+            with open(session_dir / name, "a", encoding="utf-8") as f:
+                f.write(text)
+
+    def _write_text(self, session_id: str, name: str, text: str) -> None:
+        session_dir = self._session_dir(session_id)
+        with self._lock(session_id):
+            self._touch(session_dir)
+            _atomic_write(session_dir / name, text)
+            (session_dir / (name + COMPRESSED_SUFFIX)).unlink(missing_ok=True)
+
+    def _read_texts(self, session_id: str, names: list[str]) -> dict[str, Optional[str]]:
+        session_dir = self._session_dir(session_id)
+        # Locked so a concurrent compaction is never seen half done
+        with self._lock(session_id):
+            return {name: _read_file(session_dir / name) for name in names}
+
+    def _mark_analyzed(self, session_id: str) -> None:
+        session_dir = self._session_dir(session_id)
+        with self._lock(session_id):
+            self._touch(session_dir, analyzed=True)
+
+    def _get_sessions(self, session_ids: list[str]) -> list[SessionInfo]:
+        sessions = []
+        for session_id in session_ids:
+            session_dir = self._session_dir(session_id)
+            if session_dir.is_dir():
+                sessions.append(_read_info(session_dir))
+        return sessions
+
+    def _list_sessions(
+        self,
+        created_after: Optional[datetime],
+        created_before: Optional[datetime],
+        limit: int,
+        offset: int,
+    ) -> list[SessionInfo]:
+        sessions = []
+        with os.scandir(self.base_path) as entries:
+            for entry in entries:
+                if not entry.is_dir() or not _is_session_id(entry.name):
+                    continue
+                info = _read_info(Path(entry.path))
+                if created_after is not None and info.created_at < created_after:
+                    continue
+                if created_before is not None and info.created_at >= created_before:
+                    continue
+                sessions.append(info)
+
+        sessions.sort(key=lambda info: info.created_at, reverse=True)
+        return sessions[offset : offset + limit]
+
+    def _scan_sessions(self, after: Optional[str], limit: int) -> list[SessionInfo]:
+        # The directory is listed once per pass, and its batches are pages of that listing;
+        # sessions created during a pass are left to the next one
+        if after is None or self._scan_names is None:
+            self._scan_names = self._list_session_names()
+        names = self._scan_names
+        start = 0 if after is None else bisect.bisect_right(names, after)
+
+        sessions = []
+        for name in names[start : start + limit]:
+            session_dir = self.base_path / name
+            try:
+                info = _read_info(session_dir)
+                info.size_bytes = _dir_size(session_dir)
+            except FileNotFoundError:
+                # Deleted since the directory was listed
+                continue
+            sessions.append(info)
+        return sessions
+
+    def _list_session_names(self) -> list[str]:
+        with os.scandir(self.base_path) as entries:
+            return sorted(entry.name for entry in entries if entry.is_dir() and _is_session_id(entry.name))
+
+    def _compact_text(self, session_id: str, name: str, min_bytes: int) -> int:
+        path = self._session_dir(session_id) / name
+        compressed_path = path.with_name(name + COMPRESSED_SUFFIX)
+
+        with self._lock(session_id):
+            try:
+                plain_size = path.stat().st_size
+            except FileNotFoundError:
+                return 0
+            if plain_size < min_bytes:
+                return 0
+
+            old_size = plain_size
+            data = b""
+            if compressed_path.exists():
+                old_size += compressed_path.stat().st_size
+                data = gzip.decompress(compressed_path.read_bytes())
+            data += path.read_bytes()
+
+            compressed = gzip.compress(data)
+            _atomic_write_bytes(compressed_path, compressed)
+            path.unlink()
+
+        return max(old_size - len(compressed), 0)
+
+    def _delete_session(self, session_id: str) -> None:
+        with self._lock(session_id):
+            shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def _add_segment(self, session_id: str, kind: str, record: dict, replace: bool) -> str:
+        session_dir = self._session_dir(session_id)
+        segments_dir = session_dir / SEGMENTS_DIR
+        segment_id = f"{time.time_ns():020d}-{kind}"
+
+        with self._lock(session_id):
+            self._touch(session_dir)
+            segments_dir.mkdir(exist_ok=True)
+            if replace:
+                for old_path in segments_dir.glob(f"*-{kind}.json"):
+                    old_path.unlink(missing_ok=True)
+            _atomic_write(segments_dir / f"{segment_id}.json", json.dumps(record, ensure_ascii=False))
+
+        return segment_id
+
+    def _update_segment(self, session_id: str, segment_id: str, record: dict) -> bool:
+        path = self._session_dir(session_id) / SEGMENTS_DIR / f"{segment_id}.json"
+        with self._lock(session_id):
+            if not path.exists():
+                return False
+            _atomic_write(path, json.dumps(record, ensure_ascii=False))
+        return True
+
+    def _list_segments(self, session_id: str) -> list[Segment]:
+        segments_dir = self._session_dir(session_id) / SEGMENTS_DIR
+        if not segments_dir.is_dir():
+            return []
+
+        segments = []
+        for path in sorted(segments_dir.glob("*.json")):
+            segment_id = path.stem
+            record = json.loads(path.read_text(encoding="utf-8"))
+            segments.append(Segment(segment_id=segment_id, kind=segment_id.split("-", 1)[1], record=record))
+        return segments
+
+    def _touch(self, session_dir: Path, analyzed: bool = False) -> None:
+        """Create the session if needed and update its metadata (caller holds the lock)."""
+        session_dir.mkdir(exist_ok=True)
+        meta_path = session_dir / META_FILE
+        now = time.time()
+
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            meta = {"created_at": now, "analyzed_at": None}
+
+        meta["updated_at"] = now
+        if analyzed:
+            meta["analyzed_at"] = now
+        _atomic_write(meta_path, json.dumps(meta))
+
+
+def _is_session_id(name: str) -> bool:
+    try:
+        check_session_id(name)
+    except InvalidSessionIdError:
+        return False
+    return True
+
+
+def _read_file(path: Path) -> Optional[str]:
+    """Read a session file, joining its compressed and uncompressed parts."""
+    compressed_path = path.with_name(path.name + COMPRESSED_SUFFIX)
+    parts = []
+    try:
+        parts.append(gzip.decompress(compressed_path.read_bytes()).decode("utf-8"))
+    except FileNotFoundError:
+        pass
+    try:
+        parts.append(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        pass
+    return "".join(parts) if parts else None
+
+
+def _dir_size(path: Path) -> int:
+    """Total size of the files under path."""
+    total = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    total += _dir_size(Path(entry.path))
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+            except FileNotFoundError:
+                # Temp file renamed or removed while scanning
+                continue
+    return total
+
+
+def _read_info(session_dir: Path) -> SessionInfo:
+    """Read session metadata, falling back to directory times for sessions without meta.json."""
+    try:
+        meta = json.loads((session_dir / META_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        stat = session_dir.stat()
+        meta = {"created_at": stat.st_ctime, "updated_at": stat.st_mtime, "analyzed_at": None}
+
+    return SessionInfo(
+        session_id=session_dir.name,
+        created_at=datetime.fromtimestamp(meta["created_at"]),
+        updated_at=datetime.fromtimestamp(meta["updated_at"]),
+        analyzed_at=datetime.fromtimestamp(meta["analyzed_at"]) if meta.get("analyzed_at") else None,
+    )
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """Write text to a temp file in the same directory and rename it into place."""
+    _atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write bytes to a temp file in the same directory and rename it into place."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
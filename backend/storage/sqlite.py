@@ -0,0 +1,277 @@
+"""Embedded SQLite session store with indexed metadata (WAL mode)."""
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import ContextManager, Iterator, Optional
+
+from .base import COMPRESSED_SUFFIX, Segment, SessionInfo, SessionStore, check_session_id
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    analyzed_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions (created_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_analyzed ON sessions (analyzed_at);
+
+CREATE TABLE IF NOT EXISTS session_files (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (session_id, name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS segments (
+    segment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_segments_session ON segments (session_id, segment_id);
+"""
+
+# Keep batched IN (...) queries under SQLite's host parameter limit
+_BATCH_SIZE = 500
+
+# PRAGMA auto_vacuum value of INCREMENTAL
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+class SQLiteSessionStore(SessionStore):
+    """Stores sessions, files and segments in one SQLite database with per-thread connections."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        _create_database(db_path)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self) -> ContextManager[sqlite3.Connection]:
+        return transaction(self._conn())
+
+    def _session_exists(self, session_id: str) -> bool:
+        row = self._conn().execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None
+
+    def _append_text(self, session_id: str, name: str, text: str) -> None:
+        with self._transaction() as conn:
+            _touch(conn, session_id)
+            conn.execute(
+                "INSERT INTO session_files (session_id, name, content) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id, name) DO UPDATE SET content = content || excluded.content",
+                (session_id, name, text),
+            )
+
+    def _write_text(self, session_id: str, name: str, text: str) -> None:
+        with self._transaction() as conn:
+            _touch(conn, session_id)
+            conn.execute(
+                "INSERT INTO session_files (session_id, name, content) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id, name) DO UPDATE SET content = excluded.content",
+                (session_id, name, text),
+            )
+            conn.execute(
+                "DELETE FROM session_files WHERE session_id = ? AND name = ?",
+                (session_id, name + COMPRESSED_SUFFIX),
+            )
+
+    def _read_texts(self, session_id: str, names: list[str]) -> dict[str, Optional[str]]:
+        stored_names = names + [name + COMPRESSED_SUFFIX for name in names]
+        placeholders = ", ".join("?" for _ in stored_names)
+        rows = self._conn().execute(
+            f"SELECT name, content FROM session_files WHERE session_id = ? AND name IN ({placeholders})",
+            (session_id, *stored_names),
+        )
+        contents = {row["name"]: row["content"] for row in rows}
+
+        texts: dict[str, Optional[str]] = {}
+        for name in names:
+            compressed = contents.get(name + COMPRESSED_SUFFIX)
+            plain = contents.get(name)
+            if compressed is None and plain is None:
+                texts[name] = None
+            else:
+                texts[name] = (gzip.decompress(compressed).decode("utf-8") if compressed else "") + (plain or "")
+        return texts
+
+    def _mark_analyzed(self, session_id: str) -> None:
+        with self._transaction() as conn:
+            _touch(conn, session_id, analyzed=True)
+
+    def _get_sessions(self, session_ids: list[str]) -> list[SessionInfo]:
+        sessions = []
+        for start in range(0, len(session_ids), _BATCH_SIZE):
+            batch = session_ids[start : start + _BATCH_SIZE]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self._conn().execute(f"SELECT * FROM sessions WHERE session_id IN ({placeholders})", batch)
+            sessions.extend(_to_info(row) for row in rows)
+        return sessions
+
+    def _list_sessions(
+        self,
+        created_after: Optional[datetime],
+        created_before: Optional[datetime],
+        limit: int,
+        offset: int,
+    ) -> list[SessionInfo]:
+        rows = self._conn().execute(
+            "SELECT * FROM sessions WHERE created_at >= ? AND created_at < ? "
+            "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (
+                created_after.timestamp() if created_after else float("-inf"),
+                created_before.timestamp() if created_before else float("inf"),
+                limit,
+                offset,
+            ),
+        )
+        return [_to_info(row) for row in rows]
+
+    def _scan_sessions(self, after: Optional[str], limit: int) -> list[SessionInfo]:
+        rows = self._conn().execute(
+            "SELECT s.*, "
+            "(SELECT COALESCE(SUM(length(CAST(content AS BLOB))), 0) FROM session_files f "
+            "WHERE f.session_id = s.session_id) + "
+            "(SELECT COALESCE(SUM(length(CAST(record AS BLOB))), 0) FROM segments g "
+            "WHERE g.session_id = s.session_id) AS size_bytes "
+            "FROM sessions s WHERE s.session_id > ? ORDER BY s.session_id LIMIT ?",
+            (after or "", limit),
+        )
+        sessions = []
+        for row in rows:
+            info = _to_info(row)
+            info.size_bytes = row["size_bytes"]
+            sessions.append(info)
+        return sessions
+
+    def _compact_text(self, session_id: str, name: str, min_bytes: int) -> int:
+        compressed_name = name + COMPRESSED_SUFFIX
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT name, content FROM session_files WHERE session_id = ? AND name IN (?, ?)",
+                (session_id, name, compressed_name),
+            )
+            contents = {row["name"]: row["content"] for row in rows}
+            plain = contents.get(name)
+            if plain is None or len(plain.encode("utf-8")) < min_bytes:
+                return 0
+
+            old_compressed = contents.get(compressed_name)
+            data = gzip.decompress(old_compressed) if old_compressed else b""
+            compressed = gzip.compress(data + plain.encode("utf-8"))
+
+            conn.execute(
+                "INSERT INTO session_files (session_id, name, content) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id, name) DO UPDATE SET content = excluded.content",
+                (session_id, compressed_name, compressed),
+            )
+            conn.execute("DELETE FROM session_files WHERE session_id = ? AND name = ?", (session_id, name))
+
+        old_size = len(plain.encode("utf-8")) + len(old_compressed or b"")
+        return max(old_size - len(compressed), 0)
+
+    def _vacuum(self) -> None:
+        # execute() stops after the first freed page; executescript() runs the pragma to completion
+        self._conn().executescript("PRAGMA incremental_vacuum;")
+
+    def _delete_session(self, session_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _add_segment(self, session_id: str, kind: str, record: dict, replace: bool) -> str:
+        with self._transaction() as conn:
+            _touch(conn, session_id)
+            if replace:
+                conn.execute("DELETE FROM segments WHERE session_id = ? AND kind = ?", (session_id, kind))
+            cursor = conn.execute(
+                "INSERT INTO segments (session_id, kind, record) VALUES (?, ?, ?)",
+                (session_id, kind, json.dumps(record, ensure_ascii=False)),
+            )
+        return str(cursor.lastrowid)
+
+    def _update_segment(self, session_id: str, segment_id: str, record: dict) -> bool:
+        cursor = self._conn().execute(
+            "UPDATE segments SET record = ? WHERE session_id = ? AND segment_id = ?",
+            (json.dumps(record, ensure_ascii=False), session_id, int(segment_id)),
+        )
+        return cursor.rowcount > 0
+
+    def _list_segments(self, session_id: str) -> list[Segment]:
+        rows = self._conn().execute(
+            "SELECT segment_id, kind, record FROM segments WHERE session_id = ? ORDER BY segment_id",
+            (session_id,),
+        )
+        return [
+            Segment(segment_id=str(row["segment_id"]), kind=row["kind"], record=json.loads(row["record"]))
+            for row in rows
+        ]
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """BEGIN IMMEDIATE ... COMMIT on an autocommit connection, rolling back if the block raises."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _create_database(db_path: str) -> None:
+    """
+    Create the schema with auto_vacuum=INCREMENTAL, so vacuum() can shrink the file after deletions.
+
+    The vacuum mode only takes effect on an empty database, so it is set
+    before anything, including the switch to WAL, writes to the file. A
+    database created without it is rebuilt once with VACUUM.
+    """
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.executescript(_SCHEMA)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != _AUTO_VACUUM_INCREMENTAL:
+            conn.execute("VACUUM")
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+
+def _touch(conn: sqlite3.Connection, session_id: str, analyzed: bool = False) -> None:
+    """Create the session row if needed and bump its timestamps."""
+    check_session_id(session_id)
+    now = time.time()
+    conn.execute(
+        "INSERT INTO sessions (session_id, created_at, updated_at, analyzed_at) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (session_id) DO UPDATE SET updated_at = excluded.updated_at, "
+        "analyzed_at = COALESCE(excluded.analyzed_at, sessions.analyzed_at)",
+        (session_id, now, now, now if analyzed else None),
+    )
+
+
+def _to_info(row: sqlite3.Row) -> SessionInfo:
+    return SessionInfo(
+        session_id=row["session_id"],
+        created_at=datetime.fromtimestamp(row["created_at"]),
+        updated_at=datetime.fromtimestamp(row["updated_at"]),
+        analyzed_at=datetime.fromtimestamp(row["analyzed_at"]) if row["analyzed_at"] is not None else None,
+    )
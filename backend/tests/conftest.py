@@ -0,0 +1,28 @@
+"""
+Test settings: fake model provider and all storage under a temporary directory.
+
+Set before the app modules are imported, since settings and stores are cached
+on first use.
+"""
+import os
+import tempfile
+
+_storage = tempfile.mkdtemp(prefix="contract-tests-")
+
+os.environ.update(
+    OPENAI_API_KEY="test",
+    MODEL_PROVIDER="fake",
+    FAKE_PROVIDER_PROFILE="instant",
+    CREWAI_TRACING_ENABLED="false",
+    CREWAI_DISABLE_TELEMETRY="true",
+    OTEL_SDK_DISABLED="true",
+    LIVE_STT_BACKEND="fake",
+    INCREMENTAL_ANALYSIS_ENABLED="false",
+    JANITOR_ENABLED="false",
+    STORAGE_BASE_PATH=os.path.join(_storage, "sessions"),
+    STORAGE_DB_PATH=os.path.join(_storage, "sessions.db"),
+    JOB_DB_PATH=os.path.join(_storage, "jobs.db"),
+    ANALYTICS_DB_PATH=os.path.join(_storage, "analytics.db"),
+    CACHE_DIR=os.path.join(_storage, "cache"),
+    LOCK_DIR=os.path.join(_storage, "locks"),
+)
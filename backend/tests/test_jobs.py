@@ -0,0 +1,148 @@
+"""Analysis job queue shared by several worker processes."""
+import asyncio
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+import agents
+from schemas import AnalysisMode
+from services.job_service import JOB_COMPLETED, JOB_QUEUED, JOB_RUNNING, JobQueue, load_job_result
+from storage import STT_FILE, get_session_store
+
+
+@pytest.fixture
+def session_id(monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setattr(agents, "analyze_combined_text", lambda text, *args, **kwargs: "summary", raising=False)
+    session_id = f"jobs-{uuid.uuid4().hex}"
+    asyncio.run(get_session_store().append_text(session_id, STT_FILE, "\nrecording"))
+    return session_id
+
+
+def test_streamed_analysis_waits_for_a_running_job_of_the_session(tmp_path: Path, session_id: str):
+    db_path = str(tmp_path / "jobs.db")
+    other_worker = JobQueue(db_path, concurrency=1)
+    queue = JobQueue(db_path, concurrency=1, poll_seconds=0.05)
+
+    async def scenario() -> None:
+        running = await asyncio.to_thread(other_worker._insert_running_job, session_id, AnalysisMode.SUMMARY.value)
+        events = []
+
+        async def stream() -> None:
+            async for event, _ in queue.stream(session_id):
+                events.append(event)
+
+        streaming = asyncio.create_task(stream())
+        await asyncio.sleep(0.3)
+        assert events == []
+        # Nor can the stream's job be claimed by another worker meanwhile
+        assert await asyncio.to_thread(queue._insert_running_job, session_id, AnalysisMode.SUMMARY.value) is None
+
+        await asyncio.to_thread(other_worker._update_job, running["job_id"], {"status": JOB_COMPLETED})
+        await asyncio.wait_for(streaming, 10)
+        assert events[-1] == "result"
+
+    asyncio.run(scenario())
+    with queue._connect() as conn:
+        rows = [dict(row) for row in conn.execute("SELECT * FROM jobs WHERE worker_id = ?", (queue.worker_id,))]
+    assert [row["status"] for row in rows] == [JOB_COMPLETED]
+    assert load_job_result(rows[0])["summary"] == "summary"
+
+
+def test_streamed_analysis_keeps_its_job_running_after_a_disconnect(
+    tmp_path: Path, session_id: str, monkeypatch: pytest.MonkeyPatch
+):
+    queue = JobQueue(str(tmp_path / "jobs.db"), concurrency=1, poll_seconds=0.05)
+    release = threading.Event()
+    running = 0
+    most_running = 0
+
+    def analyze(text: str, *args, on_event=None, **kwargs) -> str:
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        if on_event:
+            on_event("task_started", {"task": "summary"})
+        release.wait(10)
+        running -= 1
+        return "summary"
+
+    monkeypatch.setattr(agents, "analyze_combined_text", analyze, raising=False)
+
+    async def scenario() -> None:
+        # Text of its own, so the analysis is not a hit in the result cache
+        await get_session_store().append_text(session_id, STT_FILE, f"\n{uuid.uuid4().hex}")
+        stream = queue.stream(session_id)
+        await stream.__anext__()
+        # The client disconnects while the analysis is running
+        await stream.aclose()
+
+        queued = await queue.enqueue(session_id, AnalysisMode.SEQUENTIAL)
+        await queue.start()
+        try:
+            await asyncio.sleep(0.3)
+            # The queued job of the session waits for the streamed one
+            assert (await queue.get(queued["job_id"]))["status"] == JOB_QUEUED
+            release.set()
+            for _ in range(200):
+                if (await queue.get(queued["job_id"]))["status"] == JOB_COMPLETED:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+    assert most_running == 1
+    with queue._connect() as conn:
+        statuses = [row["status"] for row in conn.execute("SELECT status FROM jobs ORDER BY created_at")]
+    assert statuses == [JOB_COMPLETED, JOB_COMPLETED]
+
+
+def test_workers_outlive_job_database_errors(tmp_path: Path, session_id: str, monkeypatch: pytest.MonkeyPatch):
+    queue = JobQueue(str(tmp_path / "jobs.db"), concurrency=1, poll_seconds=0.05)
+    claim_job = queue._claim_job
+    failures = []
+
+    def locked_once() -> Optional[dict]:
+        if not failures:
+            failures.append(True)
+            raise sqlite3.OperationalError("database is locked")
+        return claim_job()
+
+    monkeypatch.setattr(queue, "_claim_job", locked_once)
+
+    async def scenario() -> dict:
+        job = await queue.enqueue(session_id)
+        await queue.start()
+        try:
+            for _ in range(200):
+                if (record := await queue.get(job["job_id"]))["status"] == JOB_COMPLETED:
+                    return record
+                await asyncio.sleep(0.05)
+            return record
+        finally:
+            await queue.stop()
+
+    assert asyncio.run(scenario())["status"] == JOB_COMPLETED
+    assert failures
+
+
+def test_updates_from_a_worker_that_lost_its_job_are_ignored(tmp_path: Path, session_id: str):
+    db_path = str(tmp_path / "jobs.db")
+    stalled = JobQueue(db_path, concurrency=1, lease_seconds=0.0)
+    other_worker = JobQueue(db_path, concurrency=1)
+
+    job = asyncio.run(stalled.enqueue(session_id))
+    assert stalled._claim_job()["job_id"] == job["job_id"]
+    # The stalled worker's lease expires, and another worker takes over the job
+    stalled._recover_jobs()
+    assert stalled._select_job(job["job_id"])["status"] == JOB_QUEUED
+    assert other_worker._claim_job()["job_id"] == job["job_id"]
+
+    assert not stalled._update_job(job["job_id"], {"status": JOB_COMPLETED, "progress": 1.0})
+    assert stalled._select_job(job["job_id"])["status"] == JOB_RUNNING
+    assert other_worker._update_job(job["job_id"], {"status": JOB_COMPLETED, "progress": 1.0})
+    assert stalled._select_job(job["job_id"])["status"] == JOB_COMPLETED
@@ -0,0 +1,93 @@
+"""Live transcription keeps going and persists partial transcripts when windows fail."""
+import asyncio
+
+import numpy as np
+import pytest
+
+from config import get_settings
+from services.audio_service import TARGET_SAMPLE_RATE
+from services.live_stt_service import LiveTranscriptionSession, TranscriptionBackend
+from storage import STT_FILE, get_session_store
+
+
+class FlakyBackend(TranscriptionBackend):
+    """Transcribes each window as "windowN" but raises on the given calls (1-based)."""
+
+    def __init__(self, failing_calls: set[int]):
+        self.failing_calls = failing_calls
+        self.calls = 0
+
+    async def transcribe(self, samples: np.ndarray) -> str:
+        self.calls += 1
+        if self.calls in self.failing_calls:
+            raise RuntimeError("provider unavailable")
+        return f"window{self.calls}"
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(TARGET_SAMPLE_RATE * seconds)) / TARGET_SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 200 * t) * 32767).astype("<i2")
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(TARGET_SAMPLE_RATE * seconds), dtype="<i2")
+
+
+async def record(session_id: str, backend: TranscriptionBackend, audio: np.ndarray) -> tuple[str, list[dict]]:
+    messages = []
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    settings = get_settings().model_copy(update={"live_step_seconds": 1.0, "live_commit_silence_ms": 500})
+    session = LiveTranscriptionSession(session_id, backend, settings, send)
+    session.start()
+    step = TARGET_SAMPLE_RATE // 2
+    for start in range(0, len(audio), step):
+        session.feed(audio[start : start + step].tobytes())
+        await asyncio.sleep(0.01)
+    return await session.finish(), messages
+
+
+def test_failed_window_is_reported_and_session_continues():
+    # Three utterances, each finalized by the silence after it; the second call (partial or final) fails
+    audio = np.concatenate([tone(2), silence(1), tone(2), silence(1), tone(2), silence(1)])
+    text, messages = asyncio.run(record("live-flaky", FlakyBackend({2}), audio))
+
+    kinds = [message["type"] for message in messages]
+    assert kinds.count("error") == 1
+    error = messages[kinds.index("error")]
+    assert {"start", "end"} <= error.keys()
+    assert "provider unavailable" in error["detail"]
+    # Windows after the failure are still transcribed
+    assert "final" in kinds[kinds.index("error") + 1 :]
+    assert kinds[-1] != "error"
+
+    finals = [message["text"] for message in messages if message["type"] == "final"]
+    assert text == " ".join(finals)
+    stored = asyncio.run(get_session_store().read_text("live-flaky", STT_FILE))
+    assert stored.split() == finals
+
+
+def test_worker_failure_still_persists_partial_transcript(monkeypatch: pytest.MonkeyPatch):
+    audio = np.concatenate([tone(2), silence(1), tone(2), silence(1)])
+    original = LiveTranscriptionSession._step
+
+    async def step(self) -> None:
+        await original(self)
+        if self._segments:
+            raise RuntimeError("unexpected failure")
+
+    monkeypatch.setattr(LiveTranscriptionSession, "_step", step)
+    text, messages = asyncio.run(record("live-crash", FlakyBackend(set()), audio))
+
+    # The worker died after the first final window; finish() reports it, keeps that window
+    # and still transcribes the audio received since
+    finals = [message["text"] for message in messages if message["type"] == "final"]
+    assert len(finals) == 2
+    assert text == " ".join(finals)
+    closing = [message for message in messages if message["type"] == "error"]
+    assert len(closing) == 1
+    assert "start" not in closing[0]
+    assert "unexpected failure" in closing[0]["detail"]
+    assert asyncio.run(get_session_store().read_text("live-crash", STT_FILE)).split() == finals
@@ -0,0 +1,51 @@
+"""PDF OCR pipeline: page rendering feeding Vision OCR."""
+import asyncio
+import uuid
+from pathlib import Path
+
+import pytest
+
+from config import get_settings
+from services import ocr_service
+
+
+def test_pdf_pages_are_rendered_and_ocred_as_a_bounded_pipeline(monkeypatch: pytest.MonkeyPatch):
+    settings = get_settings().model_copy(
+        update={"pdf_text_layer_enabled": False, "ocr_max_concurrent_pages": 2, "pdf_render_max_workers": 1}
+    )
+    page_count = 12
+    run_id = uuid.uuid4().hex
+    rendered: list[int] = []
+    held: set[str] = set()
+    most_held = 0
+    first_ocr_after_renders = None
+
+    async def run_in_render_pool(function, pdf_path: str, number: int, *args):
+        nonlocal most_held
+        assert function is ocr_service._render_pdf_page
+        await asyncio.sleep(0.01)
+        rendered.append(number)
+        payload = f"{run_id}-{number}"
+        held.add(payload)
+        most_held = max(most_held, len(held))
+        return payload, "image/png", len(payload), 0.0
+
+    async def extract_with_retry(client, prompt: str, mime_type: str, base64_image: str, settings) -> str:
+        nonlocal first_ocr_after_renders
+        if first_ocr_after_renders is None:
+            first_ocr_after_renders = len(rendered)
+        await asyncio.sleep(0.05)
+        held.discard(base64_image)
+        return f"text of page {base64_image.rsplit('-', 1)[1]}"
+
+    monkeypatch.setattr(ocr_service, "run_in_render_pool", run_in_render_pool)
+    monkeypatch.setattr(ocr_service, "_extract_with_retry", extract_with_retry)
+    monkeypatch.setattr(ocr_service, "_count_pdf_pages", lambda path: page_count)
+
+    texts = asyncio.run(ocr_service._process_pdf(None, Path("contract.pdf"), settings))
+
+    assert texts == [f"text of page {number}" for number in range(1, page_count + 1)]
+    assert rendered == list(range(1, page_count + 1))
+    # OCR starts before the whole document is rendered, and rendered pages wait in a bounded window
+    assert first_ocr_after_renders < page_count
+    assert most_held <= settings.ocr_max_concurrent_pages + settings.pdf_render_max_workers
@@ -0,0 +1,81 @@
+"""Incremental analysis: merging per-upload facts and falling back to the full session text."""
+import asyncio
+import logging
+import uuid
+
+import pytest
+
+import agents
+from config import get_settings
+from services import analysis_service, preanalysis_service
+from services.preanalysis_service import SEGMENT_STT, add_segment
+from storage import STT_FILE, get_session_store
+
+
+@pytest.fixture
+def analyzed_inputs(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Enable incremental analysis with fake agents; collects the texts given to the analysis."""
+    settings = get_settings().model_copy(update={"incremental_analysis_enabled": True})
+    monkeypatch.setattr(preanalysis_service, "get_settings", lambda: settings)
+    monkeypatch.setattr(analysis_service, "get_settings", lambda: settings)
+    monkeypatch.setattr(agents, "extract_facts", lambda text: f"facts of {text.strip()}", raising=False)
+
+    inputs = []
+
+    def analyze_combined_text(text: str, *args, **kwargs) -> str:
+        inputs.append(text)
+        return "summary"
+
+    monkeypatch.setattr(agents, "analyze_combined_text", analyze_combined_text, raising=False)
+    return inputs
+
+
+async def upload_recording(session_id: str, text: str, incremental: bool) -> None:
+    # As stt_service does for each recording; without a segment when uploaded with incremental analysis off
+    await get_session_store().append_text(session_id, STT_FILE, f"\n{text}")
+    if incremental:
+        await add_segment(session_id, SEGMENT_STT, text)
+
+
+def test_analysis_merges_facts_when_every_upload_has_a_segment(analyzed_inputs: list[str]):
+    session_id = f"incremental-{uuid.uuid4().hex}"
+
+    async def scenario() -> None:
+        await upload_recording(session_id, "first recording", incremental=True)
+        await upload_recording(session_id, "second recording", incremental=True)
+        await analysis_service.analyze_session(session_id)
+
+    asyncio.run(scenario())
+    assert "facts of first recording" in analyzed_inputs[0]
+    assert "facts of second recording" in analyzed_inputs[0]
+
+
+def test_analysis_falls_back_to_full_text_for_mixed_sessions(analyzed_inputs: list[str]):
+    session_id = f"mixed-{uuid.uuid4().hex}"
+
+    async def scenario() -> None:
+        await upload_recording(session_id, "recording before the switch", incremental=False)
+        await upload_recording(session_id, "recording after the switch", incremental=True)
+        await analysis_service.analyze_session(session_id)
+
+    asyncio.run(scenario())
+    assert "recording before the switch" in analyzed_inputs[0]
+    assert "recording after the switch" in analyzed_inputs[0]
+    assert "facts of" not in analyzed_inputs[0]
+
+
+def test_failed_extraction_is_logged(analyzed_inputs: list[str], monkeypatch: pytest.MonkeyPatch, caplog):
+    session_id = f"failing-{uuid.uuid4().hex}"
+
+    def extract_facts(text: str) -> str:
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(agents, "extract_facts", extract_facts, raising=False)
+
+    async def scenario() -> None:
+        await upload_recording(session_id, "unlucky recording", incremental=True)
+        await asyncio.gather(*preanalysis_service._pending.values())
+
+    with caplog.at_level(logging.ERROR, logger=preanalysis_service.__name__):
+        asyncio.run(scenario())
+    assert any(session_id in record.getMessage() and record.exc_info for record in caplog.records)
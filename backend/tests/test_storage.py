@@ -0,0 +1,113 @@
+"""Behavior shared by the session store backends."""
+import asyncio
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from storage import STT_FILE, FilesystemSessionStore, SessionStore, SQLiteSessionStore
+from storage.sqlite import transaction
+
+
+@pytest.fixture(params=["filesystem", "sqlite"])
+def store(request: pytest.FixtureRequest, tmp_path: Path) -> SessionStore:
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    return FilesystemSessionStore(str(tmp_path / "sessions"))
+
+
+@pytest.mark.parametrize("zone", [timezone.utc, timezone(timedelta(hours=9)), timezone(timedelta(hours=-5))])
+def test_list_sessions_accepts_timezone_aware_bounds(store: SessionStore, zone: timezone):
+    asyncio.run(store.append_text("tz-session", STT_FILE, "text"))
+    now = datetime.now(zone)
+
+    def listed(**bounds) -> list[str]:
+        return [info.session_id for info in asyncio.run(store.list_sessions(**bounds))]
+
+    assert listed(created_after=now - timedelta(minutes=1)) == ["tz-session"]
+    assert listed(created_after=now + timedelta(minutes=1)) == []
+    assert listed(created_before=now + timedelta(minutes=1)) == ["tz-session"]
+    assert listed(created_before=now - timedelta(minutes=1)) == []
+    # Naive bounds are local time
+    assert listed(created_after=datetime.now() - timedelta(minutes=1)) == ["tz-session"]
+
+
+def test_sqlite_store_uses_incremental_auto_vacuum(tmp_path: Path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    assert store._conn().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert store._conn().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # Deleted sessions are returned to the file system by vacuum()
+    for index in range(20):
+        asyncio.run(store.append_text(f"vacuum-{index}", STT_FILE, "x" * 50_000))
+    store._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(store.db_path)
+    for index in range(20):
+        asyncio.run(store.delete_session(f"vacuum-{index}"))
+    asyncio.run(store.vacuum())
+    store._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    assert os.path.getsize(store.db_path) < size / 2
+
+
+def test_sqlite_store_converts_existing_database_to_incremental_auto_vacuum(tmp_path: Path):
+    path = tmp_path / "sessions.db"
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE legacy (value TEXT)")
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    conn.close()
+
+    store = SQLiteSessionStore(str(path))
+    assert store._conn().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_sqlite_transaction_commits_or_rolls_back(tmp_path: Path):
+    conn = sqlite3.connect(tmp_path / "transaction.db", isolation_level=None)
+    conn.execute("CREATE TABLE items (value TEXT)")
+    with transaction(conn):
+        conn.execute("INSERT INTO items VALUES ('kept')")
+    with pytest.raises(RuntimeError):
+        with transaction(conn):
+            conn.execute("INSERT INTO items VALUES ('dropped')")
+            raise RuntimeError("failed")
+    assert [row[0] for row in conn.execute("SELECT value FROM items")] == ["kept"]
+
+
+def test_scan_sessions_pages_through_all_sessions_in_id_order(store: SessionStore):
+    session_ids = [f"scan-{index:03d}" for index in range(25)]
+    for session_id in reversed(session_ids):
+        asyncio.run(store.append_text(session_id, STT_FILE, "text"))
+
+    def scan_pass() -> list[list[str]]:
+        pages = []
+        after = None
+        while sessions := asyncio.run(store.scan_sessions(after, limit=10)):
+            pages.append([info.session_id for info in sessions])
+            after = sessions[-1].session_id
+        return pages
+
+    assert scan_pass() == [session_ids[:10], session_ids[10:20], session_ids[20:]]
+    # A new pass sees sessions created since the last one
+    asyncio.run(store.append_text("scan-999", STT_FILE, "text"))
+    assert scan_pass()[-1] == [*session_ids[20:], "scan-999"]
+
+
+def test_filesystem_scan_lists_the_directory_once_per_pass(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    store = FilesystemSessionStore(str(tmp_path / "sessions"))
+    for index in range(25):
+        asyncio.run(store.append_text(f"scan-{index:03d}", STT_FILE, "text"))
+    listings = []
+    list_session_names = store._list_session_names
+
+    def counted() -> list[str]:
+        listings.append(True)
+        return list_session_names()
+
+    monkeypatch.setattr(store, "_list_session_names", counted)
+
+    after = None
+    while sessions := asyncio.run(store.scan_sessions(after, limit=5)):
+        after = sessions[-1].session_id
+    assert len(listings) == 1
@@ -0,0 +1,127 @@
+"""Uploads are streamed to disk once and refused as soon as they pass the size limit."""
+import asyncio
+import os
+import tempfile
+
+import pytest
+from starlette.datastructures import Headers
+
+import services.upload_service as upload_service
+from config import get_settings
+from main import app
+from services.upload_service import StreamedUploadFile, UploadTooLargeError, save_upload_to_temp
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def small_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = get_settings().model_copy(update={"max_audio_size_mb": 1})
+    monkeypatch.setattr(upload_service, "get_settings", lambda: settings)
+
+
+def multipart(size: int) -> tuple[bytes, str]:
+    boundary = "test-boundary"
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="session_id"\r\n\r\nupload-test\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.wav"\r\n\r\n'
+    ).encode()
+    body += b"\0" * size + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def post(body: bytes, headers: dict[str, str]) -> tuple[int, int]:
+    """POST body to the audio endpoint in 64 KiB chunks; returns the status and the bytes the app read."""
+    chunks = [body[start : start + 64 * 1024] for start in range(0, len(body), 64 * 1024)]
+    read = 0
+    status = 0
+
+    async def receive() -> dict:
+        nonlocal read
+        chunk = chunks.pop(0)
+        read += len(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/upload/audio",
+        "raw_path": b"/api/upload/audio",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+    return status, read
+
+
+def test_oversized_content_length_is_refused_before_the_body_is_read(small_limit):
+    body, content_type = multipart(2 * MB)
+    status, read = post(body, {"Content-Type": content_type, "Content-Length": str(len(body))})
+    assert status == 413
+    assert read == 0
+
+
+def test_oversized_chunked_body_is_refused_at_the_limit(small_limit):
+    uploads_before = {name for name in os.listdir(tempfile.gettempdir()) if name.startswith("upload-")}
+    body, content_type = multipart(4 * MB)
+    status, read = post(body, {"Content-Type": content_type})
+    assert status == 413
+    # Stopped reading just past the 1 MB limit rather than at 4 MB
+    assert read < 1.2 * MB
+    uploads_after = {name for name in os.listdir(tempfile.gettempdir()) if name.startswith("upload-")}
+    assert uploads_after <= uploads_before
+
+
+def test_upload_within_the_limit_is_accepted(small_limit):
+    body, content_type = multipart(MB // 2)
+    status, read = post(body, {"Content-Type": content_type, "Content-Length": str(len(body))})
+    assert status == 200
+    assert read == len(body)
+
+
+def test_streamed_upload_is_moved_not_copied():
+    async def run() -> None:
+        file = StreamedUploadFile("a.wav", Headers())
+        file.file.write(b"audio")
+        file.file.flush()
+        file.size = 5
+        source = file.path
+        inode = os.stat(source).st_ino
+
+        path = await save_upload_to_temp(file, ".wav", 1)
+        try:
+            assert not source.exists()
+            assert path.suffix == ".wav"
+            assert os.stat(path).st_ino == inode
+            assert path.read_bytes() == b"audio"
+            # Closing the form no longer deletes the moved file
+            await file.close()
+            assert path.exists()
+        finally:
+            path.unlink()
+
+    asyncio.run(run())
+
+
+def test_oversized_streamed_upload_is_refused_without_copying():
+    async def run() -> None:
+        file = StreamedUploadFile("a.wav", Headers())
+        file.size = 2 * MB
+        with pytest.raises(UploadTooLargeError):
+            await save_upload_to_temp(file, ".wav", 1)
+        source = file.path
+        await file.close()
+        assert not source.exists()
+
+    asyncio.run(run())
@@ -1,54 +1,123 @@
 const sessionId = crypto.randomUUID();
-let mediaRecorder, audioChunks = [];
+let liveSocket, audioContext, processor, micStream;
 
-const uploadAudio = async (blob) => {
-  const formData = new FormData();
-  formData.append("session_id", sessionId);
-  formData.append("file", blob, "recording.wav");
-  await fetch("/api/upload/audio", { method: "POST", body: formData });
+// 녹음 중 16kHz PCM을 WebSocket으로 보내고 부분 전사 결과를 바로 표시
+const startLiveRecording = async () => {
+  micStream = await navigator.mediaDevices.getUserMedia({ audio: true });
+  audioContext = new AudioContext({ sampleRate: 16000 });
+  const source = audioContext.createMediaStreamSource(micStream);
+  processor = audioContext.createScriptProcessor(4096, 1, 1);
+
+  const protocol = location.protocol === "https:" ? "wss" : "ws";
+  liveSocket = new WebSocket(`${protocol}://${location.host}/api/live/audio/${sessionId}`);
+
+  const transcriptEl = document.getElementById("liveTranscript");
+  transcriptEl.classList.remove("hidden");
+  let finalized = transcriptEl.innerText ? transcriptEl.innerText + "\n" : "";
+
+  liveSocket.onmessage = (event) => {
+    const message = JSON.parse(event.data);
+    if (message.type === "partial") transcriptEl.innerText = finalized + message.text;
+    if (message.type === "final") {
+      finalized += message.text + "\n";
+      transcriptEl.innerText = finalized;
+    }
+    if (message.type === "error") console.warn(message.detail);
+    if (message.type === "done") liveSocket.close();
+  };
+
+  processor.onaudioprocess = (event) => {
+    if (liveSocket.readyState !== WebSocket.OPEN) return;
+    const input = event.inputBuffer.getChannelData(0);
+    const pcm = new Int16Array(input.length);
+    for (let i = 0; i < input.length; i++) pcm[i] = Math.max(-1, Math.min(1, input[i])) * 0x7fff;
+    liveSocket.send(pcm.buffer);
+  };
+
+  source.connect(processor);
+  processor.connect(audioContext.destination);
+};
+
+const stopLiveRecording = () => {
+  processor.disconnect();
+  audioContext.close();
+  micStream.getTracks().forEach((track) => track.stop());
+  if (liveSocket.readyState === WebSocket.OPEN) liveSocket.send(JSON.stringify({ type: "stop" }));
 };
 
 document.getElementById("recordBtn").addEventListener("click", async (e) => {
-  if (!mediaRecorder || mediaRecorder.state === "inactive") {
-    const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-    mediaRecorder = new MediaRecorder(stream);
-    audioChunks = [];
-
-    mediaRecorder.ondataavailable = (event) => audioChunks.push(event.data);
-    mediaRecorder.onstop = async () => {
-      const blob = new Blob(audioChunks, { type: "audio/wav" });
-      await uploadAudio(blob);
-      alert("녹음 업로드 완료!");
-    };
-
-    mediaRecorder.start();
+  if (!audioContext || audioContext.state === "closed") {
+    await startLiveRecording();
     e.target.textContent = "⏹ 녹음 종료";
   } else {
-    mediaRecorder.stop();
+    stopLiveRecording();
     e.target.textContent = "🎙 녹음 시작";
   }
 });
 
 document.getElementById("uploadImageBtn").addEventListener("click", async () => {
-  const file = document.getElementById("fileImage").files[0];
-  if (!file) return alert("파일을 선택하세요.");
+  const files = document.getElementById("fileImage").files;
+  if (!files.length) return alert("파일을 선택하세요.");
   const formData = new FormData();
   formData.append("session_id", sessionId);
-  formData.append("file", file);
-  await fetch("/api/upload/document", { method: "POST", body: formData });
-  alert("파일 업로드 완료!");
-});
-
-document.getElementById("analyzeBtn").addEventListener("click", async () => {
-  document.getElementById("loading").classList.remove("hidden");
-  const res = await fetch(`/api/analyze/session/${sessionId}`, { method: "POST" });
+  for (const file of files) formData.append("files", file);
+  const res = await fetch("/api/upload/document/batch", { method: "POST", body: formData });
   const data = await res.json();
+  if (data.failed) {
+    const failed = data.files.filter(f => f.status === "error").map(f => `${f.filename}: ${f.error}`);
+    return alert(`${data.succeeded}개 업로드 완료, ${data.failed}개 실패\n${failed.join("\n")}`);
+  }
+  alert(`파일 ${data.succeeded}개 업로드 완료!`);
+});
 
-  document.getElementById("loading").classList.add("hidden");
-  document.getElementById("result").classList.remove("hidden");
+const showResult = (data) => {
   document.getElementById("summary").innerText = data.summary || "요약 정보가 없습니다.";
 
   // risks가 없으면 빈 리스트 표시
   const risksHtml = data.risks ? data.risks.map(r => `<li>${r}</li>`).join("") : "<li>위험 요소를 분석할 수 없습니다.</li>";
   document.getElementById("risks").innerHTML = risksHtml;
+};
+
+document.getElementById("analyzeBtn").addEventListener("click", async () => {
+  document.getElementById("loading").classList.remove("hidden");
+  const res = await fetch(`/api/analyze/session/${sessionId}/stream`, { method: "POST" });
+
+  if (!res.ok) {
+    document.getElementById("loading").classList.add("hidden");
+    return alert((await res.json()).detail);
+  }
+
+  // 토큰이 도착하는 대로 요약 영역에 표시
+  document.getElementById("result").classList.remove("hidden");
+  const summaryEl = document.getElementById("summary");
+  summaryEl.innerText = "";
+  const sections = {};
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value.replace(/\r\n/g, "\n");
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      const event = raw.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(raw.split("\n").filter(l => l.startsWith("data: ")).map(l => l.slice(6)).join("\n") || "{}");
+
+      // 병렬 모드에서는 태스크별 토큰이 섞여 오므로 태스크마다 따로 모음
+      if (event === "task_start") sections[data.task] = "";
+      if (event === "token") {
+        sections[data.task] = (sections[data.task] || "") + data.text;
+        summaryEl.innerText = Object.values(sections).join("\n\n");
+      }
+      if (event === "result") showResult(data);
+      if (event === "error") alert(data.detail);
+    }
+  }
+
+  document.getElementById("loading").classList.add("hidden");
 });
@@ -2,6 +2,8 @@
 
 # Run script for demo-hackerton project
 # This script activates the virtual environment and starts the FastAPI server
+# Usage: ./run.sh        development server with auto-reload
+#        ./run.sh prod   multi-worker production server (backend/serve.py)
 
 set -e
 
@@ -20,6 +22,14 @@ echo ""
 echo "Activating virtual environment..."
 source .venv/bin/activate
 
-echo "Starting FastAPI server..."
-echo ""
-cd backend && uvicorn main:app --reload --host 0.0.0.0 --port 8000
+cd backend
+if [ "$1" = "prod" ]; then
+    # One worker process per core (or WORKERS), sharing storage/
+    echo "Starting FastAPI server (production, multi-worker)..."
+    echo ""
+    python serve.py
+else
+    echo "Starting FastAPI server..."
+    echo ""
+    uvicorn main:app --reload --host 0.0.0.0 --port 8000
+fi